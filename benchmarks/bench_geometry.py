@@ -0,0 +1,66 @@
+"""Benchmark memory and construction rate of geotools points and windows.
+
+Reports the bytes per object, measured with tracemalloc, and objects created
+per second, for `Point`, `Window` and, per point, `PointArray`.
+
+Usage::
+
+    python benchmarks/bench_geometry.py [n]
+"""
+
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from planetarypy import geotools
+
+GEOTRANS = (-707109.7, 115.1, 0.0, 707109.7, 0.0, -115.1)
+
+
+def points(n):
+    return [geotools.Point(i, i) for i in range(n)]
+
+
+def points_with_geodata(n):
+    return [geotools.Point(i, i, geotrans=GEOTRANS) for i in range(n)]
+
+
+def windows(n):
+    return [
+        geotools.Window(geotools.Point(i, i), geotools.Point(i + 10, i + 10))
+        for i in range(n)
+    ]
+
+
+def window_copies(n):
+    window = geotools.Window(geotools.Point(0, 0), geotools.Point(10, 10))
+    return [window.copy() for _ in range(n)]
+
+
+def point_array(n):
+    samples = np.arange(n, dtype=float)
+    return geotools.PointArray(samples, samples, geotrans=GEOTRANS)
+
+
+def measure(create, n):
+    "Bytes per object and objects per second."
+    tracemalloc.start()
+    objects = create(n)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    t0 = time.perf_counter()
+    create(n)
+    return size / n, n / (time.perf_counter() - t0)
+
+
+def main(n=100_000):
+    for create in [points, points_with_geodata, windows, window_copies, point_array]:
+        size, rate = measure(create, n)
+        print(f"{create.__name__:>20}: {size:8.1f} B/object  {rate:14,.0f} objects/s")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,50 @@
+"""Benchmark the startup time of importing planetarypy modules, in milliseconds.
+
+Every import runs in a fresh interpreter, with a temporary home folder without
+config file, so that the import can't depend on reading it. The interpreter
+startup itself is measured separately and subtracted.
+
+Usage::
+
+    python benchmarks/bench_import.py [repeats]
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+MODULES = [
+    "planetarypy",
+    "planetarypy.utils",
+    "planetarypy.constants",
+    "planetarypy.pdstools.cli",
+    "planetarypy.pdstools.indices",
+]
+
+
+def startup_time(code, home, repeats):
+    "Best wall time of running `code` in a new interpreter."
+    env = dict(os.environ, HOME=home)
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", code], env=env, stdin=subprocess.DEVNULL, check=True
+        )
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(repeats=5):
+    with tempfile.TemporaryDirectory() as home:
+        base = startup_time("pass", home, repeats)
+        print(f"{'interpreter':>30}: {1000 * base:8.1f} ms")
+        for module in MODULES:
+            t = startup_time(f"import {module}", home, repeats) - base
+            print(f"{module:>30}: {1000 * t:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
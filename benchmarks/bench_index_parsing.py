@@ -0,0 +1,102 @@
+"""Benchmark the numpy byte-slice engine of `index_to_df` against pandas.read_fwf.
+
+The numpy engine is also timed with one worker process per CPU.
+
+A synthetic fixed-width index with the column layout of a typical PDS index is
+written into a temporary folder and parsed with both engines.
+
+Usage::
+
+    python benchmarks/bench_index_parsing.py [n_rows]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from planetarypy.pdstools import indices
+
+N_COLUMNS = 40
+FIELD_BYTES = 12
+
+
+def column(i, start):
+    data_type = ["CHARACTER", "ASCII_REAL", "ASCII_INTEGER", "TIME"][i % 4]
+    return f"""  OBJECT              = COLUMN
+    NAME              = COL{i}{"_TIME" if data_type == "TIME" else ""}
+    DATA_TYPE         = {data_type}
+    START_BYTE        = {start}
+    BYTES             = {FIELD_BYTES if data_type != "TIME" else 21}
+  END_OBJECT          = COLUMN
+"""
+
+
+def write_index(folder, n_rows):
+    columns = []
+    cells = []
+    start = 1
+    for i in range(N_COLUMNS):
+        columns.append(column(i, start))
+        kind = i % 4
+        if kind == 0:
+            cells.append(f"{'PRODUCT_' + str(i):>{FIELD_BYTES}}")
+        elif kind == 1:
+            cells.append(f"{i * 1.2345:{FIELD_BYTES}.4f}")
+        elif kind == 2:
+            cells.append(f"{i * 1000:{FIELD_BYTES}d}")
+        else:
+            cells.append("2010-123T12:34:56.789")
+        start += len(cells[-1]) + 1
+    record = ",".join(cells) + "\r\n"
+    label = f"""PDS_VERSION_ID        = PDS3
+RECORD_TYPE           = FIXED_LENGTH
+RECORD_BYTES          = {len(record)}
+FILE_RECORDS          = {n_rows}
+^INDEX_TABLE          = "INDEX.TAB"
+
+OBJECT                = INDEX_TABLE
+  INTERCHANGE_FORMAT  = ASCII
+  ROWS                = {n_rows}
+  COLUMNS             = {N_COLUMNS}
+  ROW_BYTES           = {len(record)}
+{"".join(columns)}END_OBJECT            = INDEX_TABLE
+END
+"""
+    (folder / "INDEX.LBL").write_text(label)
+    with open(folder / "INDEX.TAB", "w", newline="") as f:
+        f.write(record * n_rows)
+    return folder / "INDEX.LBL"
+
+
+def timeit(func, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(n_rows=200_000):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        label = indices.IndexLabel(write_index(Path(tmpdir), n_rows))
+        for engine in ["fwf", "numpy"]:
+            t = timeit(
+                lambda: indices.index_to_df(
+                    label.index_path, label, convert_times=False, engine=engine
+                )
+            )
+            print(f"{engine:>12}: {t:8.3f} s  ({n_rows / t:,.0f} rows/s)")
+        workers = os.cpu_count()
+        t = timeit(
+            lambda: indices.index_to_df(
+                label.index_path, label, convert_times=False, workers=workers
+            )
+        )
+        print(f"{f'{workers} workers':>12}: {t:8.3f} s  ({n_rows / t:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
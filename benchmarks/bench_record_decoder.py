@@ -0,0 +1,56 @@
+"""Benchmark decoding raw index records, in lines per second.
+
+Compares slicing every field of every line in Python, like `decode_line` does,
+with the `RecordDecoder` for different batch sizes, on the synthetic index of
+`bench_index_parsing`. Batches of up to `RecordDecoder.small_batch` lines take
+the struct based path, which is also timed with numpy for comparison.
+
+Usage::
+
+    python benchmarks/bench_record_decoder.py [n_rows]
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+from bench_index_parsing import timeit, write_index
+
+from planetarypy.pdstools import indices
+
+
+def per_line(schema, lines):
+    for line in lines:
+        [col.decode(line) for col in schema.columns]
+
+
+def main(n_rows=100_000):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        label = indices.IndexLabel(write_index(Path(tmpdir), n_rows))
+        data = label.index_path.read_bytes()
+        record_bytes = label.record_bytes
+        lines = [data[i : i + record_bytes] for i in range(0, len(data), record_bytes)]
+        t = timeit(lambda: per_line(label.schema, lines))
+        print(f"{'per line':>24}: {n_rows / t:12,.0f} lines/s  (untyped bytes)")
+        decoder = label.record_decoder()
+        numpy_decoder = label.record_decoder()
+        numpy_decoder.small_batch = 0
+        for batch_size in [1, decoder.small_batch, 1000, n_rows]:
+            n_batches = min(n_rows // batch_size, 1000)
+            for path, dec in [("", decoder), (" numpy", numpy_decoder)]:
+                if path and batch_size > decoder.small_batch:
+                    continue
+
+                def run():
+                    for i in range(n_batches):
+                        dec.decode(lines[i * batch_size : (i + 1) * batch_size])
+
+                t = timeit(run)
+                name = f"batches of {batch_size}{path}"
+                print(f"{name:>24}: {n_batches * batch_size / t:12,.0f} lines/s")
+        t = timeit(lambda: decoder.decode(data))
+        print(f"{'one buffer':>24}: {n_rows / t:12,.0f} lines/s")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
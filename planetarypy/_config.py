@@ -1,4 +1,16 @@
+"""Configuration of planetarypy, read from `~/.planetarypy.toml` on first use.
+
+Nothing is read at import, and a missing config file is not an error: the data
+archive then defaults to `~/planetarypy_data`.
+Environment variables take precedence over the file:
+
+* ``PLANETARYPY_CONFIG``: path of the config file
+* ``PLANETARYPY_<SECTION>__<KEY>``: value of `key` in `section`, e.g.
+  ``PLANETARYPY_DATA_ARCHIVE__PATH=/data/planetarypy``
+"""
 import logging
+import os
+from collections.abc import Mapping
 from pathlib import Path
 
 import toml
@@ -8,6 +20,8 @@ logger = logging.getLogger(__name__)
 # create configpath depending on package name
 pkg_name = __name__.split(".")[0]
 configpath = Path.home() / f".{pkg_name}.toml"
+env_prefix = f"{pkg_name.upper()}_"
+default_data_root = Path.home() / f"{pkg_name}_data"
 
 
 def print_error():
@@ -23,6 +37,71 @@ you want to archive your downloaded data."""
     )
 
 
+class Config(Mapping):
+    """Lazily loaded, read-only view of the configuration.
+
+    The config file is read on the first access of a section, and the
+    environment variable overrides are applied on top of it.
+    Use `reload` after changing the file or the environment.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path, optional
+        Path of the config file. Default: ``PLANETARYPY_CONFIG`` or `configpath`
+    """
+
+    def __init__(self, path=None):
+        self._path = path
+        self._data = None
+
+    @property
+    def path(self):
+        "pathlib.Path: Path of the config file."
+        if self._path is not None:
+            return Path(self._path)
+        return Path(os.environ.get(f"{env_prefix}CONFIG", configpath))
+
+    @property
+    def data(self):
+        "dict: The loaded configuration."
+        if self._data is None:
+            self._data = self._load()
+        return self._data
+
+    def _load(self):
+        try:
+            data = toml.load(str(self.path))
+        except FileNotFoundError:
+            logger.info("No configuration file %s found.", self.path)
+            data = {}
+        data.setdefault("data_archive", {}).setdefault("path", str(default_data_root))
+        for name, value in os.environ.items():
+            if not name.startswith(env_prefix) or "__" not in name:
+                continue
+            section, _, key = name[len(env_prefix) :].lower().partition("__")
+            data.setdefault(section, {})[key] = value
+        return data
+
+    def reload(self):
+        "Read the config file and environment again on next access."
+        self._data = None
+
+    def __getitem__(self, section):
+        return self.data[section]
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({str(self.path)!r})"
+
+
+config = Config()
+
+
 def set_database_path(dbfolder):
     """Use to write the database path into the config.
 
@@ -34,36 +113,32 @@ def set_database_path(dbfolder):
     # First check if there's a config file, so that we don't overwrite
     # anything:
     try:
-        config = toml.load(str(configpath))
+        file_config = toml.load(str(config.path))
     except IOError:  # config file doesn't exist
-        config = {}  # create new config dictionary
+        file_config = {}  # create new config dictionary
 
     # check if there's an `data_archive` sub-dic
     try:
-        archive_config = config["data_archive"]
+        archive_config = file_config["data_archive"]
     except KeyError:
-        config["data_archive"] = {"path": dbfolder}
+        file_config["data_archive"] = {"path": str(dbfolder)}
     else:
-        archive_config["path"] = dbfolder
+        archive_config["path"] = str(dbfolder)
 
-    with open(configpath, "w") as f:
-        ret = toml.dump(config, f)
-    print(f"Saved database path {ret} into {configpath}.")
+    with open(config.path, "w") as f:
+        toml.dump(file_config, f)
+    config.reload()
+    print(f"Saved database path {dbfolder} into {config.path}.")
 
 
 def get_data_root():
-    config = toml.load(str(configpath))
     data_root = Path(config["data_archive"]["path"]).expanduser()
     data_root.mkdir(exist_ok=True, parents=True)
     return data_root
 
 
-if not configpath.exists():
-    print(f"No configuration file {configpath} found.\n")
-    savepath = input(
-        "Provide the path where all planetarypy-managed data should be stored:"
-    )
-    set_database_path(savepath)
-
-data_root = get_data_root()
-config = toml.load(str(configpath))
+def __getattr__(name):
+    # `data_root` used to be resolved at import
+    if name == "data_root":
+        return get_data_root()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
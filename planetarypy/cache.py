@@ -0,0 +1,372 @@
+"""Local cache of downloaded products, shared by all downloaders of planetarypy.
+
+Files are stored once per content, under their SHA-256 hash, in
+`<data_archive>/cache/objects`. An index maps each URL and validator (the
+ETag or Last-Modified header of the remote file) to its content, so a changed
+remote file is downloaded again, while identical content at several URLs, or
+several versions of the same content, is stored only once.
+When the cache grows beyond its size budget, the least recently used entries
+are evicted. The last use of a file is its access time, so lookups don't need
+to rewrite the index.
+
+Files are copied from the cache into their destination. With ``link=True``,
+they are hard-linked instead, so they don't take disk space twice. Cached files
+are read-only, so that a linked file can't be edited in place by accident,
+and linked files don't count against the budget, as evicting them would not
+free any space.
+
+The budget is read from the config, e.g. ``max_bytes = 50e9`` in the
+``[cache]`` section, or the ``PLANETARYPY_CACHE__MAX_BYTES`` environment
+variable.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import stat
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from . import utils
+from ._config import config, get_data_root
+
+logger = logging.getLogger(__name__)
+
+default_max_bytes = 20 * 2**30
+
+
+def _sha256(path):
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(2**20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def _materialize(source, dest, link=False):
+    "Place `source` at `dest`, as a copy or, if possible and `link`, as hard link."
+    dest = Path(dest)
+    if dest.exists() and os.path.samefile(source, dest):
+        return
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(f"{dest.name}.{os.getpid()}.tmp")
+    try:
+        linked = False
+        if link:
+            try:
+                os.link(source, tmp)
+                linked = True
+            except OSError:
+                # other file system, or no hard links supported
+                pass
+        if not linked:
+            # a writable copy, with the modification time of the download
+            shutil.copyfile(source, tmp)
+            shutil.copystat(source, tmp)
+            os.chmod(tmp, os.stat(tmp).st_mode | stat.S_IWUSR)
+        os.replace(tmp, dest)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+def _unlink(path):
+    "Remove a read-only file, which Windows refuses otherwise."
+    try:
+        os.chmod(path, stat.S_IRUSR | stat.S_IWUSR)
+    except FileNotFoundError:
+        return
+    os.unlink(path)
+
+
+class ProductCache:
+    """Content-addressed cache of remote files with LRU eviction.
+
+    The index is a JSON file that is updated under a file lock, so several
+    processes can share the cache.
+
+    Parameters
+    ----------
+    root : str or pathlib.Path, optional
+        Folder of the cache. Default: folder `cache` in the data archive
+    max_bytes : int, optional
+        Size budget of the stored files. Default: from the config, or
+        `default_max_bytes`
+    ttl : float
+        Seconds the validator of a URL is used without asking the server again,
+        see `utils.FreshnessCache`.
+    """
+
+    def __init__(self, root=None, max_bytes=None, ttl=300):
+        self._root = root
+        self._max_bytes = max_bytes
+        self.freshness = utils.FreshnessCache(
+            lambda: self.root / "freshness.json", ttl=ttl
+        )
+
+    @property
+    def root(self):
+        "pathlib.Path: Folder of the cache."
+        if self._root is None:
+            return get_data_root() / "cache"
+        return Path(self._root)
+
+    @property
+    def max_bytes(self):
+        "int: Size budget of the stored files."
+        if self._max_bytes is not None:
+            return self._max_bytes
+        return int(float(config.get("cache", {}).get("max_bytes", default_max_bytes)))
+
+    @property
+    def index_path(self):
+        return self.root / "index.json"
+
+    def object_path(self, sha256):
+        return self.root / "objects" / sha256[:2] / sha256
+
+    def _read_index(self):
+        if not self.index_path.exists():
+            return {}
+        return json.loads(self.index_path.read_text())
+
+    @contextmanager
+    def _index(self):
+        "The index for update, written back when the block is left."
+        with utils.file_lock(self.root / "index.lock"):
+            index = self._read_index()
+            yield index
+            utils.atomic_write(self.index_path, json.dumps(index, indent=1))
+
+    def _is_linked(self, sha256):
+        "Whether the stored file is hard-linked to a destination."
+        try:
+            return self.object_path(sha256).stat().st_nlink > 1
+        except FileNotFoundError:
+            return False
+
+    def _used(self, entry):
+        "Time of the last use of an index entry, the access time of its file."
+        try:
+            return self.object_path(entry["sha256"]).stat().st_atime
+        except FileNotFoundError:
+            return entry["used"]
+
+    def _sizes(self, linked):
+        objects = {
+            entry["sha256"]: entry["size"]
+            for versions in self._read_index().values()
+            for entry in versions.values()
+        }
+        return sum(
+            size
+            for sha256, size in objects.items()
+            if self._is_linked(sha256) == linked
+        )
+
+    @property
+    def size(self):
+        "int: Bytes of the stored files counting against `max_bytes`."
+        return self._sizes(linked=False)
+
+    @property
+    def linked_size(self):
+        "int: Bytes of the stored files that are hard-linked to destinations."
+        return self._sizes(linked=True)
+
+    def get(self, url, validator=""):
+        """Path of the cached file of `url` and `validator`.
+
+        Parameters
+        ----------
+        url : str
+            URL of the file.
+        validator : str
+            ETag or Last-Modified header of the wanted version. Empty, if the
+            server sends neither.
+
+        Returns
+        -------
+        pathlib.Path or None
+            Path in the cache, which is read-only, or None if not cached.
+        """
+        # the index is replaced atomically, so it can be read without the lock
+        entry = self._read_index().get(url, {}).get(validator)
+        if entry is None:
+            return None
+        path = self.object_path(entry["sha256"])
+        try:
+            # record the use in the access time, keeping the modification time
+            os.utime(path, (time.time(), path.stat().st_mtime))
+        except FileNotFoundError:
+            with self._index() as index:
+                index.get(url, {}).pop(validator, None)
+            return None
+        return path
+
+    def put(self, url, validator, path):
+        """Move a downloaded file into the cache.
+
+        Parameters
+        ----------
+        url : str
+            URL of the file.
+        validator : str
+            ETag or Last-Modified header of the downloaded version.
+        path : str or pathlib.Path
+            The downloaded file, which is moved into the cache.
+
+        Returns
+        -------
+        pathlib.Path
+            Path in the cache.
+        """
+        path = Path(path)
+        sha256 = _sha256(path)
+        target = self.object_path(sha256)
+        with self._index() as index:
+            if target.exists():
+                # identical content is stored already
+                path.unlink()
+            else:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.chmod(path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+                os.replace(path, target)
+            index.setdefault(url, {})[validator] = {
+                "sha256": sha256,
+                "size": target.stat().st_size,
+                "used": time.time(),
+            }
+            self._evict(index, keep=sha256)
+        return target
+
+    def _evict(self, index, keep=None):
+        """Remove least recently used entries until the files fit into `max_bytes`.
+
+        Files hard-linked to destinations are kept, removing them would not
+        free any space.
+        """
+        entries = sorted(
+            (self._used(entry), url, validator, entry["sha256"], entry["size"])
+            for url, versions in index.items()
+            for validator, entry in versions.items()
+            if not self._is_linked(entry["sha256"])
+        )
+        sizes = {sha256: size for *_, sha256, size in entries}
+        total = sum(sizes.values())
+        references = {}
+        for *_, sha256, _ in entries:
+            references[sha256] = references.get(sha256, 0) + 1
+        for _, url, validator, sha256, size in entries:
+            if total <= self.max_bytes:
+                break
+            if sha256 == keep:
+                continue
+            del index[url][validator]
+            if not index[url]:
+                del index[url]
+            references[sha256] -= 1
+            if not references[sha256]:
+                logger.debug("Evicting %s from the cache.", url)
+                _unlink(self.object_path(sha256))
+                total -= size
+
+    @contextmanager
+    def staging(self):
+        "Temporary folder for downloads, next to the cache to `put` them cheaply."
+        tmpdir = self.root / "tmp"
+        tmpdir.mkdir(parents=True, exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=tmpdir) as tmp:
+            yield Path(tmp)
+
+    def materialize(self, path, dest, link=False):
+        """Place a cached file at its destination.
+
+        Parameters
+        ----------
+        path : str or pathlib.Path
+            Path in the cache, as returned by `get` or `put`.
+        dest : str or pathlib.Path
+            Where to place the file.
+        link : bool
+            Switch to hard-link the cached file to `dest`, instead of copying it.
+            The linked file is read-only and stays stored while it is linked.
+
+        Returns
+        -------
+        pathlib.Path
+            `dest`
+        """
+        _materialize(path, dest, link)
+        return Path(dest)
+
+    def validator(self, url):
+        """Current validator of `url`, with a conditional HEAD request.
+
+        Within the `ttl` of the last check, no request is made. If the server
+        can't be reached, the validator of the most recently used cached
+        version is returned, so that cached files are available offline.
+        """
+        try:
+            headers = self.freshness.check(url)
+        except utils._transient_errors():
+            versions = self._read_index().get(url)
+            if not versions:
+                raise
+            logger.warning("%s not reachable, using the cached version.", url)
+            return max(versions, key=lambda validator: self._used(versions[validator]))
+        return headers["etag"] or headers["last_modified"] or ""
+
+    def fetch(self, url, dest=None, link=False, **kwargs):
+        """Get a remote file via the cache.
+
+        Parameters
+        ----------
+        url : str
+            HTTP(S) URL of the file.
+        dest : str or pathlib.Path, optional
+            Where to place the file. Default: Keep it in the cache only.
+        link : bool
+            Switch to hard-link the cached file to `dest`, instead of copying it.
+            The linked file is read-only and stays stored while it is linked.
+        **kwargs : {dict}
+            Keyword args to be handed to `utils.download` on a cache miss, e.g.
+            `md5` or `reporthook`. A cached file not matching `md5` is
+            downloaded again.
+
+        Returns
+        -------
+        pathlib.Path
+            `dest` or the path in the cache.
+        """
+        validator = self.validator(url)
+        path = self.get(url, validator)
+        md5 = kwargs.get("md5")
+        if path is not None and md5 is not None:
+            if utils._file_md5(path).hexdigest() != md5.lower():
+                logger.warning("Cached %s does not match its MD5, downloading.", url)
+                path = None
+        if path is None:
+            logger.debug("Cache miss of %s.", url)
+            with self.staging() as tmp:
+                downloaded, _ = utils.download(url, tmp, **kwargs)
+                path = self.put(url, validator, downloaded)
+        if dest is None:
+            return path
+        return self.materialize(path, dest, link)
+
+    def clear(self):
+        "Remove all files from the cache."
+        with self._index() as index:
+            index.clear()
+            for path in (self.root / "objects").glob("*/*"):
+                _unlink(path)
+            shutil.rmtree(self.root / "objects", ignore_errors=True)
+
+
+# shared by all downloaders, paths are resolved on first use
+product_cache = ProductCache()
@@ -1,19 +1,57 @@
-from . import factsheet_parse as fp
+"""Planetary constants from NASA's planetary factsheet.
 
+The constants are loaded on first access of one of the module attributes, from
+the copy of the factsheet shipped with planetarypy, or the one stored by
+`refresh`. No network access is needed.
+"""
+import sys
 
-# Create a pretty table
-planets_pretty = fp.parse_NASA_factsheet()
+# module attributes that are the row of the planet in `planets`
+planet_names = [
+    "mercury",
+    "venus",
+    "earth",
+    "mars",
+    "jupiter",
+    "saturn",
+    "neptune",
+    "uranus",
+]
 
-# Create the programmatic version with index having
-# no units, all lowercase and spaces removed
-planets = fp.get_programmatic_dataframe()
 
-# create planet versions that just refer to the columns of the `planets` object
-mercury = planets.loc['MERCURY']
-venus = planets.loc['VENUS']
-earth = planets.loc['EARTH']
-mars = planets.loc['MARS']
-jupiter = planets.loc['JUPITER']
-saturn = planets.loc['SATURN']
-neptune = planets.loc['NEPTUNE']
-uranus = planets.loc['URANUS']
+def __getattr__(name):
+    if name not in ["planets_pretty", "planets"] + planet_names:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # imports pandas
+    from . import factsheet_parse as fp
+
+    if name == "planets_pretty":
+        # Create a pretty table
+        value = fp.load_factsheet()
+    elif name == "planets":
+        # Create the programmatic version with index having
+        # no units, all lowercase and spaces removed
+        value = fp.get_programmatic_dataframe(sys.modules[__name__].planets_pretty)
+    elif name in planet_names:
+        # planet versions that just refer to the columns of the `planets` object
+        value = sys.modules[__name__].planets.loc[name.upper()]
+    globals()[name] = value
+    return value
+
+
+def refresh():
+    """Parse NASA's current factsheet and use it from now on.
+
+    The parsed factsheet is stored in the data archive, so that later sessions
+    use it as well.
+    """
+    from . import factsheet_parse as fp
+
+    fp.refresh()
+    _clear()
+
+
+def _clear():
+    "Forget the loaded constants, to load them again on next access."
+    for name in ["planets_pretty", "planets"] + planet_names:
+        globals().pop(name, None)
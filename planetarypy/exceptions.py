@@ -45,4 +45,10 @@ class ObserverNotSetError(KMASpiceError):
                   This operation had no effect."""
 
 
+class DownloadVerificationError(Error):
+    """Exception raised when a downloaded file has the wrong size or checksum."""
+
+    pass
+
+
 #
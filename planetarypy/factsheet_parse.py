@@ -1,13 +1,34 @@
-import pandas as pd
+"""Parse NASA's planetary factsheet into pandas DataFrames.
+
+A parsed copy of the factsheet is shipped with the package, so that no
+network access is needed to use the constants. `refresh` parses the current
+factsheet and stores it in the data archive, where `load_factsheet` prefers it
+over the shipped copy.
+"""
+from io import StringIO
+
 import numpy as np
+import pandas as pd
+
+from . import utils
+from ._config import get_data_root
+
+try:
+    # 3.6 compatibility
+    from importlib_resources import path as resource_path
+except ModuleNotFoundError:
+    from importlib.resources import path as resource_path
 
 all_planets_url = 'http://nssdc.gsfc.nasa.gov/planetary/factsheet/'
 
+fname = 'planets_factsheet.csv'
+
 
 def grep_url_data():
     # parse remote URL
-    df = pd.read_html(all_planets_url,
-                      header=0, index_col=0)[0]
+    r = utils.http_get(all_planets_url)
+    r.raise_for_status()
+    df = pd.read_html(StringIO(r.text), header=0, index_col=0)[0]
     # returning transform because planets on the index make more sense.
     # They are, in a way, another set of mesasurements for the given
     # parameters
@@ -36,15 +57,32 @@ def parse_NASA_factsheet():
         elif el == 'No':
             return 0.0
         elif 'Unknown' in el:
-            return np.NaN
+            return np.nan
         else:
-            return el
+            return el.replace(',', '')
 
-    df = df.applymap(convert_element)
+    df = df.map(convert_element)
 
     # Convert data types to their correct dtypes
-    df = df.convert_objects(convert_numeric=True)
+    for col in df.columns:
+        try:
+            df[col] = pd.to_numeric(df[col])
+        except (ValueError, TypeError):
+            pass
 
+    return set_dtypes(df)
+
+
+def set_dtypes(df):
+    """Use floats for all numeric columns, but integers for the number of moons.
+
+    Gives the same dtypes, no matter if a column happens to have decimals.
+    """
+    numeric = df.select_dtypes('number').columns
+    df = df.astype({col: float for col in numeric})
+    moons = 'Number of Moons'
+    if moons in numeric and df[moons].notna().all():
+        df[moons] = df[moons].astype(int)
     return df
 
 
@@ -68,8 +106,50 @@ def get_programmable_columns(df):
     return attributes.map(map_pretty_index_to_attribute)
 
 
-def get_programmatic_dataframe():
-    df = parse_NASA_factsheet()
+def get_programmatic_dataframe(df=None):
+    """Factsheet with the column names of `get_programmable_columns`.
 
+    Parameters
+    ----------
+    df : pandas.DataFrame, optional
+        Pretty factsheet. Default: `load_factsheet()`
+    """
+    df = load_factsheet() if df is None else df.copy()
     df.columns = get_programmable_columns(df)
     return df
+
+
+def cache_path():
+    "pathlib.Path: Location of the factsheet stored by `refresh`."
+    return get_data_root() / 'constants' / fname
+
+
+def load_factsheet():
+    """Load the parsed factsheet, without network access.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The pretty factsheet as from `parse_NASA_factsheet`, from the copy
+        stored by `refresh` or else from the one shipped with the package.
+    """
+    path = cache_path()
+    if path.exists():
+        return set_dtypes(pd.read_csv(path, index_col=0))
+    with resource_path('planetarypy.data', fname) as p:
+        return set_dtypes(pd.read_csv(p, index_col=0))
+
+
+def refresh():
+    """Parse the current factsheet and store it for `load_factsheet`.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The pretty factsheet.
+    """
+    df = parse_NASA_factsheet()
+    path = cache_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    utils.atomic_write(path, df.to_csv())
+    return df
@@ -10,21 +10,33 @@ lr = LowerRight
 Copyright (c) 2011 Klaus-Michael Aye. All rights reserved.
 """
 
+import numbers
 import os
 import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from math import atan2, degrees
 
-import matplotlib.cm as cm
-import matplotlib.pyplot as plt
 import numpy as np
-from matplotlib.pyplot import figure, show
-from mpl_toolkits.axes_grid1.anchored_artists import AnchoredSizeBar
 from osgeo import gdal, osr
 
+from . import rastertools
 from .exceptions import *
+from .rastertools import BlockCache  # noqa: F401
+from .rastertools import apply_geotransform, invert_geotransform
 
 gdal.UseExceptions()
 
+# number of projections per thread with cached coordinate transformations
+transformation_cache_size = 32
+
+_local = threading.local()
+
+# shared by the ImgData objects that use a block cache, see `ImgData`
+block_cache = rastertools.block_cache
+
 
 def calculate_image_azimuth(origPoint, newPoint, zero="right"):
     """Calculate azimuth angle between 2 image points.
@@ -118,6 +130,41 @@ def debug_srs(projection):
     return srs
 
 
+def _create_transformation(projection, to_lonlat):
+    srs = debug_srs(projection)
+    geog = srs.CloneGeogCS()
+    if to_lonlat:
+        return osr.CoordinateTransformation(srs, geog), srs, geog
+    return osr.CoordinateTransformation(geog, srs), srs, geog
+
+
+def get_transformation(projection, to_lonlat=True):
+    """Transformation between a projection and its geographic coordinate system.
+
+    Parsing the WKT and creating the transformation is slow compared to
+    transforming a point, so the transformations are kept in an LRU cache
+    keyed by (WKT, direction). OSR objects must not be shared between
+    threads, so every thread has its own cache.
+
+    Parameters
+    ==========
+    projection: <str> Projection WKT as given by GDAL datasets.GetProjection()
+    to_lonlat: <bool> Direction, from map coordinates to lon/lat if True
+
+    Returns
+    =======
+    osr.CoordinateTransformation, which must not be modified
+    """
+    try:
+        cached = _local.create_transformation
+    except AttributeError:
+        cached = lru_cache(maxsize=transformation_cache_size)(_create_transformation)
+        _local.create_transformation = cached
+    # the SpatialReferences are cached as well, to keep them alive
+    ct, _, _ = cached(projection, to_lonlat)
+    return ct
+
+
 def shift_to_center(x, y, geotransform):
     # if i'd shift, the centerpoint does not show center coordinates
     # so that seems wrong. am i overlooking something?
@@ -178,6 +225,19 @@ class Point:
     3 4
     """
 
+    # no instance dicts, as tiling jobs create huge numbers of points
+    __slots__ = (
+        "sample",
+        "line",
+        "x",
+        "y",
+        "lon",
+        "lat",
+        "centered",
+        "geotrans",
+        "proj",
+    )
+
     @classmethod
     def copy_geodata(cls, point, **kwargs):
         return cls(geotrans=point.geotrans, proj=point.proj, **kwargs)
@@ -213,6 +273,14 @@ class Point:
                 elif x is not None:
                     self.lonlat_to_meter()
 
+    def copy(self):
+        "Copy of the point, without re-doing any conversions."
+        new = Point(self.sample, self.line, self.x, self.y, self.lon, self.lat)
+        new.centered = self.centered
+        new.geotrans = self.geotrans
+        new.proj = self.proj
+        return new
+
     @property
     def pixels(self):
         return np.array([self.sample, self.line])
@@ -306,7 +374,7 @@ class Point:
             raise SomethingNotSetError(
                 (self.x, self.y), "Map coordinates not " "set for transformation."
             )
-        tInverse = gdal.InvGeoTransform(geotransform)
+        tInverse = invert_geotransform(geotransform)
         self.sample, self.line = gdal.ApplyGeoTransform(tInverse, self.x, self.y)
         return (self.sample, self.line)
 
@@ -325,8 +393,7 @@ class Point:
             projection = self.proj
         if projection is None:
             raise ProjectionNotSetError("lonlat_to_meter")
-        srs = debug_srs(projection)
-        ct = osr.CoordinateTransformation(srs, srs.CloneGeogCS())
+        ct = get_transformation(projection, to_lonlat=True)
         self.lon, self.lat, height = ct.TransformPoint(self.x, self.y)
         if self.lon < 0:
             self.lon = 360.0 - abs(self.lon)
@@ -337,8 +404,7 @@ class Point:
             projection = self.proj
         if projection is None:
             raise ProjectionNotSetError("lonlat_to_meter")
-        srs = debug_srs(projection)
-        ct = osr.CoordinateTransformation(srs.CloneGeogCS(), srs)
+        ct = get_transformation(projection, to_lonlat=False)
         # height not used so far!
         self.x, self.y, height = ct.TransformPoint(self.lon, self.lat)
         return (self.x, self.y)
@@ -347,6 +413,178 @@ class Point:
         return calculate_image_azimuth(self, p2, zero=zero)
 
 
+class PointArray:
+    """Many points with pixel, map and geographic coordinates as numpy arrays.
+
+    Vectorized counterpart of `Point` for converting large numbers of
+    coordinates: the geotransform is applied as one array operation and
+    projections are done in bulk with `TransformPoints`.
+
+    Parameters
+    ==========
+    Either:
+    sample, line: <array_like> pixel coordinates
+    or
+    x, y: <array_like> projection coordinates (km or m)
+    or
+    lon, lat: <array_like> geographical coordinates in degrees
+    geotrans: Geotransform as given by GDAL datasets.GetGeoTransform()
+    proj: Projection WKT as given by GDAL datasets.GetProjection()
+
+    The other coordinates are calculated as far as geotrans and proj allow.
+
+    >>> mola = MOLA()
+    >>> points = PointArray(x=[0, 5e5], y=[1, 6e5], geotrans=mola.geotrans)
+    >>> points.sample
+    array([ 6144.  , 10488.45...])
+    """
+
+    def __init__(
+        self,
+        sample=None,
+        line=None,
+        x=None,
+        y=None,
+        lon=None,
+        lat=None,
+        geotrans=None,
+        proj=None,
+    ):
+        self.sample, self.line = self._as_arrays(sample, line)
+        self.x, self.y = self._as_arrays(x, y)
+        self.lon, self.lat = self._as_arrays(lon, lat)
+        self.geotrans = geotrans
+        self.proj = proj
+        if sample is not None:
+            if geotrans is not None:
+                self.pixel_to_meter()
+                if proj is not None:
+                    self.meter_to_lonlat()
+        elif x is not None:
+            if geotrans is not None:
+                self.meter_to_pixel()
+            if proj is not None:
+                self.meter_to_lonlat()
+        elif lon is not None and proj is not None:
+            self.lonlat_to_meter()
+            if geotrans is not None:
+                self.meter_to_pixel()
+
+    @staticmethod
+    def _as_arrays(a, b):
+        if a is None:
+            return None, None
+        return np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+
+    @classmethod
+    def from_points(cls, points, geotrans=None, proj=None):
+        "Collect the coordinates of `Point` objects."
+        points = list(points)
+        kwargs = {}
+        for names in [("sample", "line"), ("x", "y"), ("lon", "lat")]:
+            if points and all(getattr(p, names[0]) is not None for p in points):
+                for name in names:
+                    kwargs[name] = [getattr(p, name) for p in points]
+        arr = cls(geotrans=geotrans, proj=proj)
+        for name, values in kwargs.items():
+            setattr(arr, name, np.asarray(values, dtype=float))
+        return arr
+
+    def __len__(self):
+        for values in [self.sample, self.x, self.lon]:
+            if values is not None:
+                return len(values)
+        return 0
+
+    def __getitem__(self, i):
+        "The `i`-th point as `Point` object."
+
+        def item(values):
+            return None if values is None else values[i].item()
+
+        return Point(
+            item(self.sample),
+            item(self.line),
+            x=item(self.x),
+            y=item(self.y),
+            lon=item(self.lon),
+            lat=item(self.lat),
+        )
+
+    def __repr__(self):
+        return f"{type(self).__name__} of {len(self)} points"
+
+    def _geotransform(self, geotransform, method):
+        if geotransform is None:
+            geotransform = self.geotrans
+        else:
+            self.geotrans = geotransform
+        if geotransform is None:
+            raise ProjectionNotSetError(method)
+        return geotransform
+
+    def _projection(self, projection, method):
+        if projection is None:
+            projection = self.proj
+        else:
+            self.proj = projection
+        if projection is None:
+            raise ProjectionNotSetError(method)
+        return projection
+
+    def pixel_to_meter(self, geotransform=None):
+        "Calculate and return the arrays x, y."
+        geotransform = self._geotransform(geotransform, "pixel_to_meter")
+        if self.sample is None:
+            raise SomethingNotSetError("pixel_to_meter", "'sample'")
+        self.x, self.y = apply_geotransform(geotransform, self.sample, self.line)
+        return (self.x, self.y)
+
+    def meter_to_pixel(self, geotransform=None):
+        "Calculate and return the arrays sample, line."
+        geotransform = self._geotransform(geotransform, "meter_to_pixel")
+        if self.x is None:
+            raise SomethingNotSetError("meter_to_pixel", "'x'")
+        inverse = invert_geotransform(geotransform)
+        self.sample, self.line = apply_geotransform(inverse, self.x, self.y)
+        return (self.sample, self.line)
+
+    def meter_to_lonlat(self, projection=None):
+        "Calculate and return the arrays lon, lat, with longitudes in [0, 360)."
+        projection = self._projection(projection, "meter_to_lonlat")
+        if self.x is None:
+            raise SomethingNotSetError("meter_to_lonlat", "'x'")
+        ct = get_transformation(projection, to_lonlat=True)
+        lon, lat = self._transform(ct, self.x, self.y)
+        self.lon = np.where(lon < 0, lon + 360.0, lon)
+        self.lat = lat
+        return (self.lon, self.lat)
+
+    def lonlat_to_meter(self, projection=None):
+        "Calculate and return the arrays x, y."
+        projection = self._projection(projection, "lonlat_to_meter")
+        if self.lon is None:
+            raise SomethingNotSetError("lonlat_to_meter", "'lon'")
+        ct = get_transformation(projection, to_lonlat=False)
+        self.x, self.y = self._transform(ct, self.lon, self.lat)
+        return (self.x, self.y)
+
+    @staticmethod
+    def _transform(ct, a, b):
+        if not len(a):
+            return np.array([]), np.array([])
+        out = np.array(ct.TransformPoints(np.column_stack([a, b])))
+        return out[:, 0], out[:, 1]
+
+    def pixel_to_lonlat(self, geotransform=None, projection=None):
+        self.pixel_to_meter(geotransform)
+        return self.meter_to_lonlat(projection)
+
+    def lonlat_to_pixel(self, geotransform=None, projection=None):
+        self.lonlat_to_meter(projection)
+        return self.meter_to_pixel(geotransform)
+
+
 class Window:
     """class to manage a window made of corner Points (objects of Point())
 
@@ -355,6 +593,8 @@ class Window:
     >>> p2 = Point(10,20)
     """
 
+    __slots__ = ("ul", "lr", "center", "width")
+
     def __init__(self, ulPoint=None, lrPoint=None, centerPoint=None, width=None):
         if not any([lrPoint, centerPoint, width]):
             self.usage()
@@ -376,25 +616,7 @@ class Window:
                 return
 
     def copy(self):
-        win = Window(
-            Point(
-                self.ul.sample,
-                self.ul.line,
-                x=self.ul.x,
-                y=self.ul.y,
-                lon=self.ul.lon,
-                lat=self.ul.lat,
-            ),
-            Point(
-                self.lr.sample,
-                self.lr.line,
-                x=self.lr.x,
-                y=self.lr.y,
-                lon=self.lr.lon,
-                lat=self.lr.lat,
-            ),
-        )
-        return win
+        return Window(self.ul.copy(), self.lr.copy())
 
     def __str__(self):
         s = f"{self.ul()}, {self.lr()}, {self.width}, {self.center()}"
@@ -473,7 +695,17 @@ class Window:
 
 
 class ImgData:
-    """docstring for ImgData"""
+    """docstring for ImgData
+
+    Windows are read directly from the dataset, unless `block_cache` is set to
+    a `BlockCache`, e.g. the shared `geotools.block_cache`, for a dataset
+    from which many overlapping windows are read:
+
+    >>> mola = MOLA()
+    >>> mola.block_cache = block_cache
+    """
+
+    block_cache = None
 
     def __init__(self, fname=None):
         self.fname = fname
@@ -490,9 +722,33 @@ class ImgData:
             self.X // 2, self.Y // 2, geotrans=self.geotrans, proj=self.projection
         )
 
+    def _cache_key(self, band):
+        "Identifies the dataset version and `band` in the block cache."
+        try:
+            mtime = os.stat(self.fname).st_mtime_ns
+        except (OSError, TypeError):
+            # e.g. GDAL virtual file systems
+            mtime = None
+        return (os.path.abspath(self.fname), mtime, band)
+
     def _read_data(self, band):
+        name = band
         band = getattr(self, band)
-        data = band.ReadAsArray(*self.window.get_gdal_window())
+        sample, line, width, height = self.window.get_gdal_window()
+        inside = (
+            0 <= sample
+            and 0 <= line
+            and width > 0
+            and height > 0
+            and sample + width <= self.X
+            and line + height <= self.Y
+        )
+        if self.block_cache is not None and inside:
+            data = self.block_cache.read_window(
+                self._cache_key(name), band, sample, line, width, height
+            )
+        else:
+            data = band.ReadAsArray(sample, line, width, height)
         ndv = band.GetNoDataValue()
         mdata = np.ma.masked_equal(data, ndv)
         self.data = data
@@ -581,6 +837,81 @@ class ImgData:
         self._read_data(band)
         return self.data
 
+    def _aligned_tile_size(self, tile_size):
+        "Tile size rounded to a multiple of the native block size, where smaller."
+        if isinstance(tile_size, numbers.Integral):
+            tile_size = (tile_size, tile_size)
+        return tuple(
+            max(block, round(size / block) * block) if block <= size else size
+            for size, block in zip(tile_size, self.band1.GetBlockSize())
+        )
+
+    def tile_windows(self, tile_size=1024, overlap=0):
+        """Windows that tile the raster, row by row.
+
+        Parameters
+        ==========
+        tile_size: <int> or <tuple> (samples, lines) of a tile. Rounded to a
+            multiple of the native block size of the raster, so that without
+            overlap each block is read by one tile only.
+        overlap: <int> pixels the tiles extend into their neighbours on each
+            side, clipped at the edges of the raster. The blocks at the edges
+            of a tile are then read by up to four tiles.
+
+        >>> mola = MOLA()
+        >>> win = next(mola.tile_windows(512, overlap=8))
+        >>> win.get_gdal_window()
+        [0, 0, 520, 520]
+        """
+        width, height = self._aligned_tile_size(tile_size)
+        for line in range(0, self.Y, height):
+            for sample in range(0, self.X, width):
+                yield Window(
+                    Point(max(sample - overlap, 0), max(line - overlap, 0)),
+                    Point(
+                        min(sample + width + overlap, self.X),
+                        min(line + height + overlap, self.Y),
+                    ),
+                )
+
+    def iter_tiles(self, tile_size=1024, overlap=0, workers=1, band="band1"):
+        """Read the raster tile by tile, with concurrent reads.
+
+        Every worker thread opens its own dataset, as GDAL handles must not be
+        shared between threads, so the ImgData object itself is not changed
+        and can be used meanwhile.
+
+        Parameters
+        ==========
+        tile_size, overlap: see `tile_windows`
+        workers: <int> number of threads reading tiles
+        band: <str> band to read, e.g. 'band1'
+
+        Yields
+        ======
+        (Window, numpy.ndarray) for each tile, in the order of `tile_windows`
+        """
+        band_number = int(band.replace("band", ""))
+        local = threading.local()
+
+        def read(window):
+            if not hasattr(local, "dataset"):
+                local.dataset = gdal.Open(self.fname)
+            data = local.dataset.GetRasterBand(band_number).ReadAsArray(
+                *window.get_gdal_window()
+            )
+            return window, data
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # bounded read-ahead, to keep the memory use independent of the size
+            pending = deque()
+            for window in self.tile_windows(tile_size, overlap):
+                pending.append(executor.submit(read, window))
+                if len(pending) > 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
     def window_coords_to_meter(self):
         self.window.ul.pixel_to_meter(self.geotrans)
         self.window.lr.pixel_to_meter(self.geotrans)
@@ -604,7 +935,9 @@ class ImgData:
         return self.data
 
     def show(self, lonlat=False, cb=False):
-        fig = figure()
+        import matplotlib.pyplot as plt
+
+        fig = plt.figure()
         ax = fig.add_subplot(111)
         extent = self.window.get_extent(self.dataset, lonlat)
         im = ax.imshow(self.data, extent=extent)  # ,origin='image')
@@ -617,9 +950,11 @@ class ImgData:
         if cb:
             fig.colorbar(im)
         self.ax = ax
-        show()
+        plt.show()
 
     def add_scalebar(self, loc=3):
+        from mpl_toolkits.axes_grid1.anchored_artists import AnchoredSizeBar
+
         extent = self.window.get_extent(self.dataset)
         diffx = abs(extent[1] - extent[0]) * 1000
         diffy = abs(extent[3] - extent[2]) * 1000
@@ -652,8 +987,13 @@ class CTX(ImgData):
         ImgData.__init__(self, fname)
 
     def add_mola_contours(self):
+        import matplotlib.cm as cm
+        import matplotlib.pyplot as plt
+
         self.window_coords_to_lonlat()
         mola = MOLA()
+        # contours are drawn for many windows of the same MOLA dataset
+        mola.block_cache = block_cache
         mola.window = self.window.copy()
         mola.window_coords_to_pixel()
         mola.read_window(mola.window)
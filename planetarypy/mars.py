@@ -11,10 +11,6 @@ Copyright (c) 2011 Klaus-Michael Aye. All rights reserved.
 from osgeo import gdal, osr
 import sys
 import os
-from matplotlib.pyplot import figure, show
-import matplotlib.pyplot as plt
-import matplotlib.cm as cm
-from mpl_toolkits.axes_grid1.anchored_artists import AnchoredSizeBar
 import numpy as np
 from math import atan2, degrees
 from .exceptions import *
@@ -125,6 +121,19 @@ class Point(object):
     3 4
     """
 
+    # no instance dicts, as tiling jobs create huge numbers of points
+    __slots__ = (
+        "sample",
+        "line",
+        "x",
+        "y",
+        "lon",
+        "lat",
+        "centered",
+        "geotrans",
+        "proj",
+    )
+
     def __init__(
         self,
         sample=None,
@@ -156,6 +165,14 @@ class Point(object):
                 elif x is not None:
                     self.lonlat_to_meter()
 
+    def copy(self):
+        "Copy of the point, without re-doing any conversions."
+        new = Point(self.sample, self.line, self.x, self.y, self.lon, self.lat)
+        new.centered = self.centered
+        new.geotrans = self.geotrans
+        new.proj = self.proj
+        return new
+
     @property
     def pixels(self):
         return np.array([self.sample, self.line])
@@ -292,6 +309,8 @@ class Window(object):
     >>> p2 = Point(10,20)
     """
 
+    __slots__ = ("ul", "lr", "center", "width")
+
     def __init__(self, ulPoint=None, lrPoint=None, centerPoint=None, width=None):
         if not any([lrPoint, centerPoint, width]):
             self.usage()
@@ -313,25 +332,7 @@ class Window(object):
                 return
 
     def copy(self):
-        win = Window(
-            Point(
-                self.ul.sample,
-                self.ul.line,
-                x=self.ul.x,
-                y=self.ul.y,
-                lon=self.ul.lon,
-                lat=self.ul.lat,
-            ),
-            Point(
-                self.lr.sample,
-                self.lr.line,
-                x=self.lr.x,
-                y=self.lr.y,
-                lon=self.lr.lon,
-                lat=self.lr.lat,
-            ),
-        )
-        return win
+        return Window(self.ul.copy(), self.lr.copy())
 
     def __call__(self):
         return self.ul(), self.lr(), self.width, self.center()
@@ -538,7 +539,9 @@ class ImgData(object):
         return self.data
 
     def show(self, lonlat=False, cb=False):
-        fig = figure()
+        import matplotlib.pyplot as plt
+
+        fig = plt.figure()
         ax = fig.add_subplot(111)
         extent = self.window.get_extent(self.dataset, lonlat)
         im = ax.imshow(self.data, extent=extent)  # ,origin='image')
@@ -551,9 +554,11 @@ class ImgData(object):
         if cb:
             fig.colorbar(im)
         self.ax = ax
-        show()
+        plt.show()
 
     def add_scalebar(self, loc=3):
+        from mpl_toolkits.axes_grid1.anchored_artists import AnchoredSizeBar
+
         extent = self.window.get_extent(self.dataset)
         diffx = abs(extent[1] - extent[0]) * 1000
         diffy = abs(extent[3] - extent[2]) * 1000
@@ -599,6 +604,9 @@ class CTX(ImgData):
         ImgData.__init__(self, fname)
 
     def add_mola_contours(self):
+        import matplotlib.cm as cm
+        import matplotlib.pyplot as plt
+
         self.window_coords_to_lonlat()
         mola = MOLA()
         mola.window = self.window.copy()
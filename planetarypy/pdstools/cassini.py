@@ -1,4 +1,6 @@
-from .._config import rootpath
+from pathlib import Path
+
+from .._config import config
 from ..utils import ProgressBar, download
 from . import indices
 
@@ -43,7 +45,17 @@ class META:
     def table_url(self):
         return self.folder_url + self.meta_filename + ".tab"
 
-    def download_table(self, local_folder="."):
+    def download_table(self, local_folder=".", cache=False):
+        """Download the label and table file.
+
+        Parameters
+        ----------
+        local_folder : str or pathlib.Path
+            Folder to store the files in.
+        cache : bool
+            Switch to get the files via the shared product cache, see
+            `planetarypy.cache`.
+        """
         baseurl = self.folder_url + self.meta_filename
         for ext in [".lbl", ".tab"]:
             filename = self.meta_filename + ext
@@ -51,7 +63,7 @@ class META:
             local_path = f"{local_folder}/{filename}"
             print("Downloading", local_path)
             with ProgressBar(unit="B", unit_scale=True, miniters=1, desc=url) as t:
-                download(url, local_path, reporthook=t.update_to, data=None)
+                download(url, local_path, reporthook=t.update_to, cache=cache)
 
     @property
     def label(self):
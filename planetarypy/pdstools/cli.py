@@ -1,6 +1,6 @@
 import click
-from .indices import fix_hirise_edrcumindex
-from . import indices
+
+# the commands import `indices` themselves, to keep `--help` fast
 
 CONTEXT_SETTINGS = dict(help_option_names=['-h', '--help'])
 
@@ -18,6 +18,8 @@ def fix_hirise_index(infile, outfile):
 
     Reads INFILE and creates OUTFILE.
     """
+    from .indices import fix_hirise_edrcumindex
+
     fix_hirise_edrcumindex(infile, outfile)
     print(infile)
     print(outfile)
@@ -29,6 +31,8 @@ def list_available():
     A list is printed that shows which index locations have been
     implemented with their URLs for downloading.
     """
+    from . import indices
+
     indices.list_available_index_files()
 
 @greet.command()
@@ -2,20 +2,31 @@
 
 The main user interface is the IndexLabel class which is able to load the table file for you.
 """
+import calendar
 import copy
+import datetime as dt
 import logging
+import operator
+import re
+import struct
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
+from typing import NamedTuple, Optional, Tuple
 from urllib.parse import urlsplit, urlunsplit
 
+import numpy as np
 import pandas as pd
 import pvl
 import toml
 from dateutil import parser
-from tqdm import tqdm
 
 from .. import utils
-from .._config import config
+from .._config import get_data_root
+from . import storage
 from .scraper import CTXIndex
 
 try:
@@ -26,7 +37,15 @@ except ModuleNotFoundError:
 
 logger = logging.getLogger(__name__)
 
-indices_root = Path(config["data_archive"]["path"]) / "indices"
+
+def get_indices_root():
+    "pathlib.Path: Folder of the downloaded indices in the data archive."
+    return get_data_root() / "indices"
+
+
+# ETag/Last-Modified of the index URLs, so that timestamp checks within the TTL
+# don't need a request
+freshness = utils.FreshnessCache(lambda: get_indices_root() / "freshness.json")
 
 
 @dataclass
@@ -45,7 +64,9 @@ class Index:
         value is the time of the last download.
     """
 
-    local_root = indices_root
+    # default: `get_indices_root()`
+    local_root = None
+    storage_format = storage.default_format
     key: str
     url: str
     timestamp: str
@@ -55,7 +76,8 @@ class Index:
         """Determine if the index needs to be downloaded.
 
         Download shall happen when (1) no local timestamp was stored or (2) when the remote timestamp
-        is newer.
+        is newer. The remote timestamp is taken from the `freshness` cache
+        if it was checked within its TTL.
 
         Parameters
         ----------
@@ -67,7 +89,7 @@ class Index:
         bool
             Boolean indicating if download shall happen.
         """
-        remote_timestamp = utils.get_remote_timestamp(self.url)
+        remote_timestamp = freshness.timestamp(self.url)
         self.new_timestamp = remote_timestamp
         if self.timestamp:
             if remote_timestamp > parser.parse(self.timestamp):
@@ -127,7 +149,8 @@ class Index:
 
     @property
     def local_dir(self):
-        p = self.local_root / f"{self.mission}/{self.instrument}/{self.index_name}"
+        root = get_indices_root() if self.local_root is None else self.local_root
+        p = root / f"{self.mission}/{self.instrument}/{self.index_name}"
         p.mkdir(parents=True, exist_ok=True)
         return p
 
@@ -135,6 +158,25 @@ class Index:
     def local_table_path(self):
         return self.local_dir / self.table_filename
 
+    def lock(self, blocking=True):
+        """Lock for downloading this index, shared with other processes.
+
+        Parameters
+        ----------
+        blocking : bool
+            Switch to wait for the lock. If False, BlockingIOError is raised if
+            another thread or process holds it.
+        """
+        return utils.file_lock(self.local_dir / ".download.lock", blocking)
+
+    def reload_timestamp(self):
+        """Update `timestamp` from the database file.
+
+        Another process might have downloaded the index while this one waited
+        for its lock.
+        """
+        self.timestamp = IndexDB().get_by_path(self.key).timestamp
+
     @property
     def local_label_path(self):
         return self.local_dir / self.label_filename
@@ -143,11 +185,156 @@ class Index:
     def local_hdf_path(self):
         return self.local_table_path.with_suffix(".hdf")
 
+    def local_storage_path(self, storage_format=None):
+        """Path of the converted index table.
+
+        Parameters
+        ----------
+        storage_format : str, optional
+            Key of `storage.formats`. Default: `Index.storage_format`
+        """
+        if storage_format is None:
+            storage_format = self.storage_format
+        return self.local_table_path.with_suffix(
+            storage.get_format(storage_format).suffix
+        )
+
     @property
     def df(self):
-        return pd.read_hdf(self.local_hdf_path)
+        return self.read_df()
+
+    def read_df(self, columns=None, where=None):
+        """Read the converted index table.
+
+        The file in `storage_format` is preferred, but files in other formats
+        from earlier downloads are read as well.
+
+        Parameters
+        ----------
+        columns : list, optional
+            Only read these columns. Default: all columns.
+        where : list of tuples, optional
+            Row filters in the form (column, op, value), see `index_to_df`.
+            Note that time columns are stored converted, so they need to be
+            compared to datetimes. For Parquet, all ops except 'startswith'
+            are used to skip row groups.
+        """
+        names = [self.storage_format] + list(storage.formats)
+        for name in dict.fromkeys(names):
+            path = self.local_storage_path(name)
+            if path.exists():
+                return storage.get_format(name).read(path, columns, where)
+        raise FileNotFoundError(
+            f"No converted table for {self.key} found, download it first."
+        )
 
-    def download(self, local_dir="", convert_to_hdf=True):
+    def convert(self, label_path=None, storage_format=None):
+        """Convert the downloaded index table into the fast loading `storage_format`.
+
+        Parameters
+        ----------
+        label_path : str, pathlib.Path, optional
+            Path to the downloaded label. Default: `local_label_path`
+        storage_format : str, optional
+            Key of `storage.formats`. Default: `Index.storage_format`
+
+        Returns
+        -------
+        pathlib.Path
+            Path of the converted file
+        """
+        if label_path is None:
+            label_path = self.local_label_path
+        if storage_format is None:
+            storage_format = self.storage_format
+        df = IndexLabel(label_path).read_index_data()
+        # stored next to the label, which might not be in `local_dir`
+        savepath = (
+            Path(label_path).parent / self.local_storage_path(storage_format).name
+        )
+        storage.get_format(storage_format).write(df, savepath)
+        return savepath
+
+    def update_incremental(self, local_dir="", storage_format=None):
+        """Append the rows added to the remote table since the last download.
+
+        Cumulative indices only grow by appending records, so instead of
+        downloading and converting the whole table, only the bytes behind the
+        last local record are downloaded with an HTTP Range request. Only these
+        new rows are parsed and appended to the converted table.
+        The last local record is downloaded again as well, to check that the
+        remote table was really only appended to.
+
+        Parameters
+        ----------
+        local_dir: str, pathlib.Path, optional
+            Folder of the previous download. Default: `local_dir`
+        storage_format : str, optional
+            Key of `storage.formats`. Default: `Index.storage_format`
+
+        Returns
+        -------
+        int or None
+            Number of appended rows, or None if a full download is required,
+            because there is no previous download, the label changed its layout,
+            the records don't match it or the remote table changed in other
+            ways than appending.
+        """
+        local_dir = Path(local_dir) if local_dir else self.local_dir
+        if storage_format is None:
+            storage_format = self.storage_format
+        label_path = local_dir / self.label_filename
+        savepath = local_dir / self.local_storage_path(storage_format).name
+        if not (label_path.exists() and savepath.exists()):
+            return None
+        label = IndexLabel(label_path)
+        schema = label.schema
+        if schema.record_bytes is None or not label.index_path.exists():
+            return None
+        try:
+            n_rows = len(label.open_mmap())
+        except MisalignedRecordsError:
+            return None
+        if not n_rows:
+            return None
+        record_bytes = schema.record_bytes
+        logger.info("Downloading %s.", self.url)
+        utils.download(self.url, local_dir, use_tqdm=False)
+        new_schema = compile_label(label_path)
+        if (new_schema.columns, new_schema.record_bytes) != (
+            schema.columns,
+            schema.record_bytes,
+        ):
+            return None
+        offset = (n_rows - 1) * record_bytes
+        logger.info("Downloading %s from byte %d on.", self.table_url, offset)
+        data = utils.get_byte_range(self.table_url, offset)
+        with open(label.index_path, "rb") as f:
+            f.seek(offset)
+            if data is None or data[:record_bytes] != f.read(record_bytes):
+                return None
+        # parse the new rows from a separate file and store them first, so
+        # that the local table is only extended once they are safely stored
+        new_path = label.index_path.with_name(label.index_path.name + ".new")
+        new_path.write_bytes(data)
+        try:
+            new_rows = MappedIndexTable(label, new_path).to_df(rows=slice(1, None))
+        except MisalignedRecordsError:
+            return None
+        finally:
+            new_path.unlink()
+        new_rows.index += n_rows - 1
+        if len(new_rows):
+            storage.append(new_rows, savepath, storage_format)
+        with open(label.index_path, "r+b") as f:
+            f.seek(offset + record_bytes)
+            f.truncate()
+            f.write(data[record_bytes:])
+        return len(new_rows)
+
+    def download(
+        self, local_dir="", convert_to_hdf=True, storage_format=None, incremental=False
+    ):
         """Wrapping URLs for downloading PDS indices and their label files.
 
         Parameters
@@ -160,7 +347,14 @@ class Index:
         local_dir: str, pathlib.Path, optional
             Path for local storage. Default: current directory and filename from URL
         convert_to_hdf : bool
-            Switch to convert the index automatically to a faster loading HDF file
+            Switch to convert the index automatically to a faster loading file,
+            in the format given by `storage_format`.
+        storage_format : str, optional
+            Key of `storage.formats`. Default: `Index.storage_format`
+        incremental : bool
+            Switch to only download and convert the rows appended since the last
+            download, see `update_incremental`. Falls back to a full download
+            when that's not possible.
         """
         if not local_dir:
             local_dir = self.local_dir
@@ -168,6 +362,21 @@ class Index:
         if not self.needs_download:
             print("Stored index is up-to-date.")
             return
+        with self.lock():
+            self.reload_timestamp()
+            if not self.needs_download:
+                print("Stored index was updated by another process.")
+                return
+            self._download(local_dir, convert_to_hdf, storage_format, incremental)
+
+    def _download(self, local_dir, convert_to_hdf, storage_format, incremental):
+        "Download and convert, while holding the lock of this index."
+        if incremental:
+            n_new = self.update_incremental(local_dir, storage_format)
+            if n_new is not None:
+                IndexDB().update_timestamp(self)
+                print(f"Appended {n_new} new rows.")
+                return
         label_url = self.url
         logger.info("Downloading %s." % label_url)
         local_label_path, _ = utils.download(label_url, local_dir)
@@ -175,14 +384,18 @@ class Index:
         local_data_path, _ = utils.download(self.table_url, local_dir)
         IndexDB().update_timestamp(self)
         if convert_to_hdf is True:
-            label = IndexLabel(local_label_path)
-            df = label.read_index_data()
-            savepath = local_data_path.with_suffix(".hdf")
-            df.to_hdf(savepath, "df")
-        print(f"Downloaded and converted to pandas HDF: {savepath}")
+            savepath = self.convert(local_label_path, storage_format)
+            print(f"Downloaded and converted to: {savepath}")
 
 
 class IndexDB:
+    """Database of the available indices and their download timestamps.
+
+    The user's copy of the database may be shared by several processes that
+    download indices. Its updates are therefore done under a file lock, merged
+    into the current content of the file and written atomically.
+    """
+
     fname = "pds_indices_db.toml"
     fpath = Path.home() / f".{fname}"
 
@@ -215,10 +428,14 @@ class IndexDB:
             path = self.fpath
         return toml.load(path)
 
+    @property
+    def lock_path(self):
+        return self.fpath.with_name(self.fpath.name + ".lock")
+
     def write_to_file(self):
-        "Write the config to user's home copy."
-        with open(self.fpath, "w") as f:
-            toml.dump(self.config, f)
+        "Write the config to user's home copy, atomically."
+        with utils.file_lock(self.lock_path):
+            utils.atomic_write(self.fpath, toml.dumps(self.config))
 
     def get_by_path(self, nested_key):
         """Get sub-dictionary by nested key.
@@ -254,6 +471,23 @@ class IndexDB:
             dic = dic.setdefault(key, {})
         dic[keys[-1]] = value
 
+    @property
+    def keys(self):
+        "list: Nested keys of all indices in the database."
+        keys = []
+
+        def walk(dic, prefix):
+            for key, value in dic.items():
+                if not isinstance(value, dict):
+                    continue
+                if "url" in value:
+                    keys.append(prefix + key)
+                else:
+                    walk(value, f"{prefix}{key}.")
+
+        walk(self.config, "")
+        return keys
+
     def list_indices(self):
         "Print index database in pretty form, using toml.dumps"
         print(toml.dumps(self.config))
@@ -263,11 +497,28 @@ class IndexDB:
         print("For example: indices.download('cassini.uvis.moon_summary'")
 
     def update_timestamp(self, index):
-        self.set_by_path(f"{index.key}.timestamp", index.new_timestamp.isoformat())
-        self.write_to_file()
+        """Store the timestamp of a new download of `index`.
+
+        The database file is re-read under its lock first, so that timestamps
+        stored by other processes in the meantime are kept.
+        """
+        nested_key = f"{index.key}.timestamp"
+        with utils.file_lock(self.lock_path):
+            if self.fpath.exists():
+                self.config = self.read_from_file()
+            self.set_by_path(nested_key, index.new_timestamp.isoformat())
+            utils.atomic_write(self.fpath, toml.dumps(self.config))
+        index.timestamp = index.new_timestamp.isoformat()
 
     def download(
-        self, key=None, label_url=None, local_dir="", convert_to_hdf=True, force=False
+        self,
+        key=None,
+        label_url=None,
+        local_dir="",
+        convert_to_hdf=True,
+        force=False,
+        storage_format=None,
+        incremental=False,
     ):
         """Wrapping URLs for downloading PDS indices and their label files.
 
@@ -281,7 +532,16 @@ class IndexDB:
         local_dir: str, pathlib.Path, optional
             Path for local storage. Default: current directory and filename from URL
         convert_to_hdf : bool
-            Switch to convert the index automatically to a faster loading HDF file
+            Switch to convert the index automatically to a faster loading file,
+            in the format given by `storage_format`.
+        force : bool
+            Switch to download even if the stored index is up-to-date.
+        storage_format : str, optional
+            Key of `storage.formats`. Default: `Index.storage_format`
+        incremental : bool
+            Switch to only download and convert the rows appended since the last
+            download, see `Index.update_incremental`. Falls back to a full
+            download when that's not possible.
         """
         if label_url is None:
             if key is not None:
@@ -291,9 +551,26 @@ class IndexDB:
         # check timestamp
         if not index.needs_download and not force:
             print("Stored index is up-to-date.")
-            return index.local_hdf_path
+            return index.local_storage_path(storage_format)
+        with index.lock():
+            index.reload_timestamp()
+            if not index.needs_download and not force:
+                print("Stored index was updated by another process.")
+                return index.local_storage_path(storage_format)
+            return self._download(
+                index, local_dir, convert_to_hdf, storage_format, incremental
+            )
+
+    def _download(self, index, local_dir, convert_to_hdf, storage_format, incremental):
+        "Download and convert `index`, while holding its lock."
         if not local_dir:
             local_dir = index.local_dir
+        if incremental:
+            n_new = index.update_incremental(local_dir, storage_format)
+            if n_new is not None:
+                self.update_timestamp(index)
+                print(f"Appended {n_new} new rows.")
+                return index.local_storage_path(storage_format)
         label_url = index.url
         logger.info("Downloading %s." % label_url)
         local_label_path, _ = utils.download(label_url, local_dir)
@@ -302,22 +579,191 @@ class IndexDB:
         local_data_path, _ = utils.download(data_url, local_dir)
         self.update_timestamp(index)
         if convert_to_hdf is True:
-            label = IndexLabel(local_label_path)
-            df = label.read_index_data()
-            savepath = local_data_path.with_suffix(".hdf")
-            df.to_hdf(savepath, "df")
-        print(f"Downloaded and converted to pandas HDF: {savepath}")
+            savepath = index.convert(local_label_path, storage_format)
+            print(f"Downloaded and converted to: {savepath}")
+
+    def check_all(self, keys=None, max_concurrency=16, max_per_host=4):
+        """Check which indices need a download, with concurrent HEAD requests.
+
+        The requests are conditional on the headers stored in the `freshness`
+        cache, and indices checked within its TTL are not requested at all.
+
+        Parameters
+        ----------
+        keys : list of str, optional
+            Nested keys of the indices to check. Default: all indices in the database.
+        max_concurrency : int
+            Maximum number of concurrent requests.
+        max_per_host : int
+            Maximum number of concurrent requests to the same host.
+
+        Returns
+        -------
+        dict
+            For each key if the index needs a download, or the raised exception.
+        """
+        indices = [self.get_by_path(key) for key in keys or self.keys]
+        return self._check_indices(indices, max_concurrency, max_per_host)
+
+    @staticmethod
+    def _check_indices(indices, max_concurrency, max_per_host):
+        "`check_all` for Index objects, setting their `new_timestamp`."
+        freshness.check_many(
+            [index.url for index in indices], max_concurrency, max_per_host
+        )
+        results = {}
+        for index in indices:
+            # served from the cache now
+            try:
+                results[index.key] = index.needs_download
+            except Exception as e:
+                results[index.key] = e
+        return results
+
+    def download_all(
+        self,
+        keys=None,
+        max_concurrency=8,
+        max_per_host=4,
+        convert_to_hdf=True,
+        force=False,
+        storage_format=None,
+    ):
+        """Download many indices concurrently.
+
+        First the timestamps of all indices are checked (see `check_all`), then
+        the labels and tables of the outdated ones are downloaded concurrently.
+        A download is converted once both of its files have arrived.
+        The number of concurrent connections is limited in total and per host,
+        and all downloads share one progress bar.
+        A failure of one index does not stop the others.
+        Indices that are being downloaded by another process are skipped.
+
+        Parameters
+        ----------
+        keys : list of str, optional
+            Nested keys of the indices to download. Default: all indices in the database.
+        max_concurrency : int
+            Maximum number of concurrent requests.
+        max_per_host : int
+            Maximum number of concurrent requests to the same host.
+        convert_to_hdf : bool
+            Switch to convert the indices automatically to a faster loading file,
+            in the format given by `storage_format`.
+        force : bool
+            Switch to download even if the stored index is up-to-date.
+        storage_format : str, optional
+            Key of `storage.formats`. Default: `Index.storage_format`
+
+        Returns
+        -------
+        dict
+            For each key the path of the converted file (of the table, if not
+            converted), None if it was up-to-date or downloaded by another
+            process, or the raised exception if the download failed.
+        """
+        indices = [self.get_by_path(key) for key in keys or self.keys]
+        host_limits = {
+            urlsplit(index.url).netloc: threading.BoundedSemaphore(max_per_host)
+            for index in indices
+        }
+
+        def fetch(url, index, reporthook):
+            with host_limits[urlsplit(url).netloc]:
+                return utils.download(
+                    url, index.local_dir, use_tqdm=False, reporthook=reporthook
+                )
+
+        results = {}
+        outdated = []
+        locks = {}
+        checks = self._check_indices(indices, max_concurrency, max_per_host)
+        for index in indices:
+            if isinstance(checks[index.key], Exception):
+                logger.error("Checking %s failed: %s", index.key, checks[index.key])
+                results[index.key] = checks[index.key]
+                continue
+            if checks[index.key] or force:
+                lock = ExitStack()
+                try:
+                    lock.enter_context(index.lock(blocking=False))
+                except BlockingIOError:
+                    logger.info("%s is downloaded by another process.", index.key)
+                else:
+                    index.reload_timestamp()
+                    if index.needs_download or force:
+                        outdated.append(index)
+                        locks[index.key] = lock
+                        continue
+                    lock.close()
+            results[index.key] = None
+        with ExitStack() as stack, ThreadPoolExecutor(
+            max_workers=max_concurrency
+        ) as executor:
+            for lock in locks.values():
+                stack.push(lock)
+            with utils.AggregateProgressBar(
+                unit="B",
+                unit_scale=True,
+                desc=f"{len(outdated)} indices",
+                disable=not outdated,
+            ) as progress:
+                futures = {}
+                for index in outdated:
+                    for url in [index.url, index.table_url]:
+                        future = executor.submit(
+                            fetch, url, index, progress.reporthook()
+                        )
+                        futures[future] = index
+                pending = {index.key: 2 for index in outdated}
+                for future in as_completed(futures):
+                    index = futures[future]
+                    if index.key in results:
+                        # the other file of this index failed already
+                        continue
+                    try:
+                        path, _ = future.result()
+                    except Exception as e:
+                        logger.error("Downloading %s failed: %s", index.key, e)
+                        results[index.key] = e
+                        continue
+                    pending[index.key] -= 1
+                    if pending[index.key]:
+                        continue
+                    try:
+                        if convert_to_hdf:
+                            path = index.convert(storage_format=storage_format)
+                        else:
+                            path = index.local_table_path
+                        self.update_timestamp(index)
+                    except Exception as e:
+                        logger.error("Converting %s failed: %s", index.key, e)
+                        results[index.key] = e
+                        continue
+                    finally:
+                        locks[index.key].close()
+                    results[index.key] = path
+        failed = [
+            key for key, result in results.items() if isinstance(result, Exception)
+        ]
+        if failed:
+            print(f"Failed to download: {', '.join(failed)}")
+        return results
 
     def __repr__(self):
         return toml.dumps(self.config)
 
 
-# global
-indexdb = IndexDB()
+def __getattr__(name):
+    # the database is only read on first use of the former global `indexdb`
+    if name == "indexdb":
+        globals()["indexdb"] = IndexDB()
+        return globals()["indexdb"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def list_available_index_files():
-    print(indexdb)
+    print(IndexDB())
 
 
 def replace_url_suffix(url, new_suffix=".tab"):
@@ -377,6 +823,10 @@ class PVLColumn(object):
     def item_offset(self):
         return self.pvlobj.get("ITEM_OFFSET")
 
+    @property
+    def data_type(self):
+        return self.pvlobj.get("DATA_TYPE", "CHARACTER")
+
     @property
     def colspecs(self):
         if self.items is None:
@@ -404,6 +854,131 @@ class PVLColumn(object):
         return self.pvlobj.__repr__()
 
 
+class ColumnSpec(NamedTuple):
+    "Byte layout and type of one COLUMN of a compiled `TableSchema`."
+
+    name: str
+    start: int
+    stop: int
+    data_type: str
+    items: Optional[int] = None
+    item_bytes: Optional[int] = None
+    item_offset: Optional[int] = None
+
+    @property
+    def name_as_list(self):
+        "Names of the item columns, or a list with only the column name."
+        if self.items is None:
+            return [self.name]
+        return [f"{self.name}_{i + 1}" for i in range(self.items)]
+
+    @property
+    def colspecs(self):
+        "(start, stop) of the column, or a list of them for each of the ITEMS."
+        if self.items is None:
+            return (self.start, self.stop)
+        starts = range(
+            self.start, self.start + self.items * self.item_offset, self.item_offset
+        )
+        return [(start, start + self.item_bytes) for start in starts]
+
+    def decode(self, linedata):
+        if self.items is None:
+            return linedata[self.start : self.stop]
+        return [linedata[start:stop] for start, stop in self.colspecs]
+
+
+class TableSchema(NamedTuple):
+    """Compiled, immutable layout of an index table, created by `compile_label`.
+
+    Being made of tuples only, it is hashable and cheap to pickle for worker
+    processes, as opposed to the PVL label it is compiled from.
+    """
+
+    tablename: str
+    index_name: str
+    record_bytes: Optional[int]
+    columns: Tuple[ColumnSpec, ...]
+
+    @property
+    def colnames(self):
+        return [name for col in self.columns for name in col.name_as_list]
+
+    @property
+    def colspecs(self):
+        colspecs = []
+        for col in self.columns:
+            if col.items is None:
+                colspecs.append(col.colspecs)
+            else:
+                colspecs.extend(col.colspecs)
+        return colspecs
+
+
+@lru_cache(maxsize=32)
+def _load_label(path, mtime_ns, size):
+    "Parse a label only once per modification time and size."
+    return pvl.load(path)
+
+
+@lru_cache(maxsize=32)
+def _compile_label(path, mtime_ns, size):
+    lbl = _load_label(path, mtime_ns, size)
+    pointer, index_name = [i for i in lbl if i[0].startswith("^")][0]
+    tablename = pointer[1:]
+    table = lbl[tablename]
+    columns = []
+    for column in table.getlist("COLUMN"):
+        pvlcol = PVLColumn(column)
+        items = pvlcol.items
+        columns.append(
+            ColumnSpec(
+                name=pvlcol.name,
+                start=pvlcol.start,
+                stop=pvlcol.stop,
+                data_type=pvlcol.data_type,
+                items=None if items is None else int(items),
+                item_bytes=None if items is None else int(pvlcol.item_bytes),
+                # PDS default for ITEM_OFFSET is ITEM_BYTES
+                item_offset=(
+                    None
+                    if items is None
+                    else int(pvlcol.item_offset or pvlcol.item_bytes)
+                ),
+            )
+        )
+    if lbl.get("RECORD_TYPE", "FIXED_LENGTH") != "FIXED_LENGTH":
+        record_bytes = None
+    elif "RECORD_BYTES" in lbl:
+        record_bytes = int(lbl["RECORD_BYTES"])
+    elif table.get("ROW_BYTES") is not None:
+        # ROW_BYTES does not include CR/LF
+        record_bytes = int(table["ROW_BYTES"]) + 2
+    else:
+        record_bytes = None
+    return TableSchema(tablename, str(index_name), record_bytes, tuple(columns))
+
+
+def compile_label(labelpath):
+    """Compile the label of an index table into a `TableSchema`.
+
+    The result is memoized per path, modification time and size of the label, so
+    repeated calls only stat the file.
+
+    Parameters
+    ----------
+    labelpath : str or pathlib.Path
+        Path to the label file.
+
+    Returns
+    -------
+    TableSchema
+    """
+    path = Path(labelpath).resolve()
+    stat = path.stat()
+    return _compile_label(str(path), stat.st_mtime_ns, stat.st_size)
+
+
 class IndexLabel(object):
     """Support working with label files of PDS Index tables.
 
@@ -417,17 +992,24 @@ class IndexLabel(object):
     def __init__(self, labelpath):
         self.path = Path(labelpath)
         "search for table name pointer and store key and fpath."
-        tuple = [i for i in self.pvl_lbl if i[0].startswith("^")][0]
-        self.tablename = tuple[0][1:]
-        self.index_name = tuple[1]
+        self.tablename = self.schema.tablename
+        self.index_name = self.schema.index_name
 
     @property
     def index_path(self):
         return self.path.parent / self.index_name
 
+    @property
+    def schema(self):
+        "TableSchema: The compiled label, see `compile_label`."
+        return compile_label(self.path)
+
     @property
     def pvl_lbl(self):
-        return pvl.load(str(self.path))
+        "The parsed label. It's cached, so copy it before modifying it."
+        path = self.path.resolve()
+        stat = path.stat()
+        return _load_label(str(path), stat.st_mtime_ns, stat.st_size)
 
     @property
     def table(self):
@@ -448,28 +1030,942 @@ class IndexLabel(object):
         The label file for the ISS indices describes the content
         of the index files.
         """
-        colnames = []
-        for col in self.pvl_columns:
-            colnames.extend(PVLColumn(col).name_as_list)
-        return colnames
+        return self.schema.colnames
 
     @property
     def colspecs(self):
-        colspecs = []
-        columns = self.table.getlist("COLUMN")
-        for column in columns:
-            pvlcol = PVLColumn(column)
-            if pvlcol.items is None:
-                colspecs.append(pvlcol.colspecs)
+        return self.schema.colspecs
+
+    @property
+    def record_bytes(self):
+        """int: Length of one record in the TAB file, including line terminators.
+
+        Taken from RECORD_BYTES of the label, falling back to ROW_BYTES of the table
+        plus CR/LF.
+        """
+        return self.schema.record_bytes
+
+    def open_mmap(self):
+        """Memory-map the index table for lazy, per-column access.
+
+        Returns
+        -------
+        MappedIndexTable
+        """
+        return MappedIndexTable(self)
+
+    def record_decoder(self, convert_times=True):
+        """Decoder for batches of raw records of this table, see `RecordDecoder`.
+
+        Returns
+        -------
+        RecordDecoder
+        """
+        return RecordDecoder(self, convert_times=convert_times)
+
+    def iter_chunks(
+        self, chunksize=100_000, convert_times=True, columns=None, where=None
+    ):
+        """Iterate over the index table in DataFrames of at most `chunksize` rows.
+
+        Each chunk is parsed like `read_index_data` does for the whole table,
+        with the index continuing the row numbers of the table, so that memory
+        usage stays bounded by the chunksize for arbitrarily large indices.
+
+        Parameters
+        ----------
+        chunksize : int
+            Maximum number of rows per chunk.
+        convert_times : bool
+            Switch to control if to convert columns with "TIME" in name to datetime
+        columns : list, optional
+            Only parse these columns, see `index_to_df`.
+        where : list of tuples, optional
+            Row filters applied per chunk, see `index_to_df`.
+            Chunks can become smaller than `chunksize` or empty with filters.
+
+        Yields
+        ------
+        pandas.DataFrame
+
+        Raises
+        ------
+        ValueError
+            If `columns` or `where` are given for an index without RECORD_BYTES.
+        """
+        if self.record_bytes is None:
+            if columns is not None or where is not None:
+                raise ValueError("'columns' and 'where' require fixed-length records.")
+        else:
+            try:
+                table = self.open_mmap()
+            except MisalignedRecordsError as e:
+                logger.warning("%s Falling back to the 'fwf' engine.", e)
             else:
-                colspecs.extend(pvlcol.colspecs)
-        return colspecs
+                for start in range(0, len(table), chunksize):
+                    yield table.to_df(
+                        columns,
+                        where,
+                        convert_times=convert_times,
+                        rows=slice(start, start + chunksize),
+                    )
+                return
+        reader = pd.read_fwf(
+            self.index_path,
+            header=None,
+            names=self.colnames,
+            colspecs=self.colspecs,
+            chunksize=chunksize,
+        )
+        for df in reader:
+            yield _select(df, self, columns, where, convert_times, verbose=False)
+
+    def read_index_data(
+        self, convert_times=True, engine="numpy", columns=None, where=None, workers=None
+    ):
+        return index_to_df(
+            self.index_path,
+            self,
+            convert_times=convert_times,
+            engine=engine,
+            columns=columns,
+            where=where,
+            workers=workers,
+        )
+
+
+def _to_number(cells, data_type):
+    "Convert an array of bytes cells to int64 or float64 according to `data_type`."
+    to_type = np.int64 if "INTEGER" in data_type else np.float64
+    try:
+        return cells.astype(to_type)
+    except ValueError:
+        # blanks or values not matching the declared type, let pandas coerce
+        numbers = pd.to_numeric(
+            np.char.strip(cells).astype(str).ravel(), errors="coerce"
+        )
+        return np.asarray(numbers, dtype=np.float64).reshape(cells.shape)
+
+
+def _decode_field(field, data_type):
+    """Decode a uint8 array of fixed-width byte cells.
+
+    Parameters
+    ----------
+    field : numpy.ndarray
+        Array of shape (n_rows, width) holding the raw bytes of one column,
+        or (n_rows, items, width) for a column with ITEMS.
+    data_type : str
+        PDS DATA_TYPE of the column, e.g. ASCII_REAL, ASCII_INTEGER, CHARACTER
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of shape field.shape[:-1]
+    """
+    width = field.shape[-1]
+    cells = np.ascontiguousarray(field).view(f"S{width}")[..., 0]
+    if "INTEGER" in data_type or "REAL" in data_type:
+        return _to_number(cells, data_type)
+    stripped = np.char.strip(cells)
+    decoded = stripped.astype(str).astype(object)
+    # same as read_fwf: empty cells are missing data
+    decoded[stripped == b""] = np.nan
+    return decoded
+
+
+class MisalignedRecordsError(ValueError):
+    "The records of a TAB file don't have the length given in its label."
+
+
+def _count_records(buffer, record_bytes, path):
+    """Number of records in `buffer`, the bytes of the TAB file at `path`.
+
+    All records must be `record_bytes` long and end with CR LF, only the last
+    record may miss (some of) its line terminator.
+
+    Raises
+    ------
+    MisalignedRecordsError
+        If the records don't match `record_bytes`.
+    """
+    n_rows, rest = divmod(buffer.size, record_bytes)
+    if rest and rest < record_bytes - 2:
+        raise MisalignedRecordsError(
+            f"Size of {path} is no multiple of RECORD_BYTES = {record_bytes}."
+        )
+    records = buffer[: n_rows * record_bytes].reshape(n_rows, record_bytes)
+    crlf = np.frombuffer(b"\r\n", dtype=np.uint8)
+    last = buffer[n_rows * record_bytes + record_bytes - 2 :]
+    if not (records[:, -2:] == crlf).all() or (last != crlf[: last.size]).any():
+        raise MisalignedRecordsError(
+            f"Records of {path} don't end at RECORD_BYTES = {record_bytes}."
+        )
+    return n_rows + bool(rest)
+
 
-    def read_index_data(self, convert_times=True):
-        return index_to_df(self.index_path, self, convert_times=convert_times)
+def read_fixed_width(indexpath, label, convert_times=False):
+    """Read a fixed-width PDS TAB file by byte-slicing it with numpy.
 
+    The file is read as one buffer and viewed as an array of shape
+    (n_rows, RECORD_BYTES), out of which each column is cut by strided slicing
+    and converted according to the DATA_TYPE given in the label.
 
-def index_to_df(indexpath, label, convert_times=True):
+    Parameters
+    ----------
+    indexpath : str or pathlib.Path
+        The path to the index TAB file.
+    label : pdstools.IndexLabel or TableSchema object
+        Label, or its compiled schema, providing the columns and 'record_bytes'
+    convert_times : bool
+        Switch to control if to convert time columns (see `convert_time_columns`)
+        to datetime, straight from their bytes.
+
+    Returns
+    -------
+    pandas.DataFrame
+
+    Raises
+    ------
+    MisalignedRecordsError
+        If the file doesn't consist of records of RECORD_BYTES, each ending
+        with a CR LF line terminator.
+    """
+    schema = getattr(label, "schema", label)
+    record_bytes = schema.record_bytes
+    specs = []
+    for col in schema.columns:
+        colspecs = [col.colspecs] if col.items is None else col.colspecs
+        for name, colspec in zip(col.name_as_list, colspecs):
+            specs.append((name, colspec, col.data_type))
+    buffer = np.fromfile(indexpath, dtype=np.uint8)
+    n_rows = _count_records(buffer, record_bytes, indexpath)
+    rest = buffer.size % record_bytes
+    if rest:
+        # last record is missing (some of) its line terminator
+        buffer = np.concatenate(
+            [buffer, np.frombuffer(b"\r\n"[rest - record_bytes :], dtype=np.uint8)]
+        )
+    records = buffer.reshape(n_rows, record_bytes)
+    data = {}
+    for name, (start, stop), data_type in specs:
+        if convert_times and _is_time_column(name):
+            data[name] = _to_datetime(records[:, start:stop])
+        else:
+            data[name] = _decode_field(records[:, start:stop], data_type)
+    return pd.DataFrame(data)
+
+
+class MappedIndexTable:
+    """Memory-mapped, lazily decoded access to the columns of a PDS index table.
+
+    At creation, only the line terminators of the records are checked, each
+    column is a strided numpy view into the memory map and only decoded when
+    it is accessed, so a lookup only touches the pages holding the requested
+    bytes.
+    Create it via `IndexLabel.open_mmap()`.
+
+    Columns can be accessed by their label NAME, which returns a 2D array of shape
+    (n_rows, ITEMS) for columns with ITEMS, or by the expanded names of
+    `IndexLabel.colnames` (e.g. CENTER_1).
+
+    Parameters
+    ----------
+    label : pdstools.IndexLabel or TableSchema object
+        Label of a TAB file with fixed-length records, or its compiled schema.
+    indexpath : str or pathlib.Path, optional
+        Path to the TAB file. Default: label.index_path, required for a schema.
+
+    Raises
+    ------
+    MisalignedRecordsError
+        If the records of the file don't match the label's RECORD_BYTES.
+    """
+
+    def __init__(self, label, indexpath=None):
+        self.schema = getattr(label, "schema", label)
+        self.path = Path(indexpath) if indexpath is not None else label.index_path
+        self.record_bytes = self.schema.record_bytes
+        if self.record_bytes is None:
+            raise ValueError("Memory mapping requires fixed-length records.")
+        self.pvlcols = {col.name: col for col in self.schema.columns}
+        self.items = {}
+        for name, pvlcol in self.pvlcols.items():
+            if pvlcol.items is not None:
+                for i, item_name in enumerate(pvlcol.name_as_list):
+                    self.items[item_name] = (name, i)
+        self.mmap = np.memmap(self.path, dtype=np.uint8, mode="r")
+        self.n_rows = _count_records(self.mmap, self.record_bytes, self.path)
+        self._decoded = {}
+
+    def __len__(self):
+        return self.n_rows
+
+    def __contains__(self, name):
+        return name in self.pvlcols or name in self.items
+
+    @property
+    def columns(self):
+        "list: Names of the PVL columns."
+        return list(self.pvlcols)
+
+    def raw(self, name):
+        """Zero-copy view on the bytes of a column.
+
+        Parameters
+        ----------
+        name : str
+            Column NAME as given in the label.
+
+        Returns
+        -------
+        numpy.ndarray
+            uint8 array of shape (n_rows, BYTES), or (n_rows, ITEMS, ITEM_BYTES)
+            for columns with ITEMS.
+        """
+        pvlcol = self.pvlcols[name]
+        if pvlcol.items is None:
+            shape = (self.n_rows, pvlcol.stop - pvlcol.start)
+            strides = (self.record_bytes, 1)
+        else:
+            shape = (self.n_rows, pvlcol.items, pvlcol.item_bytes)
+            strides = (self.record_bytes, pvlcol.item_offset, 1)
+        return np.lib.stride_tricks.as_strided(
+            self.mmap[pvlcol.start :], shape=shape, strides=strides, writeable=False
+        )
+
+    def __getitem__(self, name):
+        if name in self.items:
+            name, i = self.items[name]
+            return self[name][:, i]
+        if name not in self._decoded:
+            self._decoded[name] = _decode_field(
+                self.raw(name), self.pvlcols[name].data_type
+            )
+        return self._decoded[name]
+
+    def decode(self, name, rows=None):
+        """Decode a column, optionally only for a subset of rows.
+
+        Parameters
+        ----------
+        name : str
+            Label NAME or expanded item name of the column.
+        rows : numpy.ndarray, optional
+            Boolean mask or integer indices of the rows to decode. Default: all rows.
+        """
+        if rows is None:
+            return self[name]
+        if name in self.items:
+            name, i = self.items[name]
+            return self.decode(name, rows)[:, i]
+        return _decode_field(self.raw(name)[rows], self.pvlcols[name].data_type)
+
+    def times(self, name, rows=None):
+        """Convert a time column to datetime64 straight from its bytes.
+
+        Parameters
+        ----------
+        name : str
+            Label NAME or expanded item name of the column.
+        rows : numpy.ndarray, optional
+            Boolean mask, integer indices or slice of the rows to convert. Default: all rows.
+        """
+        if name in self.items:
+            base, i = self.items[name]
+            raw = self.raw(base)[:, i]
+        else:
+            raw = self.raw(name)
+        return _to_datetime(raw if rows is None else raw[rows])
+
+    def _predicate_column(self, name, value, rows=None):
+        "Column in the form best suited to be compared with `value`."
+        base = self.items[name][0] if name in self.items else name
+        data_type = self.pvlcols[base].data_type
+        if "INTEGER" in data_type or "REAL" in data_type:
+            return self.decode(name, rows)
+        if isinstance(value, (list, tuple, set)):
+            sample = next(iter(value), None)
+        else:
+            sample = value
+        if isinstance(sample, (dt.date, np.datetime64)):
+            return self.times(name, rows)
+        raw = self.raw(base)
+        if name in self.items:
+            raw = raw[:, self.items[name][1]]
+        if rows is not None:
+            raw = raw[rows]
+        # compare on the stripped bytes, without creating Python objects
+        return np.char.strip(
+            np.ascontiguousarray(raw).view(f"S{raw.shape[-1]}")[..., 0]
+        )
+
+    def filter_mask(self, filters, rows=None):
+        """Evaluate filters on the raw columns.
+
+        Parameters
+        ----------
+        filters : list of tuples
+            Each filter is a (column, op, value) tuple, with op one of
+            ==, !=, <, <=, >, >=, in, not in, startswith.
+            All filters must be fulfilled for a row to pass. String values are
+            compared to the stripped bytes of the column, hence times given as
+            strings need to be in the format used in the table, while
+            datetime values are compared to the converted times.
+        rows : slice, optional
+            Only evaluate the filters for this range of rows. Default: all rows.
+
+        Returns
+        -------
+        numpy.ndarray
+            Boolean mask of the rows that pass all filters.
+        """
+        n_rows = len(range(self.n_rows)[rows]) if rows is not None else self.n_rows
+        mask = np.ones(n_rows, dtype=bool)
+        for name, op, value in filters:
+            if op not in FILTER_OPS:
+                raise ValueError(f"Unknown filter operator {op!r}.")
+            if op in ("in", "not in") and not len(value):
+                # no row is in an empty sequence
+                if op == "in":
+                    mask[:] = False
+                continue
+            column = self._predicate_column(name, value, rows)
+            if column.dtype.kind == "S":
+                value = _encode_filter_value(value)
+            elif column.dtype.kind == "M":
+                value = _datetime_filter_value(value)
+            mask &= FILTER_OPS[op](column, value)
+        return mask
+
+    def to_df(self, columns=None, where=None, convert_times=True, rows=None):
+        """Decode columns into a DataFrame.
+
+        Parameters
+        ----------
+        columns : list, optional
+            Column names, either label NAMEs or expanded item names. Default: all columns.
+        where : list of tuples, optional
+            Row filters as described in `filter_mask`. Only rows passing all filters
+            are decoded, the index of the result holds their row numbers.
+        convert_times : bool
+            Switch to control if to convert columns with "TIME" in name to datetime
+        rows : slice, optional
+            Only decode this range of rows, the index of the result holds their
+            row numbers. Default: all rows.
+        """
+        if columns is None:
+            columns = self.columns
+        index = None if rows is None else np.asarray(range(self.n_rows)[rows])
+        if where is not None:
+            mask = self.filter_mask(where, rows)
+            index = np.flatnonzero(mask) if index is None else index[mask]
+            rows = index
+        data = {}
+        for name in columns:
+            if name in self.pvlcols and self.pvlcols[name].items is not None:
+                decoded = self.decode(name, rows)
+                for i, item_name in enumerate(self.pvlcols[name].name_as_list):
+                    data[item_name] = decoded[:, i]
+            elif convert_times and _is_time_column(name):
+                data[name] = self.times(name, rows)
+            else:
+                data[name] = self.decode(name, rows)
+        return pd.DataFrame(data, index=index)
+
+    def __repr__(self):
+        return f"MappedIndexTable({self.path}, rows={self.n_rows})"
+
+
+# YYYY-MM-DD or YYYY-DOY, optionally followed by THH[:MM[:SS[.fffffffff]]][Z]
+_TIME_PATTERN = re.compile(
+    rb"(\d{4})-(?:(\d\d)-(\d\d)|(\d{3}))"
+    rb"(?:T(\d\d)(?::(\d\d)(?::(\d\d)(?:\.(\d{0,9}))?)?)?Z?)?"
+)
+_NAT = np.datetime64("NaT", "ns").astype(np.int64)
+_EPOCH_ORDINAL = dt.date(1970, 1, 1).toordinal()
+
+
+def _cell_time(cell):
+    """Nanoseconds since the epoch of one time cell, like `utils.parse_nasa_times`.
+
+    Raises ValueError for values it doesn't handle, including invalid dates,
+    which are left to `utils.parse_nasa_times`.
+    """
+    cell = cell.strip()
+    if not cell:
+        return _NAT
+    match = _TIME_PATTERN.fullmatch(cell)
+    if match is None:
+        raise ValueError(f"Unable to parse time {cell!r}.")
+    year, month, day, doy, hour, minute, second, fraction = match.groups()
+    year = int(year)
+    if doy is None:
+        days = dt.date(year, int(month), int(day)).toordinal()
+    else:
+        doy = int(doy)
+        if not 1 <= doy <= 365 + calendar.isleap(year):
+            raise ValueError(f"Invalid day of year in {cell!r}.")
+        days = dt.date(year, 1, 1).toordinal() + doy - 1
+    seconds = (days - _EPOCH_ORDINAL) * 86400
+    if hour is not None:
+        hour = int(hour)
+        minute = int(minute or 0)
+        second = int(second or 0)
+        if hour > 23 or minute > 59 or second > 60:
+            raise ValueError(f"Invalid time of day in {cell!r}.")
+        seconds += hour * 3600 + minute * 60 + second
+    nanoseconds = seconds * 1_000_000_000
+    if fraction:
+        nanoseconds += int(fraction.ljust(9, b"0"))
+    return nanoseconds
+
+
+def _cell_integer(cell):
+    "Value of one integer cell, or None if blank."
+    cell = cell.strip()
+    if not cell:
+        return None
+    if not cell.lstrip(b"+-").isdigit():
+        # e.g. underscores, which Python accepts, but not numpy
+        raise ValueError(f"Invalid integer {cell!r}.")
+    return int(cell)
+
+
+def _cell_real(cell):
+    "Value of one real cell, NaN if blank."
+    cell = cell.strip()
+    if not cell:
+        return np.nan
+    if b"_" in cell:
+        raise ValueError(f"Invalid number {cell!r}.")
+    return float(cell)
+
+
+def _cell_string(cell):
+    "Value of one string cell, without surrounding blanks."
+    return cell.strip().decode("ascii")
+
+
+_CELL_CONVERTERS = {
+    "time": _cell_time,
+    "INTEGER": _cell_integer,
+    "REAL": _cell_real,
+    "string": _cell_string,
+}
+
+
+def _float_fields(dtype, names):
+    "Structured `dtype` with float64 fields `names` in place of its int64 fields."
+    return np.dtype(
+        {
+            "names": dtype.names,
+            "formats": [
+                np.float64 if name in names else dtype[name] for name in dtype.names
+            ],
+            "offsets": [dtype.fields[name][1] for name in dtype.names],
+            "itemsize": dtype.itemsize,
+        }
+    )
+
+
+class RecordDecoder:
+    """Decode batches of raw fixed-length records into typed structured arrays.
+
+    All byte offsets and dtypes are compiled from the label once at creation.
+    A batch is viewed as a numpy structured array whose fields point at the
+    column bytes, and every column is converted for the whole batch at once,
+    so there is no Python work per line or per field of a line.
+    Batches of up to `small_batch` lines, where the fixed cost of the numpy
+    calls would dominate, are instead split into fields by a precompiled
+    `struct.Struct` and converted in Python, into the precompiled output dtype.
+    Create it via `IndexLabel.record_decoder()`.
+
+    Columns with ITEMS are expanded into fields named like `IndexLabel.colnames`.
+    Numeric columns become int64 or float64 fields (float64 if a value is blank),
+    time columns datetime64[ns] and other columns unicode strings.
+
+    Parameters
+    ----------
+    label : pdstools.IndexLabel or TableSchema object
+        Label of a table with fixed-length records, or its compiled schema.
+    convert_times : bool
+        Switch to control if to convert time columns to datetime64.
+    """
+
+    # largest batch decoded in Python, larger ones are faster with numpy
+    small_batch = 8
+
+    def __init__(self, label, convert_times=True):
+        self.schema = getattr(label, "schema", label)
+        self.record_bytes = self.schema.record_bytes
+        if self.record_bytes is None:
+            raise ValueError("Decoding records requires fixed-length records.")
+        self.convert_times = convert_times
+        self.fields = []
+        for col in self.schema.columns:
+            colspecs = [col.colspecs] if col.items is None else col.colspecs
+            for name, (start, stop) in zip(col.name_as_list, colspecs):
+                self.fields.append((name, start, stop, col.data_type))
+        # fields of the same kind are converted together, to pay the numpy call
+        # overhead only once per kind, which dominates for small batches
+        self.groups = {"time": [], "INTEGER": [], "REAL": [], "string": []}
+        for name, _, _, data_type in self.fields:
+            if convert_times and _is_time_column(name):
+                self.groups["time"].append(name)
+            elif "INTEGER" in data_type:
+                self.groups["INTEGER"].append(name)
+            elif "REAL" in data_type:
+                self.groups["REAL"].append(name)
+            else:
+                self.groups["string"].append(name)
+        self.raw_dtype = np.dtype(
+            {
+                "names": [name for name, *_ in self.fields],
+                "formats": [f"S{stop - start}" for _, start, stop, _ in self.fields],
+                "offsets": [start for _, start, _, _ in self.fields],
+                "itemsize": self.record_bytes,
+            }
+        )
+        # decoded dtype if no integer value is blank
+        kinds = {name: kind for kind, names in self.groups.items() for name in names}
+        formats = {
+            "time": "datetime64[ns]",
+            "INTEGER": np.int64,
+            "REAL": np.float64,
+        }
+        self.dtype = np.dtype(
+            [
+                (name, formats.get(kinds[name], f"U{stop - start}"))
+                for name, start, stop, _ in self.fields
+            ]
+        )
+        # for the small batch path, the struct format of the fields in line order,
+        # skipping the bytes between them, and the dtype of their converted
+        # values, with times as int64 nanoseconds, which is viewed as `dtype`
+        fmt = []
+        order = []
+        end = 0
+        for name, start, stop, _ in sorted(self.fields, key=lambda field: field[1]):
+            if start < end:
+                # overlapping fields, only the batched path can decode them
+                self._struct = None
+                break
+            fmt.append(f"{start - end}x{stop - start}s")
+            order.append(name)
+            end = stop
+        else:
+            self._struct = struct.Struct("".join(fmt))
+            self._converters = [_CELL_CONVERTERS[kinds[name]] for name in order]
+            self._values_dtype = np.dtype(
+                {
+                    "names": order,
+                    "formats": [
+                        np.int64 if kinds[name] == "time" else self.dtype[name]
+                        for name in order
+                    ],
+                    "offsets": [self.dtype.fields[name][1] for name in order],
+                    "itemsize": self.dtype.itemsize,
+                }
+            )
+
+    @property
+    def names(self):
+        "list: Field names of the decoded records."
+        return list(self.raw_dtype.names)
+
+    def records(self, lines):
+        """Zero-copy view of a batch of lines as raw byte fields.
+
+        Parameters
+        ----------
+        lines : bytes, buffer, numpy.ndarray or list of bytes
+            Either one buffer of concatenated records, or a sequence of single
+            records. Records can miss (part of) their line terminator.
+
+        Returns
+        -------
+        numpy.ndarray
+            Structured array with one bytes field per column.
+        """
+        if isinstance(lines, (list, tuple)):
+            # a C-level copy that pads each line with NULs to the record length
+            buffer = np.array(lines, dtype=f"S{self.record_bytes}").view(np.uint8)
+        else:
+            buffer = np.frombuffer(lines, dtype=np.uint8)
+        rest = buffer.size % self.record_bytes
+        if rest:
+            buffer = np.concatenate(
+                [buffer, np.zeros(self.record_bytes - rest, dtype=np.uint8)]
+            )
+        return buffer.view(self.raw_dtype)
+
+    def decode(self, lines):
+        """Decode a batch of lines into typed values.
+
+        Parameters
+        ----------
+        lines : bytes, buffer, numpy.ndarray or list of bytes
+            See `records`.
+
+        Returns
+        -------
+        numpy.ndarray
+            Structured array with one typed field per column.
+        """
+        if isinstance(lines, bytes) and len(lines) <= self.small_batch * (
+            self.record_bytes
+        ):
+            lines = [
+                lines[i : i + self.record_bytes]
+                for i in range(0, len(lines), self.record_bytes)
+            ]
+        if isinstance(lines, (list, tuple)) and 0 < len(lines) <= self.small_batch:
+            try:
+                return self._decode_small(lines)
+            except (ValueError, OverflowError, UnicodeDecodeError):
+                # values only the batched conversion handles, e.g. invalid times
+                pass
+        raw = self.records(lines)
+        data = {}
+        for kind, names in self.groups.items():
+            if not names:
+                continue
+            # (n_lines, n_fields) array of bytes cells, padded to the widest field
+            cells = np.stack([raw[name] for name in names], axis=1)
+            if kind == "time":
+                values = utils.parse_nasa_times(cells).reshape(cells.shape).T
+            elif kind == "string":
+                values = np.char.strip(cells).astype(f"U{cells.itemsize}").T
+            else:
+                try:
+                    values = cells.astype(
+                        np.int64 if kind == "INTEGER" else np.float64
+                    ).T
+                except ValueError:
+                    # field by field, so that only fields with blanks become float
+                    values = [_to_number(raw[name], kind) for name in names]
+            data.update(zip(names, values))
+        string_fields = set(self.groups["string"])
+        decoded = np.empty(
+            len(raw),
+            dtype=[
+                (
+                    name,
+                    (
+                        f"U{raw.dtype[name].itemsize}"
+                        if name in string_fields
+                        else data[name].dtype
+                    ),
+                )
+                for name in self.names
+            ],
+        )
+        for name, values in data.items():
+            decoded[name] = values
+        return decoded
+
+    __call__ = decode
+
+    def _decode_small(self, lines):
+        """Decode a few lines in Python, with the precompiled struct and dtypes.
+
+        Raises ValueError if a value needs the batched conversion.
+        """
+        if self._struct is None:
+            raise ValueError("Overlapping fields need the batched conversion.")
+        if any(b"\0" in line for line in lines):
+            raise ValueError("NUL bytes need the batched conversion.")
+        unpack = self._struct.unpack_from
+        converters = self._converters
+        width = self.record_bytes
+        # padded with blanks instead of the NULs of `records`, both are stripped
+        rows = [
+            tuple(
+                [
+                    convert(cell)
+                    for convert, cell in zip(converters, unpack(line.ljust(width)))
+                ]
+            )
+            for line in map(bytes, lines)
+        ]
+        if not any(None in row for row in rows):
+            return np.array(rows, dtype=self._values_dtype).view(self.dtype)
+        # integer fields with blanks become float, like in the batched conversion
+        names = self._values_dtype.names
+        blank = {
+            names[i] for row in rows for i, value in enumerate(row) if value is None
+        }
+        rows = [
+            tuple([np.nan if value is None else value for value in row]) for row in rows
+        ]
+        values = np.array(rows, dtype=_float_fields(self._values_dtype, blank))
+        return values.view(_float_fields(self.dtype, blank))
+
+    def to_dicts(self, lines):
+        """Decode a batch of lines into one dictionary per line.
+
+        Parameters
+        ----------
+        lines : bytes, buffer, numpy.ndarray or list of bytes
+            See `records`.
+
+        Returns
+        -------
+        list of dict
+        """
+        # via pandas, as numpy converts datetime64[ns] to integers
+        return pd.DataFrame(self.decode(lines)).to_dict("records")
+
+    def __repr__(self):
+        return f"RecordDecoder({len(self.fields)} fields, {self.record_bytes} bytes)"
+
+
+FILTER_OPS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": lambda column, value: np.isin(column, value),
+    "not in": lambda column, value: ~np.isin(column, value),
+    "startswith": lambda column, value: np.char.startswith(column, value),
+}
+
+
+def _encode_filter_value(value):
+    if isinstance(value, (list, tuple, set)):
+        return [_encode_filter_value(v) for v in value]
+    return str(value).encode("ascii")
+
+
+def _datetime_filter_value(value):
+    if isinstance(value, (list, tuple, set)):
+        return [_datetime_filter_value(v) for v in value]
+    return pd.Timestamp(value).to_datetime64()
+
+
+def _is_time_column(name):
+    "Columns with TIME in name, except COUNT and LOCAL_TIME columns, hold times."
+    return "TIME" in name and "COUNT" not in name and name != "LOCAL_TIME"
+
+
+def _to_datetime(values):
+    """Convert time strings, or the raw bytes of a time column, to datetime64.
+
+    Uses the vectorized `utils.parse_nasa_times`, falling back to pandas' parsers
+    for values in other formats.
+
+    Returns
+    -------
+    numpy.ndarray
+    """
+    try:
+        return utils.parse_nasa_times(values, errors="raise")
+    except ValueError:
+        pass
+    if isinstance(values, np.ndarray) and values.dtype == np.uint8:
+        values = _decode_field(values, "TIME")
+    values = pd.Series(values)
+    try:
+        times = pd.to_datetime(values)
+    except ValueError:
+        times = pd.to_datetime(
+            values, format=utils.nasa_dt_format_with_ms, errors="coerce"
+        )
+    return times.to_numpy()
+
+
+def convert_time_columns(df, verbose=True):
+    """Convert columns with "TIME" in name (unless COUNT is as well in name) to datetime.
+
+    LOCAL_TIME columns are not converted.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Dataframe to be converted in place.
+    verbose : bool
+        Switch to control printing of the progress.
+    """
+    for column in [i for i in df.columns if _is_time_column(i)]:
+        if pd.api.types.is_datetime64_any_dtype(df[column]):
+            continue
+        if verbose:
+            print(f"Converting times for column {column}.")
+        df[column] = _to_datetime(df[column])
+    if verbose:
+        print("Done.")
+    return df
+
+
+def _read_row_range(schema, indexpath, rows, columns, where, convert_times):
+    "Worker for the parallel reader, parsing one range of rows."
+    return MappedIndexTable(schema, indexpath).to_df(
+        columns, where, convert_times=convert_times, rows=rows
+    )
+
+
+def read_parallel(
+    indexpath, label, workers, columns=None, where=None, convert_times=True
+):
+    """Parse a fixed-length TAB file in a pool of processes.
+
+    As all records have a length of RECORD_BYTES, the file is split into
+    `workers` ranges of whole rows, which are parsed in parallel and
+    concatenated in order.
+
+    Parameters
+    ----------
+    indexpath : str or pathlib.Path
+        The path to the index TAB file.
+    label : pdstools.IndexLabel or TableSchema object
+        Label of a TAB file with fixed-length records.
+    workers : int
+        Number of processes to use.
+    columns, where : optional
+        Column projection and row filters, see `index_to_df`.
+    convert_times : bool
+        Switch to control if to convert columns with "TIME" in name to datetime
+
+    Returns
+    -------
+    pandas.DataFrame
+    """
+    # ship the compiled schema, so that workers don't have to parse the label again
+    schema = getattr(label, "schema", label)
+    n_rows = len(MappedIndexTable(schema, indexpath))
+    # empty row ranges would parse into object instead of string columns
+    workers = max(min(workers, n_rows), 1)
+    bounds = np.linspace(0, n_rows, workers + 1).astype(int)
+    ranges = [
+        slice(start, stop)
+        for start, stop in zip(bounds[:-1], bounds[1:])
+        if stop > start or n_rows == 0
+    ]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                _read_row_range, schema, indexpath, rows, columns, where, convert_times
+            )
+            for rows in ranges
+        ]
+        df = pd.concat([future.result() for future in futures])
+    if where is None:
+        df = df.reset_index(drop=True)
+    return df
+
+
+def index_to_df(
+    indexpath,
+    label,
+    convert_times=True,
+    engine="numpy",
+    columns=None,
+    where=None,
+    workers=None,
+):
     """The main reader function for PDS Indexfiles.
 
     In conjunction with an IndexLabel object that figures out the column widths,
@@ -484,24 +1980,73 @@ def index_to_df(indexpath, label, convert_times=True):
         'colnames' and 'colspecs'
     convert_times : bool
         Switch to control if to convert columns with "TIME" in name (unless COUNT is as well in name) to datetime
+    engine : {'numpy', 'fwf'}
+        'numpy' byte-slices the file with dtypes taken from the label's DATA_TYPE,
+        'fwf' uses pandas.read_fwf with type inference.
+        Labels without fixed-length records, and files whose records don't
+        match the label's RECORD_BYTES, always use 'fwf'.
+    columns : list, optional
+        Only parse the byte ranges of these columns, given as label NAMEs or
+        expanded item names. Requires the 'numpy' engine.
+    where : list of tuples, optional
+        Row filters in the form (column, op, value), see `MappedIndexTable.filter_mask`.
+        They are evaluated on the raw bytes, rows that fail are never decoded.
+        Requires the 'numpy' engine.
+    workers : int, optional
+        Number of processes to parse the file with, see `read_parallel`.
+        Requires the 'numpy' engine and fixed-length records.
+
+    Examples
+    --------
+    >>> label.read_index_data(
+    ...     columns=["PRODUCT_ID", "START_TIME"],
+    ...     where=[("PRODUCT_ID", "startswith", "ESP_"), ("START_TIME", ">=", "2015-001")],
+    ... )
     """
     indexpath = Path(indexpath)
+    try:
+        if workers is not None and workers > 1:
+            if engine != "numpy":
+                raise ValueError("'workers' requires the 'numpy' engine.")
+            return read_parallel(
+                indexpath, label, workers, columns, where, convert_times=convert_times
+            )
+        if columns is not None or where is not None:
+            if engine != "numpy":
+                raise ValueError("'columns' and 'where' require the 'numpy' engine.")
+            return MappedIndexTable(label, indexpath).to_df(
+                columns, where, convert_times=convert_times
+            )
+        if engine == "numpy" and label.record_bytes is not None:
+            return read_fixed_width(indexpath, label, convert_times=convert_times)
+    except MisalignedRecordsError as e:
+        logger.warning("%s Falling back to the 'fwf' engine.", e)
+    if engine not in ("numpy", "fwf"):
+        raise ValueError(f"Unknown engine {engine!r}, use 'numpy' or 'fwf'.")
     df = pd.read_fwf(
         indexpath, header=None, names=label.colnames, colspecs=label.colspecs
     )
+    return _select(df, label, columns, where, convert_times)
+
+
+def _select(df, label, columns=None, where=None, convert_times=True, verbose=True):
+    """Apply `columns` and `where` to a table parsed by read_fwf.
+
+    Gives the same result as `MappedIndexTable.to_df`: strings are compared to
+    the text of the table, and dates to the converted times.
+    """
+    if where is not None:
+        for name, _, value in where:
+            if isinstance(value, (list, tuple, set)):
+                value = next(iter(value), None)
+            if isinstance(value, (dt.date, np.datetime64)):
+                df[name] = _to_datetime(df[name])
+        df = storage.filter_df(df, where)
+    if columns is not None:
+        items = {col.name: col.name_as_list for col in label.schema.columns}
+        df = df[[name for col in columns for name in items.get(col, [col])]]
     if convert_times:
-        for column in [i for i in df.columns if "TIME" in i and "COUNT" not in i]:
-            if column == "LOCAL_TIME":
-                # don't convert local time
-                continue
-            print(f"Converting times for column {column}.")
-            try:
-                df[column] = pd.to_datetime(df[column])
-            except ValueError:
-                df[column] = pd.to_datetime(
-                    df[column], format=utils.nasa_dt_format_with_ms, errors="coerce"
-                )
-        print("Done.")
+        convert_time_columns(df, verbose)
     return df
 
 
@@ -514,11 +2059,13 @@ def decode_line(linedata, labelpath):
         One line of a .tab data file
     labelpath : str or pathlib.Path
         Path to the appropriate label that describes the data.
+
+    See Also
+    --------
+    RecordDecoder : Typed decoding of many lines at once.
     """
-    label = IndexLabel(labelpath)
-    for column in label.pvl_columns:
-        pvlcol = PVLColumn(column)
-        print(pvlcol.name, pvlcol.decode(linedata))
+    for col in compile_label(labelpath).columns:
+        print(col.name, col.decode(linedata))
 
 
 def find_mixed_type_cols(df, fix=True):
@@ -564,6 +2111,8 @@ def fix_hirise_edrcumindex(infname, outfname):
     outfname : str
         Path where to store the fixed TAB file
     """
+    from tqdm import tqdm
+
     with open(infname) as f:
         with open(outfname, "w") as newf:
             for line in tqdm(f):
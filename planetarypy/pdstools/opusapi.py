@@ -7,18 +7,17 @@ from __future__ import division, print_function
 from pathlib import Path
 
 import pandas as pd
-import requests
-from IPython.display import HTML, display
 
+from .. import utils
 from . import io
 
 try:
-    from urllib.request import unquote, urlretrieve
+    from urllib.request import unquote
     from urllib.parse import urlparse, urlencode
 except ImportError:
     from urllib2 import unquote
     from urlparse import urlparse
-    from urllib import urlretrieve, urlencode
+    from urllib import urlencode
 
 base_url = 'https://tools.pds-rings.seti.org/opus/api'
 metadata_url = base_url + '/metadata'
@@ -42,9 +41,9 @@ class MetaData(object):
         print("Requesting", fullurl)
         if query is not None:
             query = unquote(urlencode(query))
-            self.r = requests.get(fullurl, params=query).json()
+            self.r = utils.http_get(fullurl, params=query).json()
         else:
-            self.r = requests.get(fullurl).json()
+            self.r = utils.http_get(fullurl).json()
 
     @property
     def image(self):
@@ -219,8 +218,8 @@ class OPUS(object):
             url = "{}/{}.{}".format(base_url, kind, fmt)
         elif kind == 'images':
             url = "{}/images/{}.{}".format(base_url, size, fmt)
-        self.r = requests.get(url,
-                              params=unquote(urlencode(query)))
+        self.r = utils.http_get(url,
+                                params=unquote(urlencode(query)))
 
     def create_files_request(self, query, fmt='json'):
         self.create_request_with_query('files', query, fmt=fmt)
@@ -231,7 +230,7 @@ class OPUS(object):
     def get_volume_id(self, ring_obsid):
         url = "{}/{}.json".format(metadata_url, ring_obsid)
         query = {'cols': 'volumeidlist'}
-        r = requests.get(url, params=unquote(urlencode(query)))
+        r = utils.http_get(url, params=unquote(urlencode(query)))
         return r.json()[0]['volume_id_list']
     # def create_data_request(self, query, fmt='json'):
     #     myquery = query.copy()
@@ -312,6 +311,8 @@ class OPUS(object):
         size : {'small', 'med', 'thumb', 'full'}
             Determines the size of the preview image to be shown.
         """
+        from IPython.display import HTML, display
+
         d = dict(small=256, med=512, thumb=100, full=1024)
         try:
             width = d[size]
@@ -326,7 +327,7 @@ class OPUS(object):
         display(HTML(imagesList))
 
     def download_results(self, savedir=None, only_raw=True, only_calib=False,
-                         index=None):
+                         index=None, cache=False):
         """Download the previously found and stored Opus obsids.
 
         Parameters
@@ -334,6 +335,9 @@ class OPUS(object):
         savedir: str or pathlib.Path, optional
             If the database root folder as defined by the config.ini should not be used,
             provide a different savedir here. It will be handed to PathManager.
+        cache : bool
+            Switch to get the files via the shared product cache, see
+            `planetarypy.cache`.
         """
         obsids = self.obsids if index is None else [self.obsids[index]]
         for obsid in obsids:
@@ -350,12 +354,13 @@ class OPUS(object):
                 print("Downloading", basename)
                 store_path = str(pm.basepath / basename)
                 try:
-                    urlretrieve(url, store_path)
+                    utils.download(url, store_path, use_tqdm=False, cache=cache)
                 except Exception as e:
-                    urlretrieve(url.replace('https', 'http'), store_path)
+                    utils.download(url.replace('https', 'http'), store_path,
+                                   use_tqdm=False, cache=cache)
             return str(pm.basepath)
 
-    def download_previews(self, savedir=None):
+    def download_previews(self, savedir=None, cache=False):
         """Download preview files for the previously found and stored Opus obsids.
 
         Parameters
@@ -363,10 +368,14 @@ class OPUS(object):
         savedir: str or pathlib.Path, optional
             If the database root folder as defined by the config.ini should not be used,
             provide a different savedir here. It will be handed to PathManager.
+        cache : bool
+            Switch to get the files via the shared product cache, see
+            `planetarypy.cache`.
         """
         for obsid in self.obsids:
             pm = io.PathManager(obsid.img_id, savedir=savedir)
             pm.basepath.mkdir(exist_ok=True)
             basename = Path(obsid.medium_img_url).name
             print("Downloading", basename)
-            urlretrieve(obsid.medium_img_url, str(pm.basepath / basename))
+            utils.download(obsid.medium_img_url, str(pm.basepath / basename),
+                           use_tqdm=False, cache=cache)
@@ -1,7 +1,17 @@
+from io import StringIO
 from string import Template
 
 import pandas as pd
 
+from .. import utils
+
+
+def read_html(url):
+    "Read the tables of a web page, fetched via the shared HTTP session."
+    r = utils.http_get(url)
+    r.raise_for_status()
+    return pd.read_html(StringIO(r.text))
+
 
 class CTXIndex:
     volumes_url = "https://pds-imaging.jpl.nasa.gov/volumes/mro.html"
@@ -15,7 +25,7 @@ class CTXIndex:
     @property
     def web_tables_list(self):
         print("Scraping volumes page ...")
-        return pd.read_html(self.volumes_url)
+        return read_html(self.volumes_url)
 
     @property
     def release_number(self):
@@ -30,7 +40,7 @@ class CTXIndex:
     @property
     def latest_volume_url(self):
         print("Scraping latest release page ...")
-        l = pd.read_html(self.release_url)
+        l = read_html(self.release_url)
         # get last row of 4th table
         row = l[3].iloc[-1]
         number = None
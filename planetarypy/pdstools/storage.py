@@ -0,0 +1,236 @@
+"""On-disk storage formats for converted PDS index tables.
+
+After download, index tables are converted into a fast loading file format.
+The formats are pluggable via the `formats` registry, the default is Parquet when
+pyarrow is installed, as it supports reading selected columns only, skipping row
+groups by filters and stores string columns dictionary-encoded and compressed.
+"""
+import operator
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow
+except ImportError:
+    PYARROW_INSTALLED = False
+else:
+    PYARROW_INSTALLED = True
+
+COMPARISONS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+# operators that pyarrow can push down into the row group statistics
+PUSHDOWN_OPS = list(COMPARISONS) + ["in", "not in"]
+
+
+def filter_df(df, filters):
+    """Apply (column, op, value) filters to a DataFrame.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Dataframe to be filtered
+    filters : list of tuples
+        Filters as described in `indices.MappedIndexTable.filter_mask`.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Rows of `df` that pass all filters.
+    """
+    mask = pd.Series(True, index=df.index)
+    for name, op, value in filters:
+        column = df[name]
+        if op == "startswith":
+            mask &= column.str.startswith(value).fillna(False).astype(bool)
+        elif op == "in":
+            mask &= column.isin(value)
+        elif op == "not in":
+            mask &= ~column.isin(value)
+        elif op in COMPARISONS:
+            mask &= COMPARISONS[op](column, value)
+        else:
+            raise ValueError(f"Unknown filter operator {op!r}.")
+    return df[mask]
+
+
+def _arrow_compatible(df):
+    "Copy of `df` with object columns as strings, as mixed types can't be stored in arrow."
+    df = df.copy()
+    for col in df.columns[df.dtypes == object]:
+        df[col] = df[col].astype("string")
+    return df
+
+
+@contextmanager
+def _replacing(path):
+    """Temporary path to write a new version of `path` to.
+
+    It replaces `path` when the block is left without error, so a failed write
+    never leaves a partly written table behind.
+    """
+    path = Path(path)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+class HDFFormat:
+    "Pandas HDF storage, requires pytables. Always reads the whole table."
+
+    suffix = ".hdf"
+
+    @staticmethod
+    def write(df, path):
+        df.to_hdf(path, key="df")
+
+    @staticmethod
+    def read(path, columns=None, where=None):
+        df = pd.read_hdf(path)
+        if where is not None:
+            df = filter_df(df, where)
+        return df if columns is None else df[columns]
+
+
+class ParquetFormat:
+    """Parquet storage via pyarrow.
+
+    Row groups are kept small enough that filters on sorted columns (like START_TIME
+    for cumulative indices) can skip most of the file.
+    """
+
+    suffix = ".parquet"
+    row_group_size = 100_000
+    compression = "zstd"
+
+    @classmethod
+    def write(cls, df, path):
+        _arrow_compatible(df).to_parquet(
+            path,
+            engine="pyarrow",
+            compression=cls.compression,
+            row_group_size=cls.row_group_size,
+        )
+
+    @classmethod
+    def append(cls, df, path):
+        """Append rows to a stored table, without converting the stored rows to pandas.
+
+        Falls back to `append` via pandas, if the new rows can't be cast into the
+        stored schema, e.g. blanks in an integer column.
+        """
+        import pyarrow.parquet as pq
+
+        stored = pq.read_table(path)
+        try:
+            new = pyarrow.Table.from_pandas(
+                _arrow_compatible(df), schema=stored.schema, preserve_index=False
+            )
+        except (pyarrow.ArrowException, ValueError):
+            _append_via_pandas(cls, df, path)
+            return
+        with _replacing(path) as tmp:
+            pq.write_table(
+                pyarrow.concat_tables([stored, new]),
+                tmp,
+                compression=cls.compression,
+                row_group_size=cls.row_group_size,
+            )
+
+    @staticmethod
+    def read(path, columns=None, where=None):
+        pushdown = [f for f in where or [] if f[1] in PUSHDOWN_OPS] or None
+        rest = [f for f in where or [] if f[1] not in PUSHDOWN_OPS]
+        read_columns = columns
+        if columns is not None and rest:
+            # columns only needed for filtering are dropped again below
+            read_columns = list(dict.fromkeys(columns + [f[0] for f in rest]))
+        df = pd.read_parquet(
+            path, engine="pyarrow", columns=read_columns, filters=pushdown
+        )
+        if rest:
+            df = filter_df(df, rest)
+        return df if columns is None else df[columns]
+
+
+class FeatherFormat:
+    "Arrow IPC (Feather) storage via pyarrow, memory-mapped and column-selective."
+
+    suffix = ".feather"
+
+    @staticmethod
+    def write(df, path):
+        _arrow_compatible(df).reset_index(drop=True).to_feather(path)
+
+    @staticmethod
+    def read(path, columns=None, where=None):
+        read_columns = columns
+        if columns is not None and where:
+            read_columns = list(dict.fromkeys(columns + [f[0] for f in where]))
+        df = pd.read_feather(path, columns=read_columns)
+        if where:
+            df = filter_df(df, where)
+        return df if columns is None else df[columns]
+
+
+formats = {"hdf": HDFFormat, "parquet": ParquetFormat, "feather": FeatherFormat}
+
+default_format = "parquet" if PYARROW_INSTALLED else "hdf"
+
+
+def _append_via_pandas(fmt, df, path):
+    stored = fmt.read(path)
+    with _replacing(path) as tmp:
+        fmt.write(pd.concat([stored, df], ignore_index=True), tmp)
+
+
+def append(df, path, name=None):
+    """Append rows to a stored table.
+
+    Formats without an own `append` method rewrite the whole table. The table
+    is replaced atomically, so it is unchanged if appending fails.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        New rows, with the same columns as the stored table.
+    path : str or pathlib.Path
+        Path of the stored table.
+    name : str, optional
+        Storage format, one of the keys of `formats`. Default: `default_format`
+    """
+    fmt = get_format(name)
+    if hasattr(fmt, "append"):
+        fmt.append(df, path)
+    else:
+        _append_via_pandas(fmt, df, path)
+
+
+def get_format(name=None):
+    """Get the storage format class by name.
+
+    Parameters
+    ----------
+    name : str, optional
+        One of the keys of `formats`. Default: `default_format`
+    """
+    name = default_format if name is None else name
+    try:
+        return formats[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown storage format {name!r}, use one of {list(formats)}."
+        ) from None
@@ -0,0 +1,217 @@
+"""Raster tools that don't require GDAL.
+
+They work on numbers and arrays, or on objects with the interface of GDAL
+bands, and are used by, and available via, `geotools`.
+"""
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+from ._config import config
+
+# default memory budget of the block cache, see `BlockCache`
+default_block_cache_bytes = 256 * 2**20
+
+
+def apply_geotransform(geotransform, sample, line):
+    """Vectorized version of `gdal.ApplyGeoTransform`.
+
+    Parameters
+    ==========
+    geotransform: Geotransform in format as given by GDAL datasets.GetGeoTransform()
+    sample, line: <array_like> pixel coordinates, or x, y for an inverted
+        geotransform
+
+    Returns
+    =======
+    tuple (x, y) of numpy arrays
+    """
+    gt = geotransform
+    sample = np.asarray(sample, dtype=float)
+    line = np.asarray(line, dtype=float)
+    return (
+        gt[0] + sample * gt[1] + line * gt[2],
+        gt[3] + sample * gt[4] + line * gt[5],
+    )
+
+
+@lru_cache(maxsize=128)
+def _inverse_geotransform(geotransform):
+    gt = geotransform
+    det = gt[1] * gt[5] - gt[2] * gt[4]
+    if det == 0:
+        raise ValueError(f"Geotransform {gt} can't be inverted.")
+    return (
+        (gt[2] * gt[3] - gt[0] * gt[5]) / det,
+        gt[5] / det,
+        -gt[2] / det,
+        (gt[0] * gt[4] - gt[1] * gt[3]) / det,
+        -gt[4] / det,
+        gt[1] / det,
+    )
+
+
+def invert_geotransform(geotransform):
+    """Inverse of a geotransform, mapping x, y to sample, line.
+
+    Like `gdal.InvGeoTransform`, but remembers the recently used ones.
+    """
+    return _inverse_geotransform(tuple(geotransform))
+
+
+def _tile_length(block, tile_size):
+    "Multiple of the `block` length near `tile_size`, or `tile_size` for long blocks."
+    if block > tile_size:
+        return tile_size
+    return tile_size // block * block
+
+
+class BlockCache:
+    """In-memory LRU cache of raster tiles, for repeated window reads.
+
+    Windows are assembled from tiles, which are keyed by dataset, band and
+    tile index, so that overlapping or repeated windows read every tile only
+    once. Tiles are about `tile_size` pixels wide and high, aligned with the
+    native blocks of the band (`GetBlockSize`): they hold whole blocks, or
+    parts of blocks much longer than `tile_size`, like the rows of
+    strip-organised rasters. When the cached tiles exceed the memory budget,
+    the least recently used ones are dropped. Tiles larger than the budget are
+    not cached at all.
+
+    The budget is read from the config, e.g. ``block_cache_bytes = 1e9`` in
+    the ``[geotools]`` section, or the ``PLANETARYPY_GEOTOOLS__BLOCK_CACHE_BYTES``
+    environment variable.
+
+    Parameters
+    ==========
+    max_bytes: <int> memory budget of the cached tiles. Default: from the
+        config, or `default_block_cache_bytes`
+    tile_size: <int> approximate width and height of a tile in pixels
+    """
+
+    def __init__(self, max_bytes=None, tile_size=256):
+        self._max_bytes = max_bytes
+        self.tile_size = tile_size
+        self._tiles = OrderedDict()
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_bytes(self):
+        "<int> memory budget of the cached tiles."
+        if self._max_bytes is not None:
+            return self._max_bytes
+        return int(
+            float(
+                config.get("geotools", {}).get(
+                    "block_cache_bytes", default_block_cache_bytes
+                )
+            )
+        )
+
+    @max_bytes.setter
+    def max_bytes(self, value):
+        self._max_bytes = value
+        with self._lock:
+            self._evict(self.max_bytes)
+
+    def __len__(self):
+        return len(self._tiles)
+
+    def _evict(self, max_bytes):
+        while self.nbytes > max_bytes and self._tiles:
+            _, tile = self._tiles.popitem(last=False)
+            self.nbytes -= tile.nbytes
+
+    def tile_shape(self, band):
+        "(width, height) of the tiles of a GDAL `band`."
+        return tuple(
+            _tile_length(block, self.tile_size) for block in band.GetBlockSize()
+        )
+
+    def get_tile(self, key, band, col, row):
+        """Tile `col`, `row` of a GDAL `band`, from the cache if present.
+
+        Parameters
+        ==========
+        key: hashable identifying dataset and band of `band`
+        band: <gdal.Band> to read the tile from on a miss
+        col, row: <int> index of the tile, see `tile_shape`
+
+        Returns
+        =======
+        numpy.ndarray, read-only, smaller than the tile shape at the right
+        and bottom edges of the raster
+        """
+        key = (key, col, row)
+        with self._lock:
+            tile = self._tiles.get(key)
+            if tile is not None:
+                self._tiles.move_to_end(key)
+                self.hits += 1
+                return tile
+            self.misses += 1
+        width, height = self.tile_shape(band)
+        sample, line = col * width, row * height
+        tile = band.ReadAsArray(
+            sample,
+            line,
+            min(width, band.XSize - sample),
+            min(height, band.YSize - line),
+        )
+        tile.setflags(write=False)
+        max_bytes = self.max_bytes
+        with self._lock:
+            if key not in self._tiles and tile.nbytes <= max_bytes:
+                self._tiles[key] = tile
+                self.nbytes += tile.nbytes
+                self._evict(max_bytes)
+        return tile
+
+    def read_window(self, key, band, sample, line, width, height):
+        """Read a window of a GDAL `band`, assembled from cached tiles.
+
+        Only the tiles missing from the cache are read from `band`. The
+        window must lie within the raster.
+
+        Parameters
+        ==========
+        key: hashable identifying dataset and band of `band`
+        band: <gdal.Band> to read from
+        sample, line, width, height: <int> window as from
+            `Window.get_gdal_window`
+
+        Returns
+        =======
+        numpy.ndarray of shape (height, width), a copy of the cached data
+        """
+        tile_width, tile_height = self.tile_shape(band)
+        data = None
+        for row in range(line // tile_height, -(-(line + height) // tile_height)):
+            top = row * tile_height
+            for col in range(sample // tile_width, -(-(sample + width) // tile_width)):
+                left = col * tile_width
+                tile = self.get_tile(key, band, col, row)
+                if data is None:
+                    data = np.empty((height, width), dtype=tile.dtype)
+                # intersection of tile and window, in raster coordinates
+                x0, x1 = max(left, sample), min(left + tile_width, sample + width)
+                y0, y1 = max(top, line), min(top + tile_height, line + height)
+                data[y0 - line : y1 - line, x0 - sample : x1 - sample] = tile[
+                    y0 - top : y1 - top, x0 - left : x1 - left
+                ]
+        return data
+
+    def clear(self):
+        "Drop all cached tiles."
+        with self._lock:
+            self._tiles.clear()
+            self.nbytes = 0
+
+
+# to be shared by ImgData objects, see `ImgData.block_cache`
+block_cache = BlockCache()
@@ -1,6 +1,8 @@
 from pathlib import Path
 from ftplib import FTP
 
+from ..cache import product_cache
+
 
 class SPICEFTP:
     local_dir = Path('/Volumes/USB128II/spice/UVIS_data/kernels')
@@ -27,8 +29,37 @@ class SPICEFTP:
     def __del__(self):
         self.ftp.close()
 
-    def get_file(self, remote_name, local_name=None):
+    def get_file(self, remote_name, local_name=None, cache=False):
+        """Download a kernel file.
+
+        Parameters
+        ----------
+        remote_name : str
+            File name in the kernel folder on the server.
+        local_name : str, optional
+            File name in the local kernel folder. Default: `remote_name`
+        cache : bool
+            Switch to get the file via the shared product cache, see
+            `planetarypy.cache`.
+        """
         if local_name is None:
             local_name = remote_name
-        local_path = str(self.local_dir / Path(self.kernel_dir) / local_name)
-        self.ftp.retrbinary(f"RETR {remote_name}", open(f"{local_path}", "wb").write)
+        local_path = self.local_dir / Path(self.kernel_dir) / local_name
+        if not cache:
+            with open(local_path, "wb") as f:
+                self.ftp.retrbinary(f"RETR {remote_name}", f.write)
+            return
+        url = f"ftp://{self.url}{self.ftp.pwd()}/{remote_name}"
+        # FTP has no ETag, modification time and size identify a version
+        self.ftp.voidcmd("TYPE I")
+        validator = "{} {}".format(
+            self.ftp.sendcmd(f"MDTM {remote_name}").split()[-1],
+            self.ftp.size(remote_name),
+        )
+        path = product_cache.get(url, validator)
+        if path is None:
+            with product_cache.staging() as tmp:
+                with open(tmp / remote_name, "wb") as f:
+                    self.ftp.retrbinary(f"RETR {remote_name}", f.write)
+                path = product_cache.put(url, validator, tmp / remote_name)
+        product_cache.materialize(path, local_path)
@@ -1,26 +1,36 @@
 import datetime as dt
 import email.utils as eut
+import hashlib
+import importlib.util
+import json
 import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from functools import lru_cache
 from math import radians, tan
 from pathlib import Path
-from urllib.request import urlopen, urlretrieve
+from types import SimpleNamespace
+from urllib.parse import urlsplit
 
-import click
-import pandas as pd
-import requests
-from tqdm.auto import tqdm
+import numpy as np
+
+# click, pandas, requests, tqdm and GDAL are imported on first use (see also
+# `__getattr__`), so that scripts using a few functions only start fast
+from ._config import get_data_root
+from .exceptions import DownloadVerificationError
 
-logger = logging.getLogger(__name__)
 try:
-    from osgeo import gdal
+    import fcntl
 except ImportError:
-    GDAL_INSTALLED = False
-    logger.warning(
-        "No GDAL found. Some planetary.utils functions not working, but okay."
-    )
-else:
-    GDAL_INSTALLED = True
+    # Windows
+    import msvcrt
 
+    fcntl = None
+
+logger = logging.getLogger(__name__)
 
 nasa_date_format = "%Y-%j"
 nasa_dt_format = nasa_date_format + "T%H:%M:%S"
@@ -45,10 +55,16 @@ def nasa_date_to_iso(datestr):
     return date.isoformat()
 
 
-@click.command("nasa_date_to_iso")
-@click.argument("datestr")
-def nasa_date_to_iso_command(datestr):
-    click.echo(nasa_date_to_iso(datestr))
+def _nasa_date_to_iso_command():
+    "Create the `nasa_date_to_iso` command line tool."
+    import click
+
+    @click.command("nasa_date_to_iso")
+    @click.argument("datestr")
+    def nasa_date_to_iso_command(datestr):
+        click.echo(nasa_date_to_iso(datestr))
+
+    return nasa_date_to_iso_command
 
 
 def iso_to_nasa_date(datestr):
@@ -70,14 +86,165 @@ def iso_to_nasa_datetime(dtimestr):
     return date.strftime(nasa_dt_format)
 
 
+def _as_byte_cells(values):
+    "1D array of fixed-width byte strings from bytes, str or a 2D uint8 array."
+    if isinstance(values, np.ndarray) and values.dtype == np.uint8:
+        width = values.shape[-1]
+        return np.ascontiguousarray(values).view(f"S{width}").reshape(-1)
+    values = np.asarray(values)
+    if values.dtype.kind == "S":
+        return np.ascontiguousarray(values).reshape(-1)
+    if values.dtype.kind == "O":
+        import pandas as pd
+
+        # missing values become blanks
+        values = np.where(pd.isna(values), "", values)
+    return np.char.encode(values.astype(str), "ascii", "replace").reshape(-1)
+
+
+def _parse_digits(data, start, length):
+    "Integer value of the digits in a column range of a uint8 array, and validity."
+    value = np.zeros(len(data), dtype=np.int64)
+    ok = np.ones(len(data), dtype=bool)
+    for column in range(start, start + length):
+        # uint8 wraps around for bytes below "0", so one comparison finds non-digits
+        digit = data[:, column] - np.uint8(ord("0"))
+        ok &= digit <= 9
+        value = value * 10 + digit
+    return value, ok
+
+
+def _parse_time_of_day(data, start):
+    """Nanoseconds of the day for HH[:MM[:SS[.fffffffff]]] starting at `start`.
+
+    Returns
+    -------
+    tuple(numpy.ndarray, numpy.ndarray, numpy.ndarray)
+        nanoseconds, validity and the position behind the time string
+    """
+    hour, ok = _parse_digits(data, start, 2)
+    minute, minute_ok = _parse_digits(data, start + 3, 2)
+    second, second_ok = _parse_digits(data, start + 6, 2)
+    has_minute = (data[:, start + 2] == ord(":")) & minute_ok
+    has_second = has_minute & (data[:, start + 5] == ord(":")) & second_ok
+    has_fraction = has_second & (data[:, start + 8] == ord("."))
+    fraction = np.zeros(len(data), dtype=np.int64)
+    n_fraction = np.zeros(len(data), dtype=np.int64)
+    in_fraction = has_fraction.copy()
+    for i in range(9):
+        digit = data[:, start + 9 + i] - np.uint8(ord("0"))
+        in_fraction &= digit <= 9
+        fraction += np.where(in_fraction, digit, 0).astype(np.int64) * 10 ** (8 - i)
+        n_fraction += in_fraction
+    end = np.select(
+        [has_fraction, has_second, has_minute],
+        [start + 9 + n_fraction, start + 8, start + 5],
+        start + 2,
+    )
+    ok &= (hour <= 23) & ((minute <= 59) | ~has_minute) & ((second <= 60) | ~has_second)
+    seconds = hour * 3600 + np.where(has_minute, minute * 60, 0)
+    seconds += np.where(has_second, second, 0)
+    return seconds * 1_000_000_000 + fraction, ok, end
+
+
+def _by_format(is_ymd, ymd, doy):
+    """Call `ymd` and/or `doy` depending on the formats present and merge their results.
+
+    Columns usually hold only one of the formats, so mostly only one is parsed.
+    """
+    if is_ymd.all():
+        return ymd()
+    if not is_ymd.any():
+        return doy()
+    return tuple(np.where(is_ymd, a, b) for a, b in zip(ymd(), doy()))
+
+
+def parse_nasa_times(values, errors="coerce"):
+    """Vectorized conversion of NASA and ISO time strings to datetime64[ns].
+
+    Parses YYYY-DOYTHH:MM:SS.ffffff and YYYY-MM-DDTHH:MM:SS.ffffff with numpy
+    arithmetic on the bytes, without creating a Python object per value.
+    The time part can be cut after any component (down to just the date),
+    fractions can have up to 9 digits and a trailing Z is accepted.
+
+    Parameters
+    ----------
+    values : array-like
+        Time strings as str or bytes, or a 2D uint8 array of shape (n, width)
+        holding the raw bytes of a fixed-width column.
+    errors : {'coerce', 'raise'}
+        With 'raise' a ValueError is raised for values that are not blank
+        but can't be parsed, with 'coerce' they become NaT.
+
+    Returns
+    -------
+    numpy.ndarray
+        datetime64[ns] array, with NaT for blank or unparseable values.
+    """
+    cells = _as_byte_cells(values)
+    if cells.size and (cells.view(np.uint8)[:: cells.itemsize] == ord(" ")).any():
+        cells = np.char.lstrip(cells)
+    n = cells.size
+    width = cells.itemsize
+    # zero padding behind the strings, so that optional parts can be read as missing,
+    # column-major, as the parsing works column by column
+    data = np.zeros((n, width + 32), dtype=np.uint8, order="F")
+    data[:, :width] = cells.view(np.uint8).reshape(n, width)
+    data[data == ord(" ")] = 0
+    blank = data[:, 0] == 0
+
+    year, ok = _parse_digits(data, 0, 4)
+    ok &= data[:, 4] == ord("-")
+    years = np.where(ok, year - 1970, 0).astype("datetime64[Y]")
+    is_ymd = data[:, 7] == ord("-")
+
+    def ymd_dates():
+        month, month_ok = _parse_digits(data, 5, 2)
+        day, day_ok = _parse_digits(data, 8, 2)
+        month_ok &= (month >= 1) & (month <= 12) & day_ok & (day >= 1) & (day <= 31)
+        months = years.astype("datetime64[M]") + np.where(month_ok, month - 1, 0)
+        dates = months.astype("datetime64[D]") + np.where(month_ok, day - 1, 0)
+        # invalid days like Feb 30 spill over into the next month
+        return dates, month_ok & (dates.astype("datetime64[M]") == months)
+
+    def doy_dates():
+        doy, doy_ok = _parse_digits(data, 5, 3)
+        doy_ok &= (doy >= 1) & (doy <= 366)
+        dates = years.astype("datetime64[D]") + np.where(doy_ok, doy - 1, 0)
+        # DOY 366 in non-leap years spills over into the next year
+        return dates, doy_ok & (dates.astype("datetime64[Y]") == years)
+
+    dates, date_ok = _by_format(is_ymd, ymd_dates, doy_dates)
+    ok &= date_ok
+    time_of_day, time_ok, end = _by_format(
+        is_ymd,
+        lambda: _parse_time_of_day(data, 11),
+        lambda: _parse_time_of_day(data, 9),
+    )
+    after = data[np.arange(n), end]
+    after = np.where(after == ord("Z"), data[np.arange(n), end + 1], after)
+    time_ok &= after == 0
+    separator = np.where(is_ymd, data[:, 10], data[:, 8])
+    has_time = separator == ord("T")
+    ok &= np.where(has_time, time_ok, separator == 0)
+    if errors == "raise" and (~ok & ~blank).any():
+        raise ValueError(f"Unable to parse time {cells[~ok & ~blank][0]!r}.")
+
+    offsets = np.where(ok & has_time, time_of_day, 0).astype("timedelta64[ns]")
+    times = dates.astype("datetime64[ns]") + offsets
+    return np.where(ok, times, np.datetime64("NaT", "ns"))
+
+
 def replace_all_nasa_times(df):
     for col in [col for col in df.columns if "TIME" in col]:
         if "T" in df[col].iloc[0]:
-            df[col] = pd.to_datetime(df[col].map(nasa_datetime_to_iso))
+            df[col] = parse_nasa_times(df[col].to_numpy())
 
 
 def get_gdal_center_coords(imgpath):
-    if not GDAL_INSTALLED:
+    try:
+        from osgeo import gdal
+    except ImportError:
         logger.error("GDAL not installed. Returning")
         return
     ds = gdal.Open(str(imgpath))
@@ -86,21 +253,219 @@ def get_gdal_center_coords(imgpath):
     return xmean, ymean
 
 
-class ProgressBar(tqdm):
-    """Provides `update_to(n)` which uses `tqdm.update(delta_n)`."""
+@lru_cache(maxsize=None)
+def _progress_bars():
+    "Define the tqdm based progress bars on first use."
+    from tqdm.auto import tqdm
 
-    def update_to(self, b=1, bsize=1, tsize=None):
-        """
-        b  : int, optional
-            Number of blocks transferred so far [default: 1].
-        bsize  : int, optional
-            Size of each block (in tqdm units) [default: 1].
-        tsize  : int, optional
-            Total size (in tqdm units). If [default: None] remains unchanged.
+    class ProgressBar(tqdm):
+        """Provides `update_to(n)` which uses `tqdm.update(delta_n)`."""
+
+        def update_to(self, b=1, bsize=1, tsize=None):
+            """
+            b  : int, optional
+                Number of blocks transferred so far [default: 1].
+            bsize  : int, optional
+                Size of each block (in tqdm units) [default: 1].
+            tsize  : int, optional
+                Total size (in tqdm units). If [default: None] remains unchanged.
+            """
+            if tsize is not None:
+                self.total = tsize
+            self.update(b * bsize - self.n)  # will also set self.n = b * bsize
+
+    class AggregateProgressBar(tqdm):
+        """One progress bar for the bytes of many concurrent downloads.
+
+        Each download gets its own hook via `reporthook()`. The total grows
+        whenever the size of another file becomes known.
         """
-        if tsize is not None:
-            self.total = tsize
-        self.update(b * bsize - self.n)  # will also set self.n = b * bsize
+
+        def reporthook(self):
+            "Create a `urlretrieve` reporthook for one download."
+            state = {"n": 0, "total": None}
+
+            def update_to(b=1, bsize=1, tsize=None):
+                with self.get_lock():
+                    if state["total"] is None and tsize is not None and tsize > 0:
+                        state["total"] = tsize
+                        self.total = (self.total or 0) + tsize
+                        self.refresh()
+                    n = (
+                        b * bsize
+                        if tsize is None or tsize < 0
+                        else min(b * bsize, tsize)
+                    )
+                    self.update(n - state["n"])
+                    state["n"] = n
+
+            return update_to
+
+    return SimpleNamespace(
+        ProgressBar=ProgressBar, AggregateProgressBar=AggregateProgressBar
+    )
+
+
+@contextmanager
+def file_lock(path, blocking=True):
+    """Exclusive lock on a lock file, across threads and processes.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+        Path of the lock file, created if it doesn't exist.
+    blocking : bool
+        Switch to wait for the lock. If False, BlockingIOError is raised if
+        the lock is held elsewhere.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            try:
+                msvcrt.locking(
+                    f.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1
+                )
+            except OSError as e:
+                raise BlockingIOError(*e.args) from e
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def atomic_write(path, text):
+    """Replace the content of a text file atomically.
+
+    The text is written into a temporary file next to `path`, which is then
+    renamed to `path`, so readers see either the old or the new content.
+    """
+    path = Path(path)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, "w") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+# Settings of the shared HTTP session, change them with `configure_http`.
+http_settings = {
+    # retries on connection errors and on the status codes in `retry_status`
+    "retries": 3,
+    # waits backoff_factor * 2**(retry - 1) seconds between retries
+    "backoff_factor": 0.5,
+    "retry_status": (429, 500, 502, 503, 504),
+    # connections kept alive per host
+    "pool_maxsize": 10,
+    # bytes of the first read from the network, adapting up to max_chunk_size
+    "chunk_size": 2**16,
+    "max_chunk_size": 2**24,
+    # smallest byte range of a segmented download
+    "min_segment_size": 2**20,
+    # seconds for connecting and between received bytes
+    "timeout": 30,
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def configure_http(**settings):
+    """Change settings of the shared HTTP session, see `http_settings`.
+
+    The session is recreated with the new settings at the next request.
+    """
+    global _session
+    unknown = set(settings) - set(http_settings)
+    if unknown:
+        raise ValueError(f"Unknown HTTP settings: {sorted(unknown)}")
+    with _session_lock:
+        http_settings.update(settings)
+        _session = None
+
+
+def get_session():
+    """Shared `requests.Session` for all downloads of planetarypy.
+
+    It keeps connections to each host alive for re-use and retries failed
+    requests with exponential backoff, according to `http_settings`.
+
+    Returns
+    -------
+    requests.Session
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+
+            retry = Retry(
+                total=http_settings["retries"],
+                backoff_factor=http_settings["backoff_factor"],
+                status_forcelist=http_settings["retry_status"],
+                allowed_methods=["HEAD", "GET"],
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(
+                pool_maxsize=http_settings["pool_maxsize"], max_retries=retry
+            )
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def _transient_errors():
+    "Exceptions of failed transfers, which are worth a retry."
+    import requests
+    from urllib3.exceptions import HTTPError
+
+    return requests.ConnectionError, requests.Timeout, HTTPError
+
+
+def http_get(url, etag=None, last_modified=None, **kwargs):
+    """GET request via the shared session, optionally conditional.
+
+    Parameters
+    ----------
+    url : str
+        HTTP(S) URL
+    etag : str, optional
+        ETag of the version that is already present, sent as If-None-Match.
+    last_modified : str or datetime.datetime, optional
+        Time of the version that is already present, sent as If-Modified-Since.
+        Either way, the server answers with status 304 and no content if the
+        resource did not change.
+    **kwargs : {dict}
+        Keyword args to be handed to `requests.Session.get`.
+
+    Returns
+    -------
+    requests.Response
+    """
+    headers = dict(kwargs.pop("headers", None) or {})
+    if etag is not None:
+        headers["If-None-Match"] = etag
+    if last_modified is not None:
+        if isinstance(last_modified, dt.datetime):
+            last_modified = format_http_date(last_modified)
+        headers["If-Modified-Since"] = last_modified
+    kwargs.setdefault("timeout", http_settings["timeout"])
+    return get_session().get(url, headers=headers, **kwargs)
 
 
 def parse_http_date(text):
@@ -108,17 +473,497 @@ def parse_http_date(text):
     return dt.datetime(*eut.parsedate(text)[:6])
 
 
+def format_http_date(time):
+    "Format a naive UTC datetime as HTTP date."
+    return eut.format_datetime(time.replace(tzinfo=dt.timezone.utc), usegmt=True)
+
+
 def get_remote_timestamp(url):
-    conn = urlopen(url, timeout=10)
-    t = parse_http_date(conn.headers["last-modified"])
-    conn.close()
-    return t
+    r = get_session().head(url, allow_redirects=True, timeout=http_settings["timeout"])
+    r.raise_for_status()
+    return parse_http_date(r.headers["last-modified"])
+
+
+class FreshnessCache:
+    """Cache of the ETag and Last-Modified headers of remote files.
+
+    Within `ttl` seconds after a check of a URL, its stored headers are used
+    without network access. After that, a conditional HEAD request re-validates
+    them, which the server answers with a bodyless 304 if nothing changed.
+
+    Parameters
+    ----------
+    path : str, pathlib.Path or callable, optional
+        JSON file to keep the cache in between sessions, or a function returning
+        it, to defer resolving the path until first use. Default: memory only
+    ttl : float
+        Seconds a check stays valid.
+    """
+
+    def __init__(self, path=None, ttl=300):
+        self._path = path
+        self.ttl = ttl
+        self._entries = None
+        # times of `invalidate` calls per URL, None for all URLs
+        self._invalidated = {}
+        self._lock = threading.RLock()
+
+    @property
+    def path(self):
+        "pathlib.Path: The JSON file of the cache, or None."
+        path = self._path() if callable(self._path) else self._path
+        return None if path is None else Path(path)
+
+    @property
+    def entries(self):
+        "dict: For each URL the etag, last_modified and time of the last check."
+        with self._lock:
+            if self._entries is None:
+                self._entries = {}
+                path = self.path
+                if path is not None and path.exists():
+                    self._entries = json.loads(path.read_text())
+            return self._entries
+
+    @property
+    def lock_path(self):
+        "pathlib.Path: Lock file guarding `path` across processes, or None."
+        path = self.path
+        return None if path is None else path.with_name(path.name + ".lock")
+
+    def save(self):
+        """Write the cache to `path`, if given.
+
+        The file is re-read under its lock first, so that checks saved by other
+        processes in the meantime are kept, unless they are older than the
+        entries or invalidations of this cache.
+        """
+        path = self.path
+        if path is None:
+            return
+        with self._lock, file_lock(self.lock_path):
+            entries = self.entries
+            if path.exists():
+                for url, entry in json.loads(path.read_text()).items():
+                    current = entries.get(url, {}).get("checked", 0)
+                    invalidated = max(
+                        self._invalidated.get(url, 0), self._invalidated.get(None, 0)
+                    )
+                    if entry["checked"] > max(current, invalidated):
+                        entries[url] = entry
+            atomic_write(path, json.dumps(entries, indent=1))
+
+    def get(self, url):
+        "Stored headers of `url`, or None if not checked within `ttl`."
+        entry = self.entries.get(url)
+        if entry is None or time.time() - entry["checked"] > self.ttl:
+            return None
+        return entry
+
+    def store(self, url, entry, save=True):
+        """Store the headers of `url`, e.g. from a GET request.
+
+        Parameters
+        ----------
+        url : str
+            HTTP(S) URL
+        entry : dict
+            With keys etag and last_modified, `checked` is set to now.
+        save : bool
+            Switch to save the cache to `path`.
+        """
+        with self._lock:
+            self.entries[url] = dict(entry, checked=time.time())
+        if save:
+            self.save()
 
+    def invalidate(self, url=None):
+        "Forget the check of `url`, or of all URLs."
+        with self._lock:
+            self._invalidated[url] = time.time()
+            if url is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(url, None)
 
-def download(url, local_dir=".", use_tqdm=True, **kwargs):
-    """Simple wrapper of urlretrieve
+    def check(self, url, force=False, save=True):
+        """Headers of `url`, from the cache or by a conditional HEAD request.
+
+        Parameters
+        ----------
+        url : str
+            HTTP(S) URL
+        force : bool
+            Switch to validate even if the last check is younger than `ttl`.
+        save : bool
+            Switch to save the cache to `path` after a request.
+
+        Returns
+        -------
+        dict
+            With keys etag, last_modified (HTTP date) and checked (epoch seconds).
+        """
+        entry = None if force else self.get(url)
+        if entry is not None:
+            return entry
+        old = self.entries.get(url, {})
+        headers = {}
+        if old.get("etag"):
+            headers["If-None-Match"] = old["etag"]
+        if old.get("last_modified"):
+            headers["If-Modified-Since"] = old["last_modified"]
+        r = get_session().head(
+            url, allow_redirects=True, headers=headers, timeout=http_settings["timeout"]
+        )
+        if r.status_code == 304:
+            entry = old
+        else:
+            r.raise_for_status()
+            entry = {
+                "etag": r.headers.get("etag"),
+                "last_modified": r.headers.get("last-modified"),
+            }
+        self.store(url, entry, save=save)
+        return self.entries[url]
+
+    def check_many(self, urls, max_concurrency=16, max_per_host=4, force=False):
+        """Check many URLs with concurrent conditional HEAD requests.
+
+        Parameters
+        ----------
+        urls : list of str
+            HTTP(S) URLs
+        max_concurrency : int
+            Maximum number of concurrent requests.
+        max_per_host : int
+            Maximum number of concurrent requests to the same host.
+        force : bool
+            Switch to validate even checks younger than `ttl`.
+
+        Returns
+        -------
+        dict
+            For each URL the result of `check`, or the raised exception.
+        """
+        host_limits = {
+            urlsplit(url).netloc: threading.BoundedSemaphore(max_per_host)
+            for url in urls
+        }
+
+        def check(url):
+            with host_limits[urlsplit(url).netloc]:
+                return self.check(url, force=force, save=False)
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            futures = {executor.submit(check, url): url for url in urls}
+            for future in as_completed(futures):
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    results[futures[future]] = e
+        self.save()
+        return results
+
+    def timestamp(self, url):
+        "Last-Modified time of `url`, from the cache if checked within `ttl`."
+        last_modified = self.check(url)["last_modified"]
+        if last_modified is None:
+            raise KeyError(f"No Last-Modified header for {url}.")
+        return parse_http_date(last_modified)
+
+
+def get_byte_range(url, start, timeout=10):
+    """Download the content of a file from byte offset `start` on.
+
+    Uses an HTTP Range request, servers ignoring it are handled by cutting the
+    full response.
+
+    Parameters
+    ----------
+    url : str
+        HTTP(S) URL of the file
+    start : int
+        Byte offset to start from.
+    timeout : float, optional
+        Timeout in seconds for the request.
+
+    Returns
+    -------
+    bytes or None
+        The bytes from `start` to the end of the file, or None when the file is
+        shorter than `start`.
+    """
+    r = http_get(url, headers={"Range": f"bytes={start}-"}, timeout=timeout)
+    if r.status_code == 416:
+        # Range Not Satisfiable
+        return None
+    r.raise_for_status()
+    if r.status_code == 206:
+        return r.content
+    if len(r.content) < start:
+        return None
+    return r.content[start:]
 
-    Adding a default path to urlretrieve
+
+def _iter_adaptive(raw, chunk_size):
+    """Read a stream in chunks that grow on fast and shrink on slow connections.
+
+    Large reads keep the per-chunk overhead low on fast links, small ones keep
+    the progress updates and resume points frequent on slow ones.
+    """
+    size = chunk_size
+    while True:
+        t0 = time.perf_counter()
+        chunk = raw.read(size)
+        if not chunk:
+            return
+        yield chunk
+        elapsed = time.perf_counter() - t0
+        if elapsed < 0.1 and size < http_settings["max_chunk_size"]:
+            size *= 2
+        elif elapsed > 1 and size > chunk_size:
+            size //= 2
+
+
+def _set_mtime(path, http_date):
+    timestamp = parse_http_date(http_date).replace(tzinfo=dt.timezone.utc).timestamp()
+    os.utime(path, (timestamp, timestamp))
+
+
+def _file_md5(path):
+    md5 = hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(2**20), b""):
+            md5.update(block)
+    return md5
+
+
+def _verify_md5(path, md5, url):
+    "Delete `path` and raise if its MD5 checksum isn't `md5`."
+    if md5 is not None and _file_md5(path).hexdigest() != md5.lower():
+        path.unlink()
+        raise DownloadVerificationError(f"MD5 checksum of {url} does not match.")
+
+
+def _retrieve(url, savepath, reporthook=None, chunk_size=None, md5=None, **kwargs):
+    """Resumable download of `url` into `savepath`.
+
+    Data is written into `savepath` + '.part', which is renamed to `savepath`
+    only after the size, and the MD5 checksum if given, were verified.
+    Interrupted transfers are continued with a Range request, also when the
+    .part file is left from an earlier call. If-Range makes sure that the server
+    sends the whole file instead, if it changed in between.
+
+    Returns
+    -------
+    requests.Response
+        The last response, with status 304 if the download was conditional and
+        the local file is up-to-date.
+    """
+    part = savepath.with_name(savepath.name + ".part")
+    chunk_size = chunk_size or http_settings["chunk_size"]
+    failures = 0
+    while True:
+        offset = part.stat().st_size if part.exists() else 0
+        # compressed transfers can't be resumed and verified by their size
+        headers = {"Accept-Encoding": "identity"}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = eut.formatdate(part.stat().st_mtime, usegmt=True)
+        try:
+            with http_get(url, stream=True, headers=headers, **kwargs) as r:
+                if r.status_code == 304:
+                    return r
+                if r.status_code == 416:
+                    if "content-range" not in r.headers:
+                        part.unlink()
+                        continue
+                    # the .part file is complete already, or too long
+                    total = int(r.headers["content-range"].split("/")[-1])
+                    break
+                r.raise_for_status()
+                if r.status_code == 206:
+                    total = int(r.headers["content-range"].split("/")[-1])
+                    logger.info("Resuming download of %s at byte %d.", url, offset)
+                else:
+                    offset = 0
+                    total = int(r.headers.get("content-length", -1))
+                last_modified = r.headers.get("last-modified")
+                try:
+                    with open(part, "ab" if offset else "wb") as f:
+                        if reporthook is not None:
+                            reporthook(0, offset, total)
+                        for chunk in _iter_adaptive(r.raw, chunk_size):
+                            f.write(chunk)
+                            if reporthook is not None:
+                                reporthook(1, offset + f.tell(), total)
+                finally:
+                    # used as If-Range validator when resuming
+                    if last_modified is not None:
+                        _set_mtime(part, last_modified)
+            break
+        except _transient_errors() as e:
+            failures += 1
+            if failures > http_settings["retries"]:
+                raise
+            logger.warning("Download of %s interrupted (%s), resuming.", url, e)
+            time.sleep(http_settings["backoff_factor"] * 2 ** (failures - 1))
+    size = part.stat().st_size
+    if total >= 0 and size != total:
+        if size > total:
+            part.unlink()
+        raise DownloadVerificationError(
+            f"{part} has {size} bytes instead of {total}, call again to resume."
+        )
+    _verify_md5(part, md5, url)
+    os.replace(part, savepath)
+    return r
+
+
+class _RangesNotSupported(Exception):
+    pass
+
+
+def _retrieve_segmented(
+    url, savepath, segments, reporthook=None, chunk_size=None, md5=None
+):
+    """Download `url` in `segments` byte ranges concurrently.
+
+    The ranges are written with os.pwrite into a preallocated file, which is
+    renamed to `savepath` after all ranges arrived completely. Interrupted
+    ranges are resumed, but as the file has holes until then, it is deleted if
+    the download fails.
+
+    Returns
+    -------
+    requests.Response or None
+        The response to the HEAD request, or None if the server does not support
+        Range requests or the file is too small to be split.
+    """
+    chunk_size = chunk_size or http_settings["chunk_size"]
+    head = get_session().head(
+        url,
+        allow_redirects=True,
+        headers={"Accept-Encoding": "identity"},
+        timeout=http_settings["timeout"],
+    )
+    head.raise_for_status()
+    size = int(head.headers.get("content-length", -1))
+    # segments beyond the pool size would open new connections for every request
+    segments = min(
+        segments,
+        http_settings["pool_maxsize"],
+        size // http_settings["min_segment_size"],
+    )
+    if segments < 2 or head.headers.get("accept-ranges") == "none":
+        return None
+    bounds = [size * i // segments for i in range(segments + 1)]
+    validator = head.headers.get("etag") or head.headers.get("last-modified")
+    lock = threading.Lock()
+    failed = threading.Event()
+    done = 0
+
+    def fetch(pos, stop):
+        nonlocal done
+        failures = 0
+        while pos < stop:
+            start = pos
+            headers = {
+                "Accept-Encoding": "identity",
+                "Range": f"bytes={pos}-{stop - 1}",
+            }
+            if validator is not None:
+                # the whole file is sent instead, if it changed since the HEAD request
+                headers["If-Range"] = validator
+            try:
+                with http_get(url, stream=True, headers=headers) as r:
+                    r.raise_for_status()
+                    if r.status_code != 206:
+                        raise _RangesNotSupported()
+                    for chunk in _iter_adaptive(r.raw, chunk_size):
+                        if failed.is_set():
+                            return
+                        chunk = chunk[: stop - pos]
+                        os.pwrite(fd, chunk, pos)
+                        pos += len(chunk)
+                        with lock:
+                            done += len(chunk)
+                            if reporthook is not None:
+                                reporthook(1, done, size)
+            except _transient_errors() as e:
+                failures += 1
+                if failures > http_settings["retries"]:
+                    raise
+                logger.warning("Range of %s interrupted (%s), resuming.", url, e)
+                time.sleep(http_settings["backoff_factor"] * 2 ** (failures - 1))
+            else:
+                if pos > start:
+                    continue
+                # a response without data would otherwise be requested forever
+                failures += 1
+                if failures > http_settings["retries"]:
+                    raise DownloadVerificationError(
+                        f"Range {pos}-{stop - 1} of {url} returned no data."
+                    )
+                logger.warning("Range of %s returned no data, retrying.", url)
+                time.sleep(http_settings["backoff_factor"] * 2 ** (failures - 1))
+
+    # not `.part`, which single stream downloads would take as partial download
+    part = savepath.with_name(savepath.name + ".segments.part")
+    fd = os.open(part, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.ftruncate(fd, size)
+        with ThreadPoolExecutor(max_workers=segments) as executor:
+            futures = [
+                executor.submit(fetch, start, stop)
+                for start, stop in zip(bounds[:-1], bounds[1:])
+            ]
+            try:
+                for future in futures:
+                    future.result()
+            except BaseException:
+                failed.set()
+                raise
+    except _RangesNotSupported:
+        os.close(fd)
+        part.unlink()
+        return None
+    except BaseException:
+        os.close(fd)
+        part.unlink()
+        raise
+    os.close(fd)
+    _verify_md5(part, md5, url)
+    os.replace(part, savepath)
+    return head
+
+
+# ETags of conditional downloads, sent as If-None-Match by the next one
+download_validators = FreshnessCache(
+    lambda: get_data_root() / "download_validators.json"
+)
+
+
+def download(
+    url,
+    local_dir=".",
+    use_tqdm=True,
+    reporthook=None,
+    chunk_size=None,
+    conditional=False,
+    md5=None,
+    segments=None,
+    cache=False,
+    **kwargs,
+):
+    """Download a file via the shared HTTP session.
+
+    Downloads are resumable, see `_retrieve`. The file gets the modification
+    time given by the server, so that later downloads can be conditional.
+    With `segments`, large files are downloaded in concurrent byte ranges,
+    which multiplies the throughput on connections with high latency, where a
+    single TCP stream can't fill the bandwidth.
 
     Parameters:
     ----------
@@ -126,33 +971,113 @@ def download(url, local_dir=".", use_tqdm=True, **kwargs):
         HTTP(S) URL to download
     local_dir : str,pathlib.Path
         Local directory where to store the download.
+    use_tqdm : bool
+        Switch to show a progress bar.
+    reporthook : callable, optional
+        Called like the reporthook of `urllib.request.urlretrieve`, replaces the
+        progress bar.
+    chunk_size : int, optional
+        Bytes of the first read from the network, later reads adapt to the
+        speed of the connection. Default: http_settings["chunk_size"]
+    conditional : bool
+        Switch to skip the download if the local file is not older than the
+        remote one, or, if the server sent an ETag for it, is still the same.
+        ETags are kept in `download_validators`.
+    md5 : str, optional
+        Expected MD5 checksum as hex string, e.g. from the checksum file of a
+        PDS volume.
+    segments : int, optional
+        Number of byte ranges to download concurrently, each at least
+        http_settings["min_segment_size"] long. Falls back to one stream for
+        servers without Range support and on platforms without os.pwrite.
+        Ignored if `**kwargs` are given, which includes conditional downloads
+        of existing files.
+    cache : bool
+        Switch to get the file via the shared product cache, see
+        `planetarypy.cache`. The returned headers then only have the ETag and
+        Last-Modified validators of the file.
     **kwargs : {dict}
-        Keyword args to be handed to urlretrieve.
+        Keyword args to be handed to `http_get`.
     Returns
     -------
     Tuple
-        Tuple returned by urlretrieve
+        pathlib.Path of the local file and the response headers, like urlretrieve
+        returns.
+
+    Raises
+    ------
+    DownloadVerificationError
+        If the size or MD5 checksum of the download is wrong.
     """
     name = url.split("/")[-1]
     local = Path(local_dir)
     savepath = local / name if local.is_dir() else local
+    if cache:
+        from .cache import product_cache
+
+        product_cache.fetch(
+            url,
+            savepath,
+            use_tqdm=use_tqdm,
+            reporthook=reporthook,
+            chunk_size=chunk_size,
+            md5=md5,
+            segments=segments,
+            **kwargs,
+        )
+        validators = product_cache.freshness.entries.get(url, {})
+        headers = {
+            "ETag": validators.get("etag"),
+            "Last-Modified": validators.get("last_modified"),
+        }
+        return savepath, {k: v for k, v in headers.items() if v}
+    if conditional and savepath.exists():
+        kwargs["last_modified"] = eut.formatdate(savepath.stat().st_mtime, usegmt=True)
+        validators = download_validators.entries.get(url, {})
+        if validators.get("etag") and validators.get("path") == str(savepath.resolve()):
+            kwargs["etag"] = validators["etag"]
     logger.debug("Downloading %s into %s", url, savepath)
-    if use_tqdm:
-        with ProgressBar(
-            unit="B", unit_scale=True, miniters=1, desc=url.split("/")[-1]
-        ) as t:  # all optional kwargs
-            return urlretrieve(url, savepath, reporthook=t.update_to)
-    else:
-        return urlretrieve(url, savepath, **kwargs)
+    bar = None
+    if reporthook is None and use_tqdm:
+        bar = _progress_bars().ProgressBar(
+            unit="B", unit_scale=True, miniters=1, desc=name
+        )
+        reporthook = bar.update_to
+    try:
+        r = None
+        if segments and segments > 1 and hasattr(os, "pwrite") and not kwargs:
+            r = _retrieve_segmented(
+                url, savepath, segments, reporthook, chunk_size, md5
+            )
+        if r is None:
+            r = _retrieve(url, savepath, reporthook, chunk_size, md5, **kwargs)
+    finally:
+        if bar is not None:
+            bar.close()
+    if r.status_code == 304:
+        logger.debug("%s is up-to-date.", savepath)
+        return savepath, r.headers
+    if "last-modified" in r.headers:
+        _set_mtime(savepath, r.headers["last-modified"])
+    if conditional and "etag" in r.headers:
+        download_validators.store(
+            url,
+            {
+                "etag": r.headers["etag"],
+                "last_modified": r.headers.get("last-modified"),
+                "path": str(savepath.resolve()),
+            },
+        )
+    return savepath, r.headers
 
 
-def url_retrieve(url: str, outfile: str, chunk_size: int = 128):
+def url_retrieve(url: str, outfile: str, chunk_size: int = None, md5: str = None):
     """Improved urlretrieve with progressbar, timeout and chunker.
 
-    This downloader has built-in progress bar using tqdm and using the `requests`
-    package it improves standard `urllib` behavior by adding time-out capability.
-
-    I tested different chunk_sizes and most of the time 128 was actually fastest, YYMV.
+    This downloader has built-in progress bar using tqdm and using the shared
+    HTTP session (see `get_session`) it improves standard `urllib` behavior by
+    adding time-out capability, connection re-use and retries.
+    Interrupted downloads are resumed, see `download`.
 
     Parameters
     ----------
@@ -161,24 +1086,26 @@ def url_retrieve(url: str, outfile: str, chunk_size: int = 128):
     outfile: str, pathlib.Path
         The path where to store the downloaded file.
     chunk_size : int, optional
-        The size of the chunk for the request.iter_content call. Default: 128
+        Bytes of the first read from the network, later reads adapt to the
+        speed of the connection. Default: http_settings["chunk_size"]
+    md5 : str, optional
+        Expected MD5 checksum as hex string.
 
     See also
     --------
     Inspired by https://stackoverflow.com/a/61575758/680232
     """
-    R = requests.get(url, stream=True, allow_redirects=True)
-    if R.status_code != 200:
-        raise ConnectionError(f"Could not download {url}\nError code: {R.status_code}")
-    with tqdm.wrapattr(
-        open(outfile, "wb"),
-        "write",
-        miniters=1,
-        total=int(R.headers.get("content-length", 0)),
-        desc=str(Path(outfile).name),
-    ) as fd:
-        for chunk in R.iter_content(chunk_size=chunk_size):
-            fd.write(chunk)
+    with _progress_bars().ProgressBar(
+        unit="B", unit_scale=True, miniters=1, desc=str(Path(outfile).name)
+    ) as bar:
+        _retrieve(
+            str(url),
+            Path(outfile),
+            bar.update_to,
+            chunk_size,
+            md5,
+            allow_redirects=True,
+        )
 
 
 def height_from_shadow(shadow_in_pixels, sun_elev):
@@ -199,3 +1126,17 @@ def height_from_shadow(shadow_in_pixels, sun_elev):
     height [meter]
     """
     return tan(radians(sun_elev)) * shadow_in_pixels
+
+
+def __getattr__(name):
+    # attributes depending on packages that are slow to import
+    if name == "GDAL_INSTALLED":
+        value = importlib.util.find_spec("osgeo") is not None
+    elif name == "nasa_date_to_iso_command":
+        value = _nasa_date_to_iso_command()
+    elif name in ["ProgressBar", "AggregateProgressBar"]:
+        value = getattr(_progress_bars(), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
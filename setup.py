@@ -24,6 +24,7 @@ setup(
     packages=find_packages(),
     include_package_data=True,
     install_requires=[
+        "numpy",
         "pandas",
         "pvl",
         "tqdm",
@@ -0,0 +1,134 @@
+import functools
+import http.server
+import os
+import re
+import sys
+import threading
+from typing import NamedTuple
+
+import pytest
+
+
+class RangeRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """SimpleHTTPRequestHandler with support for single byte ranges.
+
+    The server counts the requests per path in `requests`, collects the client
+    addresses in `clients`, answers the next `fail_next` requests with a 503 error,
+    ignores Range headers if `ignore_range` is set, answers them without data if
+    `empty_ranges` is set and drops the connection after
+    `drop_after` bytes of the next response body. Paths in `etags` are served
+    with that ETag, and If-None-Match requests for them are answered with 304.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def send_head(self):
+        # the handler is re-used for all requests of a kept-alive connection
+        self.range_length = None
+        self.etag = None
+        self.server.requests[self.path] = self.server.requests.get(self.path, 0) + 1
+        self.server.clients.add(self.client_address)
+        if self.server.fail_next:
+            self.server.fail_next -= 1
+            self.send_error(503)
+            return None
+        self.etag = self.server.etags.get(self.path)
+        if self.etag is not None and self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return None
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        path = self.translate_path(self.path)
+        if_range = self.headers.get("If-Range")
+        if (
+            match is None
+            or self.server.ignore_range
+            or (if_range is not None and if_range != self._last_modified(path))
+        ):
+            return super().send_head()
+        try:
+            f = open(path, "rb")
+        except OSError:
+            self.send_error(404, "File not found")
+            return None
+        size = f.seek(0, 2)
+        start = int(match[1])
+        stop = min(int(match[2]) + 1, size) if match[2] else size
+        if start >= size:
+            f.close()
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return None
+        if self.server.empty_ranges:
+            stop = start
+        f.seek(start)
+        self.send_response(206)
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Content-Range", f"bytes {start}-{stop - 1}/{size}")
+        self.send_header("Content-Length", str(stop - start))
+        self.send_header("Last-Modified", self._last_modified(path))
+        self.end_headers()
+        self.range_length = stop - start
+        return f
+
+    def end_headers(self):
+        if self.etag is not None:
+            self.send_header("ETag", self.etag)
+        super().end_headers()
+
+    def _last_modified(self, path):
+        try:
+            return self.date_time_string(int(os.stat(path).st_mtime))
+        except OSError:
+            return None
+
+    def copyfile(self, source, outputfile):
+        length = self.range_length
+        if self.server.drop_after is not None:
+            length, self.server.drop_after = self.server.drop_after, None
+            self.close_connection = True
+        if length is None:
+            return super().copyfile(source, outputfile)
+        outputfile.write(source.read(length))
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Server(http.server.ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # clients closing connections early are expected
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class Served(NamedTuple):
+    root: object
+    url: str
+    server: Server
+
+
+@pytest.fixture
+def http_server(tmp_path):
+    """Serve a temporary folder via HTTP, with support for Range requests.
+
+    Yields the folder, the base URL and the server.
+    """
+    root = tmp_path / "remote"
+    root.mkdir()
+    handler = functools.partial(RangeRequestHandler, directory=str(root))
+    server = Server(("127.0.0.1", 0), handler)
+    server.requests = {}
+    server.clients = set()
+    server.fail_next = 0
+    server.ignore_range = False
+    server.empty_ranges = False
+    server.drop_after = None
+    server.etags = {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield Served(root, f"http://127.0.0.1:{server.server_address[1]}", server)
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,113 @@
+import hashlib
+import os
+import stat
+
+import pytest
+
+from planetarypy import utils
+from planetarypy.exceptions import DownloadVerificationError
+from planetarypy.cache import ProductCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ProductCache(tmp_path / "cache", max_bytes=10_000)
+
+
+def test_fetch(cache, http_server, tmp_path):
+    remote, url, server = http_server
+    (remote / "a.img").write_bytes(b"a" * 3000)
+    dest = tmp_path / "out" / "a.img"
+    assert cache.fetch(f"{url}/a.img", dest, use_tqdm=False) == dest
+    assert dest.read_bytes() == b"a" * 3000
+    # a writable copy, editing it doesn't change the cached file
+    assert dest.stat().st_nlink == 1
+    dest.write_bytes(b"x")
+    n_requests = server.requests["/a.img"]
+    dest.unlink()
+    cache.fetch(f"{url}/a.img", dest, use_tqdm=False)
+    assert dest.read_bytes() == b"a" * 3000
+    assert server.requests["/a.img"] == n_requests
+    # a changed file is downloaded again, after the validator was checked
+    (remote / "a.img").write_bytes(b"A" * 3000)
+    os.utime(remote / "a.img", (2e9, 2e9))
+    cache.freshness.ttl = 0
+    cache.fetch(f"{url}/a.img", dest, use_tqdm=False)
+    assert dest.read_bytes() == b"A" * 3000
+    assert cache.size == 6000
+
+
+def test_fetch_linked(cache, http_server, tmp_path):
+    remote, url, _ = http_server
+    (remote / "a.img").write_bytes(b"a" * 3000)
+    dest = tmp_path / "out" / "a.img"
+    cache.fetch(f"{url}/a.img", dest, link=True, use_tqdm=False)
+    # hard-linked, not stored twice, and read-only
+    assert dest.stat().st_nlink == 2
+    assert not dest.stat().st_mode & stat.S_IWUSR
+    # linked files don't count against the budget and aren't evicted
+    assert (cache.size, cache.linked_size) == (0, 3000)
+    for name in "bcd":
+        (remote / name).write_bytes(name.encode() * 4000)
+        cache.fetch(f"{url}/{name}", use_tqdm=False)
+    assert cache.get(f"{url}/a.img", cache.validator(f"{url}/a.img")) is not None
+    assert cache.size <= cache.max_bytes
+
+
+def test_fetch_verifies_md5_of_hits(cache, http_server):
+    remote, url, server = http_server
+    (remote / "a").write_bytes(b"a" * 3000)
+    md5 = hashlib.md5(b"a" * 3000).hexdigest()
+    path = cache.fetch(f"{url}/a", use_tqdm=False, md5=md5)
+    n_requests = server.requests["/a"]
+    assert cache.fetch(f"{url}/a", use_tqdm=False, md5=md5.upper()) == path
+    assert server.requests["/a"] == n_requests
+    # a mismatch isn't served from the cache, but downloaded and verified again
+    with pytest.raises(DownloadVerificationError):
+        cache.fetch(f"{url}/a", use_tqdm=False, md5="0" * 32)
+    assert server.requests["/a"] > n_requests
+
+
+def test_get_does_not_write_the_index(cache, http_server):
+    remote, url, _ = http_server
+    (remote / "a").write_bytes(b"a" * 3000)
+    path = cache.fetch(f"{url}/a", use_tqdm=False)
+    mtime = cache.index_path.stat().st_mtime_ns
+    os.utime(path, (0, path.stat().st_mtime))
+    assert cache.get(f"{url}/a", cache.validator(f"{url}/a")) == path
+    assert cache.index_path.stat().st_mtime_ns == mtime
+    assert path.stat().st_atime > 0
+
+
+def test_deduplication_and_eviction(cache, http_server):
+    remote, url, _ = http_server
+    for name, content in [("a", b"a"), ("b", b"b"), ("copy_of_a", b"a")]:
+        (remote / name).write_bytes(content * 4000)
+    a = cache.fetch(f"{url}/a", use_tqdm=False)
+    assert cache.fetch(f"{url}/copy_of_a", use_tqdm=False) == a
+    assert cache.size == 4000
+    cache.fetch(f"{url}/b", use_tqdm=False)
+    # uses a, so that b is evicted first
+    cache.fetch(f"{url}/a", use_tqdm=False)
+    (remote / "c").write_bytes(b"c" * 4000)
+    cache.fetch(f"{url}/c", use_tqdm=False)
+    assert cache.size == 8000
+    assert a.exists()
+    assert cache.get(f"{url}/b", cache.validator(f"{url}/b")) is None
+
+
+def test_offline(cache, http_server, tmp_path):
+    remote, url, server = http_server
+    (remote / "a.img").write_bytes(b"a" * 3000)
+    path = cache.fetch(f"{url}/a.img", use_tqdm=False)
+    server.shutdown()
+    server.server_close()
+    cache.freshness.ttl = 0
+    retries = utils.http_settings["retries"]
+    utils.configure_http(retries=0)
+    try:
+        assert cache.fetch(f"{url}/a.img", use_tqdm=False) == path
+        with pytest.raises(utils._transient_errors()):
+            cache.fetch(f"{url}/b.img", use_tqdm=False)
+    finally:
+        utils.configure_http(retries=retries)
@@ -0,0 +1,39 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from planetarypy import _config
+
+
+def test_import_without_config(tmp_path):
+    # no prompt and no file access at import, even without a config file
+    env = {"HOME": str(tmp_path), "PATH": ""}
+    code = "import planetarypy.pdstools.indices; print('ok')"
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        env=env,
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True,
+        timeout=60,
+        cwd=Path(__file__).parents[1],
+    )
+    assert out.returncode == 0, out.stderr
+    assert out.stdout == "ok\n"
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_lazy_config(tmp_path, monkeypatch):
+    path = tmp_path / "config.toml"
+    monkeypatch.setenv("PLANETARYPY_CONFIG", str(path))
+    config = _config.Config()
+    assert config["data_archive"]["path"] == str(_config.default_data_root)
+    path.write_text('[data_archive]\npath = "/from/file"\n\n[opus]\nlimit = 10\n')
+    assert config["data_archive"]["path"] == str(_config.default_data_root)
+    config.reload()
+    assert config["data_archive"]["path"] == "/from/file"
+    assert config["opus"] == {"limit": 10}
+    monkeypatch.setenv("PLANETARYPY_DATA_ARCHIVE__PATH", "/from/env")
+    config.reload()
+    assert config["data_archive"]["path"] == "/from/env"
+    assert set(config) == {"data_archive", "opus"}
@@ -1,6 +1,45 @@
-from planetarypy import constants
+import numpy as np
+import pandas as pd
+
+from planetarypy import constants, factsheet_parse
 
 def test_constants():
     mars_escape_velocity = 5.0
     eps = 1e-5
     assert abs(mars_escape_velocity - constants.mars.escape_velocity) < eps
+
+
+def factsheet_html(df):
+    "HTML table like on NASA's factsheet page, from a parsed factsheet."
+    table = df.T.astype(object)
+    table.index = table.index.str.replace("10^24", "1024").str.replace("10^6", "106")
+    for row in ["Ring System?", "Global Magnetic Field?"]:
+        table.loc[row] = table.loc[row].map({1.0: "Yes", 0.0: "No"}).fillna("Unknown")
+    table.loc["Surface Pressure (bars)"] = table.loc["Surface Pressure (bars)"].map(
+        lambda v: "Unknown*" if pd.isna(v) else v
+    )
+    table.loc["Diameter (km)"] = table.loc["Diameter (km)"].map("{:,.0f}".format)
+    table.loc[""] = table.columns
+    return table.to_html()
+
+
+def test_refresh(http_server, tmp_path, monkeypatch):
+    remote, url, _ = http_server
+    bundled = factsheet_parse.load_factsheet()
+    changed = bundled.copy()
+    changed.loc["MARS", "Number of Moons"] = 3
+    (remote / "factsheet.html").write_text(factsheet_html(changed))
+    monkeypatch.setattr(factsheet_parse, "all_planets_url", f"{url}/factsheet.html")
+    monkeypatch.setattr(
+        factsheet_parse, "cache_path", lambda: tmp_path / "planets_factsheet.csv"
+    )
+    constants.mars
+    constants.refresh()
+    assert http_server.server.requests["/factsheet.html"] == 1
+    assert constants.mars.number_of_moons == 3
+    pd.testing.assert_frame_equal(constants.planets_pretty, changed)
+    assert np.isnan(constants.planets.loc["JUPITER", "surface_pressure"])
+    # the refreshed factsheet is used in later sessions
+    pd.testing.assert_frame_equal(factsheet_parse.load_factsheet(), changed)
+    monkeypatch.undo()
+    constants._clear()
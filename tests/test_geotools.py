@@ -0,0 +1,118 @@
+import threading
+
+import numpy as np
+import pytest
+
+pytest.importorskip("osgeo")
+
+from osgeo import osr  # noqa: E402
+
+from planetarypy import geotools  # noqa: E402
+
+GEOTRANS = (-707109.7, 115.1, 0.0, 707109.7, 0.0, -115.1)
+
+
+@pytest.fixture(scope="module")
+def projection():
+    srs = osr.SpatialReference()
+    srs.ImportFromProj4("+proj=stere +lat_0=-90 +lon_0=0 +k=1 +R=3396190 +units=m")
+    return srs.ExportToWkt()
+
+
+def test_point_array(projection):
+    samples, lines = np.arange(0, 1000, 100), np.arange(500, 1500, 100)
+    points = geotools.PointArray(samples, lines, geotrans=GEOTRANS, proj=projection)
+    assert len(points) == 10
+    for i in range(len(points)):
+        point = geotools.Point(samples[i], lines[i])
+        point.pixel_to_lonlat(GEOTRANS, projection)
+        assert points[i].x == pytest.approx(point.x)
+        assert points[i].lon == pytest.approx(point.lon)
+        assert points[i].lat == pytest.approx(point.lat)
+    back = geotools.PointArray(
+        lon=points.lon, lat=points.lat, geotrans=GEOTRANS, proj=projection
+    )
+    np.testing.assert_allclose(back.sample, samples, atol=1e-6)
+    np.testing.assert_allclose(back.line, lines, atol=1e-6)
+
+
+def test_transformation_cache(projection):
+    ct = geotools.get_transformation(projection)
+    assert geotools.get_transformation(projection) is ct
+    assert geotools.get_transformation(projection, to_lonlat=False) is not ct
+    other = []
+    thread = threading.Thread(
+        target=lambda: other.append(geotools.get_transformation(projection))
+    )
+    thread.start()
+    thread.join()
+    assert other[0] is not ct
+
+
+def test_compact_point_and_window():
+    point = geotools.Point(1, 2, geotrans=GEOTRANS)
+    assert not hasattr(point, "__dict__")
+    copy = point.copy()
+    assert (copy.sample, copy.line, copy.x, copy.y) == (
+        point.sample,
+        point.line,
+        point.x,
+        point.y,
+    )
+    window = geotools.Window(point, geotools.Point(11, 12))
+    assert not hasattr(window, "__dict__")
+    assert window.copy().get_gdal_window() == [1, 2, 10, 10]
+    assert window.copy().ul is not point
+
+
+@pytest.fixture
+def raster(tmp_path):
+    "Tiled GeoTIFF of 100 x 70 pixels with 16 x 16 pixel blocks."
+    from osgeo import gdal
+
+    data = np.arange(70 * 100, dtype=np.int32).reshape(70, 100)
+    path = str(tmp_path / "raster.tif")
+    options = ["TILED=YES", "BLOCKXSIZE=16", "BLOCKYSIZE=16"]
+    ds = gdal.GetDriverByName("GTiff").Create(
+        path, 100, 70, 1, gdal.GDT_Int32, options=options
+    )
+    ds.SetGeoTransform(GEOTRANS)
+    ds.GetRasterBand(1).WriteArray(data)
+    ds = None
+    return path, data
+
+
+def test_iter_tiles(raster):
+    path, data = raster
+    img = geotools.ImgData(path)
+    windows = list(img.tile_windows(30, overlap=2))
+    # 30 is rounded to two blocks
+    assert windows[0].get_gdal_window() == [0, 0, 34, 34]
+    assert len(windows) == 4 * 3
+    assert img._aligned_tile_size(np.int64(30)) == (32, 32)
+    mosaic = np.zeros_like(data)
+    for window, tile in img.iter_tiles(30, overlap=2, workers=3):
+        sample, line, width, height = window.get_gdal_window()
+        np.testing.assert_array_equal(
+            tile, data[line : line + height, sample : sample + width]
+        )
+        mosaic[line : line + height, sample : sample + width] = tile
+    np.testing.assert_array_equal(mosaic, data)
+
+
+def test_block_cache(raster):
+    path, data = raster
+    img = geotools.ImgData(path)
+    assert img.block_cache is None
+    img.block_cache = cache = geotools.BlockCache(max_bytes=10**6, tile_size=32)
+    window = geotools.Window(geotools.Point(10, 5), geotools.Point(45, 40))
+    np.testing.assert_array_equal(img.read_window(window), data[5:40, 10:45])
+    # 2 x 2 tiles of 2 x 2 blocks
+    assert (cache.hits, cache.misses) == (0, 4)
+    img.read_window(geotools.Point(20, 20), geotools.Point(30, 30))
+    assert (cache.hits, cache.misses) == (1, 4)
+    img.read_center_window(width=20)
+    np.testing.assert_array_equal(img.data, data[25:45, 40:60])
+    # edge tiles are smaller
+    img.read_window(geotools.Point(90, 60), geotools.Point(100, 70))
+    np.testing.assert_array_equal(img.data, data[60:70, 90:100])
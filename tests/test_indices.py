@@ -0,0 +1,463 @@
+import datetime as dt
+import multiprocessing
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from planetarypy.pdstools import indices
+
+LABEL = """PDS_VERSION_ID        = PDS3
+RECORD_TYPE           = FIXED_LENGTH
+RECORD_BYTES          = 80
+FILE_RECORDS          = 3
+^INDEX_TABLE          = "INDEX.TAB"
+
+OBJECT                = INDEX_TABLE
+  INTERCHANGE_FORMAT  = ASCII
+  ROWS                = 3
+  COLUMNS             = 5
+  ROW_BYTES           = 80
+
+  OBJECT              = COLUMN
+    NAME              = VOLUME_ID
+    DATA_TYPE         = CHARACTER
+    START_BYTE        = 2
+    BYTES             = 11
+  END_OBJECT          = COLUMN
+
+  OBJECT              = COLUMN
+    NAME              = START_TIME
+    DATA_TYPE         = TIME
+    START_BYTE        = 15
+    BYTES             = 21
+  END_OBJECT          = COLUMN
+
+  OBJECT              = COLUMN
+    NAME              = EXPOSURE_DURATION
+    DATA_TYPE         = ASCII_REAL
+    START_BYTE        = 37
+    BYTES             = 9
+  END_OBJECT          = COLUMN
+
+  OBJECT              = COLUMN
+    NAME              = LINES
+    DATA_TYPE         = ASCII_INTEGER
+    START_BYTE        = 47
+    BYTES             = 5
+  END_OBJECT          = COLUMN
+
+  OBJECT              = COLUMN
+    NAME              = CENTER
+    DATA_TYPE         = ASCII_REAL
+    START_BYTE        = 53
+    BYTES             = 26
+    ITEMS             = 3
+    ITEM_BYTES        = 8
+    ITEM_OFFSET       = 9
+  END_OBJECT          = COLUMN
+END_OBJECT            = INDEX_TABLE
+END
+"""
+
+ROWS = [
+    ("COISS_2001", "2004-135T12:23:02.123", 1.5, 1024, (1.0, 2.0, -3.5)),
+    ("COISS_2002", "2005-001T00:00:00.000", 12.25, 512, (10.0, 20.5, 30.0)),
+    ("COISS_2003", "2008-366T23:59:59.999", 0.005, 64, (-1.25, 0.0, 99.0)),
+]
+
+
+def format_row(volume, time, exposure, lines, center):
+    line = f'"{volume:<11}",{time:<21},{exposure:9.4f},{lines:5d},'
+    line += ",".join(f"{x:8.3f}" for x in center)
+    return line.ljust(78) + "\r\n"
+
+
+@pytest.fixture
+def label(tmp_path):
+    (tmp_path / "INDEX.LBL").write_text(LABEL)
+    with open(tmp_path / "INDEX.TAB", "w", newline="") as f:
+        for row in ROWS:
+            f.write(format_row(*row))
+    return indices.IndexLabel(tmp_path / "INDEX.LBL")
+
+
+def test_numpy_engine_matches_read_fwf(label):
+    fast = label.read_index_data(convert_times=False)
+    slow = label.read_index_data(convert_times=False, engine="fwf")
+    pd.testing.assert_frame_equal(fast, slow)
+
+
+def test_numpy_engine_types_from_label(label):
+    df = label.read_index_data()
+    assert list(df.columns) == label.colnames
+    assert df.LINES.dtype == "int64"
+    assert df.CENTER_3.tolist() == [-3.5, 30.0, 99.0]
+    assert df.START_TIME.iloc[2] == pd.Timestamp("2008-12-31T23:59:59.999")
+
+
+def test_numpy_engine_blank_numeric_cell(label):
+    with open(label.index_path, "rb+") as f:
+        f.seek(80 + 46)
+        f.write(b"     ")
+    df = label.read_index_data()
+    assert np.isnan(df.LINES.iloc[1])
+    assert df.LINES.iloc[2] == 64
+
+
+def test_numpy_engine_misaligned_records(label, caplog):
+    # records one byte longer than RECORD_BYTES
+    with open(label.index_path, "w", newline="") as f:
+        for row in ROWS:
+            f.write(format_row(*row).replace("\r\n", " \r\n"))
+    with pytest.raises(indices.MisalignedRecordsError):
+        indices.read_fixed_width(label.index_path, label)
+    df = label.read_index_data(convert_times=False)
+    assert "Falling back" in caplog.text
+    pd.testing.assert_frame_equal(
+        df, label.read_index_data(convert_times=False, engine="fwf")
+    )
+    assert df.VOLUME_ID.tolist() == [row[0] for row in ROWS]
+
+
+def test_misaligned_records_with_columns_and_where(label):
+    with open(label.index_path, "w", newline="") as f:
+        for row in ROWS:
+            f.write(format_row(*row).replace("\r\n", " \r\n"))
+    with pytest.raises(indices.MisalignedRecordsError):
+        label.open_mmap()
+    df = label.read_index_data(columns=["VOLUME_ID", "LINES", "CENTER"])
+    assert df.VOLUME_ID.tolist() == [row[0] for row in ROWS]
+    assert df.LINES.tolist() == [1024, 512, 64]
+    assert list(df.columns) == [
+        "VOLUME_ID",
+        "LINES",
+        "CENTER_1",
+        "CENTER_2",
+        "CENTER_3",
+    ]
+    df = label.read_index_data(
+        columns=["VOLUME_ID"],
+        where=[
+            ("LINES", "<", 1000),
+            ("START_TIME", ">", pd.Timestamp("2005-01-01")),
+            ("VOLUME_ID", "startswith", "COISS"),
+        ],
+    )
+    assert df.VOLUME_ID.tolist() == ["COISS_2003"]
+    assert df.index.tolist() == [2]
+    df = label.read_index_data(columns=["VOLUME_ID"], workers=2)
+    assert df.VOLUME_ID.tolist() == [row[0] for row in ROWS]
+
+
+def test_compiled_schema(label):
+    schema = label.schema
+    assert schema is indices.IndexLabel(label.path).schema
+    assert pickle.loads(pickle.dumps(schema)) == schema
+    assert schema.record_bytes == 80
+    assert schema.colnames == label.colnames
+    assert schema.columns[-1].colspecs == [(52, 60), (61, 69), (70, 78)]
+    # changing the label invalidates the cache
+    label.path.write_text(LABEL.replace("RECORD_BYTES          = 80", ""))
+    os.utime(label.path, ns=(0, 0))
+    assert label.schema.record_bytes == 82
+
+
+def test_record_decoder(label):
+    decoder = label.record_decoder()
+    data = label.index_path.read_bytes()
+    records = decoder(data)
+    assert decoder.names == label.colnames
+    assert records["LINES"].tolist() == [1024, 512, 64]
+    assert records["VOLUME_ID"][2] == "COISS_2003"
+    assert records["START_TIME"][2] == np.datetime64("2008-12-31T23:59:59.999")
+    # lines without terminator and a short line
+    lines = [data[i : i + 78] for i in range(0, len(data), 80)]
+    np.testing.assert_array_equal(decoder(lines), records)
+    short = decoder([data[:52]])
+    assert short["LINES"][0] == 1024 and np.isnan(short["CENTER_1"][0])
+    first = decoder.to_dicts(data[:80])[0]
+    assert first["START_TIME"] == pd.Timestamp("2004-05-14T12:23:02.123")
+    assert first["CENTER_3"] == -3.5
+
+
+def test_record_decoder_small_batches(label):
+    decoder = label.record_decoder()
+    data = label.index_path.read_bytes()
+    lines = [data[i : i + 80] for i in range(0, len(data), 80)]
+    # a blank integer, an unparseable and a blank time
+    lines[1] = lines[1][:15] + b"2005-366T00:00:00.000" + lines[1][36:]
+    lines[1] = lines[1][:46] + b"     " + lines[1][51:]
+    lines[2] = lines[2][:15] + b" " * 21 + lines[2][36:]
+    batched = pd.DataFrame(decoder(b"".join(lines)))
+    assert decoder([lines[0]]).dtype == decoder.dtype
+    for i, line in enumerate(lines):
+        # blank integers only make their own batch float
+        pd.testing.assert_frame_equal(
+            pd.DataFrame(decoder([line])),
+            batched.iloc[[i]].reset_index(drop=True),
+            check_dtype=False,
+        )
+    small = pd.DataFrame(decoder(lines))
+    assert small.LINES.isna().tolist() == [False, True, False]
+    assert small.START_TIME.isna().tolist() == [False, True, True]
+    pd.testing.assert_frame_equal(small, batched)
+
+
+def test_open_mmap(label):
+    table = label.open_mmap()
+    assert len(table) == 3
+    assert table.raw("LINES").shape == (3, 5)
+    assert table["LINES"].tolist() == [1024, 512, 64]
+    assert table["CENTER"].shape == (3, 3)
+    assert table["CENTER_2"].tolist() == [2.0, 20.5, 0.0]
+    assert table["VOLUME_ID"][1] == "COISS_2002"
+    pd.testing.assert_frame_equal(table.to_df(), label.read_index_data())
+
+
+def test_open_mmap_without_last_line_terminator(label):
+    with open(label.index_path, "rb+") as f:
+        f.truncate(3 * 80 - 2)
+    assert label.open_mmap()["VOLUME_ID"][-1] == "COISS_2003"
+
+
+def test_read_index_data_columns_and_where(label):
+    df = label.read_index_data(
+        columns=["VOLUME_ID", "CENTER_3"],
+        where=[("VOLUME_ID", "startswith", "COISS_200"), ("LINES", "<", 1000)],
+    )
+    assert list(df.columns) == ["VOLUME_ID", "CENTER_3"]
+    assert df.index.tolist() == [1, 2]
+    assert df.CENTER_3.tolist() == [30.0, 99.0]
+
+
+def test_where_in_empty_sequence(label):
+    df = label.read_index_data(columns=["VOLUME_ID"], where=[("VOLUME_ID", "in", [])])
+    assert df.empty
+    df = label.read_index_data(
+        columns=["VOLUME_ID"], where=[("VOLUME_ID", "not in", ())]
+    )
+    assert df.VOLUME_ID.tolist() == [row[0] for row in ROWS]
+
+
+def test_where_on_times(label):
+    by_string = label.read_index_data(
+        columns=["VOLUME_ID"], where=[("START_TIME", ">=", "2005-001")]
+    )
+    by_datetime = label.read_index_data(
+        columns=["VOLUME_ID"], where=[("START_TIME", ">=", pd.Timestamp("2005-01-01"))]
+    )
+    assert by_string.VOLUME_ID.tolist() == ["COISS_2002", "COISS_2003"]
+    pd.testing.assert_frame_equal(by_string, by_datetime)
+    in_list = label.read_index_data(
+        where=[("VOLUME_ID", "in", ["COISS_2001", "COISS_2003"])]
+    )
+    assert in_list.index.tolist() == [0, 2]
+
+
+def test_iter_chunks(label):
+    chunks = list(label.iter_chunks(chunksize=2))
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    pd.testing.assert_frame_equal(pd.concat(chunks), label.read_index_data())
+    filtered = list(
+        label.iter_chunks(chunksize=2, columns=["LINES"], where=[("LINES", ">", 100)])
+    )
+    assert pd.concat(filtered).LINES.to_dict() == {0: 1024, 1: 512}
+
+
+def test_iter_chunks_misaligned_records(label, caplog):
+    with open(label.index_path, "w", newline="") as f:
+        for row in ROWS:
+            f.write(format_row(*row).replace("\r\n", " \r\n"))
+    chunks = list(label.iter_chunks(chunksize=2))
+    assert "Falling back" in caplog.text
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    pd.testing.assert_frame_equal(pd.concat(chunks), label.read_index_data())
+    filtered = list(
+        label.iter_chunks(chunksize=2, columns=["LINES"], where=[("LINES", ">", 100)])
+    )
+    assert pd.concat(filtered).LINES.to_dict() == {0: 1024, 1: 512}
+
+
+def test_read_index_data_with_workers(label):
+    pd.testing.assert_frame_equal(
+        label.read_index_data(workers=2), label.read_index_data()
+    )
+    df = label.read_index_data(workers=2, where=[("LINES", "<", 1000)])
+    assert df.index.tolist() == [1, 2]
+    # more workers than rows
+    pd.testing.assert_frame_equal(
+        label.read_index_data(workers=8), label.read_index_data()
+    )
+
+
+@pytest.mark.parametrize("storage_format", ["parquet", "feather"])
+def test_index_storage_roundtrip(label, tmp_path, storage_format):
+    pytest.importorskip("pyarrow")
+    index = indices.Index(
+        "cassini.iss.index", "https://host/COISS_2999_index.lbl", timestamp=""
+    )
+    index.local_root = tmp_path / "indices"
+    index.local_label_path.write_text(label.path.read_text())
+    (index.local_dir / "INDEX.TAB").write_bytes(label.index_path.read_bytes())
+    savepath = index.convert(storage_format=storage_format)
+    assert savepath == index.local_storage_path(storage_format)
+    index.storage_format = storage_format
+    pd.testing.assert_frame_equal(index.df, label.read_index_data())
+    df = index.read_df(
+        columns=["CENTER_1"],
+        where=[
+            ("VOLUME_ID", "startswith", "COISS"),
+            ("START_TIME", ">", pd.Timestamp("2005-01-01")),
+        ],
+    )
+    assert df.CENTER_1.tolist() == [-1.25]
+
+
+def test_update_incremental(label, http_server, tmp_path, monkeypatch):
+    remote, url, _ = http_server
+    monkeypatch.setattr(indices.Index, "local_root", tmp_path / "local")
+    (remote / "INDEX.LBL").write_text(LABEL)
+    (remote / "INDEX.TAB").write_bytes(label.index_path.read_bytes())
+    index = indices.Index("test.test.index", f"{url}/INDEX.LBL", "")
+    local_dir = label.path.parent
+    index.convert(label.path)
+    new_row = ("COISS_2004", "2010-001T00:00:01.000", 3.0, 128, (4.0, 5.0, 6.0))
+    with open(remote / "INDEX.TAB", "a", newline="") as f:
+        f.write(format_row(*new_row))
+    # for servers ignoring the Range header as well
+    for ignore_range in [False, True]:
+        if ignore_range:
+            http_server.server.ignore_range = True
+        assert index.update_incremental(local_dir) == 1
+        assert label.index_path.read_bytes() == (remote / "INDEX.TAB").read_bytes()
+        df = indices.storage.get_format().read(
+            local_dir / index.local_storage_path().name
+        )
+        expected = indices.IndexLabel(remote / "INDEX.LBL").read_index_data()
+        pd.testing.assert_frame_equal(df, expected, check_dtype=False)
+        assert index.update_incremental(local_dir) == 0
+        # start over for the second pass
+        with open(label.index_path, "r+b") as f:
+            f.truncate(3 * 80)
+        index.convert(label.path)
+    # rewritten rows need a full download
+    rewritten = label.index_path.read_bytes().replace(b"COISS_2003", b"COISS_9999")
+    (remote / "INDEX.TAB").write_bytes(rewritten + format_row(*new_row).encode())
+    assert index.update_incremental(local_dir) is None
+
+
+def test_update_incremental_failed_append(label, http_server, tmp_path, monkeypatch):
+    remote, url, _ = http_server
+    monkeypatch.setattr(indices.Index, "local_root", tmp_path / "local")
+    (remote / "INDEX.LBL").write_text(LABEL)
+    table = label.index_path.read_bytes()
+    new_row = ("COISS_2004", "2010-001T00:00:01.000", 3.0, 128, (4.0, 5.0, 6.0))
+    (remote / "INDEX.TAB").write_bytes(table + format_row(*new_row).encode())
+    index = indices.Index("test.test.index", f"{url}/INDEX.LBL", "")
+    local_dir = label.path.parent
+    index.convert(label.path)
+    savepath = local_dir / index.local_storage_path().name
+    stored = savepath.read_bytes()
+
+    def fail(df, path):
+        with open(path, "wb") as f:
+            f.write(b"partial")
+        raise OSError("disk full")
+
+    fmt = indices.storage.get_format()
+    with monkeypatch.context() as m:
+        m.setattr(fmt, "write", staticmethod(fail))
+        m.delattr(fmt, "append", raising=False)
+        with pytest.raises(OSError):
+            index.update_incremental(local_dir)
+    assert label.index_path.read_bytes() == table
+    assert savepath.read_bytes() == stored
+    # no temporary files are left behind
+    assert not list(local_dir.glob("INDEX.*.*"))
+    # the next run still finds the new row
+    assert index.update_incremental(local_dir) == 1
+    assert fmt.read(savepath).VOLUME_ID.tolist()[-1] == "COISS_2004"
+
+
+def test_download_all(label, http_server, tmp_path, monkeypatch):
+    remote, url, _ = http_server
+    for name in ["A", "B"]:
+        (remote / f"{name}.LBL").write_text(LABEL.replace("INDEX.TAB", f"{name}.TAB"))
+        (remote / f"{name}.TAB").write_bytes(label.index_path.read_bytes())
+    db_path = tmp_path / "db.toml"
+    db_path.write_text(f"""[test.a.index]
+url = "{url}/A.LBL"
+timestamp = ""
+
+[test.b.index]
+url = "{url}/B.LBL"
+timestamp = ""
+
+[test.missing.index]
+url = "{url}/MISSING.LBL"
+timestamp = ""
+""")
+    monkeypatch.setattr(indices.IndexDB, "fpath", db_path)
+    monkeypatch.setattr(indices.Index, "local_root", tmp_path / "local")
+    monkeypatch.setattr(
+        indices, "freshness", indices.utils.FreshnessCache(tmp_path / "fresh.json")
+    )
+    db = indices.IndexDB()
+    assert db.keys == ["test.a.index", "test.b.index", "test.missing.index"]
+    results = db.download_all(max_concurrency=4, max_per_host=2)
+    assert isinstance(results["test.missing.index"], Exception)
+    expected = label.read_index_data()
+    for key in ["test.a.index", "test.b.index"]:
+        df = indices.storage.get_format().read(results[key])
+        pd.testing.assert_frame_equal(df, expected, check_dtype=False)
+    # timestamps were stored, so nothing is downloaded again
+    results = indices.IndexDB().download_all(keys=["test.a.index", "test.b.index"])
+    assert results == {"test.a.index": None, "test.b.index": None}
+    n_requests = http_server.server.requests["/A.LBL"]
+    (remote / "A.LBL").touch()
+    os.utime(remote / "A.LBL", (2e9, 2e9))
+    # the freshness cache hides the change until the TTL is over
+    assert indices.IndexDB().check_all(["test.a.index"]) == {"test.a.index": False}
+    assert http_server.server.requests["/A.LBL"] == n_requests
+    indices.freshness.ttl = 0
+    assert indices.IndexDB().check_all(["test.a.index"]) == {"test.a.index": True}
+    # indices locked by another downloader are skipped
+    with indices.Index("test.a.index", f"{url}/A.LBL", "").lock():
+        results = indices.IndexDB().download_all(keys=["test.a.index"])
+    assert results == {"test.a.index": None}
+    assert http_server.server.requests["/A.TAB"] == 1
+    results = indices.IndexDB().download_all(keys=["test.a.index"])
+    assert not isinstance(results["test.a.index"], Exception)
+    assert http_server.server.requests["/A.TAB"] == 2
+
+
+def _store_timestamps(db_path, key, n):
+    indices.IndexDB.fpath = db_path
+    index = indices.Index(key, "", "")
+    for i in range(n):
+        index.new_timestamp = dt.datetime(2000, 1, 1) + dt.timedelta(days=i)
+        indices.IndexDB().update_timestamp(index)
+
+
+def test_concurrent_update_timestamp(tmp_path, monkeypatch):
+    db_path = tmp_path / "db.toml"
+    keys = [f"test.i{i}.index" for i in range(4)]
+    db_path.write_text(
+        "".join(f'[{key}]\nurl = "{key}"\ntimestamp = ""\n\n' for key in keys)
+    )
+    ctx = multiprocessing.get_context("spawn")
+    processes = [
+        ctx.Process(target=_store_timestamps, args=(db_path, key, 20)) for key in keys
+    ]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join()
+        assert p.exitcode == 0
+    monkeypatch.setattr(indices.IndexDB, "fpath", db_path)
+    db = indices.IndexDB()
+    for key in keys:
+        assert db.get_by_path(key).timestamp == "2000-01-20T00:00:00"
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from planetarypy import rastertools
+
+GEOTRANS = (-707109.7, 115.1, 0.0, 707109.7, 0.0, -115.1)
+
+
+def test_apply_geotransform():
+    x, y = rastertools.apply_geotransform(GEOTRANS, [0, 10.5], [3, 2])
+    np.testing.assert_allclose(x, [-707109.7, -707109.7 + 10.5 * 115.1])
+    np.testing.assert_allclose(y, [707109.7 - 3 * 115.1, 707109.7 - 2 * 115.1])
+
+
+def test_invert_geotransform():
+    gt = (100.0, 2.0, 0.5, 200.0, 0.25, -3.0)
+    inverse = rastertools.invert_geotransform(gt)
+    assert rastertools.invert_geotransform(list(gt)) is inverse
+    x, y = rastertools.apply_geotransform(gt, [0, 10.5], [3, 7])
+    sample, line = rastertools.apply_geotransform(inverse, x, y)
+    np.testing.assert_allclose(sample, [0, 10.5], atol=1e-9)
+    np.testing.assert_allclose(line, [3, 7], atol=1e-9)
+    with pytest.raises(ValueError):
+        rastertools.invert_geotransform((0, 1, 2, 0, 2, 4))
+
+
+class Band:
+    "Stand-in for a GDAL band, counting the pixels read."
+
+    def __init__(self, data, block_size):
+        self.data = data
+        self.YSize, self.XSize = data.shape
+        self.block_size = block_size
+        self.pixels_read = 0
+
+    def GetBlockSize(self):
+        return list(self.block_size)
+
+    def ReadAsArray(self, xoff, yoff, xsize, ysize):
+        self.pixels_read += xsize * ysize
+        return self.data[yoff : yoff + ysize, xoff : xoff + xsize].copy()
+
+
+@pytest.fixture
+def data():
+    return np.arange(70 * 100, dtype=np.int32).reshape(70, 100)
+
+
+def test_block_cache(data):
+    band = Band(data, (16, 16))
+    cache = rastertools.BlockCache(max_bytes=10**6, tile_size=32)
+    assert cache.tile_shape(band) == (32, 32)
+    window = cache.read_window("key", band, 10, 5, 35, 35)
+    np.testing.assert_array_equal(window, data[5:40, 10:45])
+    assert (cache.hits, cache.misses) == (0, 4)
+    # the returned data is a copy
+    window[:] = 0
+    np.testing.assert_array_equal(
+        cache.read_window("key", band, 10, 5, 35, 35), data[5:40, 10:45]
+    )
+    assert (cache.hits, cache.misses) == (4, 4)
+    # edge tiles are smaller
+    np.testing.assert_array_equal(
+        cache.read_window("key", band, 90, 60, 10, 10), data[60:70, 90:100]
+    )
+    assert cache.nbytes == (4 * 32 * 32 + 32 * 32 + 4 * 32 + 32 * 6 + 4 * 6) * 4
+    # least recently used tiles are evicted
+    cache.max_bytes = 2 * 32 * 32 * 4
+    # only the edge tiles are left
+    assert (len(cache), cache.nbytes) == (4, (32 * 32 + 4 * 32 + 32 * 6 + 4 * 6) * 4)
+    np.testing.assert_array_equal(
+        cache.read_window("key", band, 10, 5, 35, 35), data[5:40, 10:45]
+    )
+    assert cache.nbytes <= cache.max_bytes
+
+
+def test_block_cache_strips(data):
+    # strip-organised raster, with one row per block
+    band = Band(data, (100, 1))
+    cache = rastertools.BlockCache(max_bytes=10**6, tile_size=32)
+    assert cache.tile_shape(band) == (32, 32)
+    window = cache.read_window("key", band, 40, 30, 10, 10)
+    np.testing.assert_array_equal(window, data[30:40, 40:50])
+    # only the tiles around the window are read, not whole rows
+    assert band.pixels_read == 2 * 32 * 32
+
+
+def test_block_cache_tiles_over_budget(data):
+    band = Band(data, (16, 16))
+    cache = rastertools.BlockCache(max_bytes=100, tile_size=32)
+    for _ in range(2):
+        window = cache.read_window("key", band, 0, 0, 10, 10)
+        np.testing.assert_array_equal(window, data[:10, :10])
+    assert (len(cache), cache.nbytes, cache.misses) == (0, 0, 2)
@@ -0,0 +1,67 @@
+"""Regression tests of the import time of modules used by command line tools."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+HEAVY = ["pandas", "requests", "tqdm", "click", "matplotlib", "osgeo", "IPython"]
+
+# seconds for the import of the module, without the interpreter startup
+BUDGET = 0.5
+
+
+def import_times(module, home):
+    """Cumulative import times in seconds of `module` and its dependencies.
+
+    Measured in a fresh interpreter with `python -X importtime`.
+    """
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env={"HOME": str(home), "PATH": ""},
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True,
+        timeout=60,
+        cwd=Path(__file__).parents[1],
+        check=True,
+    )
+    times = {}
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+@pytest.mark.parametrize(
+    "module, allowed",
+    [
+        ("planetarypy", []),
+        ("planetarypy.utils", []),
+        ("planetarypy.constants", []),
+        ("planetarypy.pdstools.cli", ["click"]),
+    ],
+)
+def test_import_time(module, allowed, tmp_path):
+    times = import_times(module, tmp_path)
+    imported = [name for name in HEAVY if name in times and name not in allowed]
+    assert imported == []
+    assert times[module] < BUDGET
+
+
+def test_constants_lookup_of_unknown_names(tmp_path):
+    code = (
+        "import sys, planetarypy.constants as c; "
+        "assert not hasattr(c, 'unknown'); "
+        "assert 'pandas' not in sys.modules"
+    )
+    subprocess.run(
+        [sys.executable, "-c", code],
+        env={"HOME": str(tmp_path), "PATH": ""},
+        cwd=Path(__file__).parents[1],
+        timeout=60,
+        check=True,
+    )
@@ -0,0 +1,213 @@
+import datetime as dt
+import hashlib
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+import requests
+
+from planetarypy import utils
+from planetarypy.exceptions import DownloadVerificationError
+
+
+def test_parse_nasa_times():
+    times = utils.parse_nasa_times(
+        [
+            "2004-135T12:23:02.123",
+            "2008-366T23:59:59",
+            "2010-05-06T01:02:03.5Z",
+            "2010-123",
+            "",
+            "2007-366T00:00:00",
+            "2010-02-30",
+        ]
+    )
+    expected = pd.to_datetime(
+        [
+            "2004-05-14T12:23:02.123",
+            "2008-12-31T23:59:59",
+            "2010-05-06T01:02:03.5",
+            "2010-05-03",
+            None,
+            None,
+            None,
+        ],
+        format="ISO8601",
+    ).to_numpy()
+    np.testing.assert_array_equal(times, expected)
+
+
+def test_parse_nasa_times_from_raw_bytes():
+    raw = np.frombuffer(b"2004-135T12:23:02 2005-001T00:00:00 ", dtype=np.uint8)
+    times = utils.parse_nasa_times(raw.reshape(2, 18))
+    assert times[1] == np.datetime64("2005-01-01T00:00:00")
+
+
+@pytest.fixture
+def http(http_server):
+    utils.configure_http(backoff_factor=0)
+    yield http_server
+    utils.configure_http(backoff_factor=0.5)
+
+
+def test_download_retries_server_errors(http, tmp_path):
+    (http.root / "data.txt").write_bytes(b"x" * 100_000)
+    http.server.fail_next = 2
+    path, headers = utils.download(f"{http.url}/data.txt", tmp_path, use_tqdm=False)
+    assert Path(path).read_bytes() == b"x" * 100_000
+    assert http.server.requests["/data.txt"] == 3
+    http.server.fail_next = 10
+    with pytest.raises(requests.HTTPError):
+        utils.download(f"{http.url}/data.txt", tmp_path, use_tqdm=False)
+
+
+def test_conditional_download(http, tmp_path):
+    remote = http.root / "data.txt"
+    remote.write_text("old")
+    os.utime(remote, (1e9, 1e9))
+    url = f"{http.url}/data.txt"
+    path, _ = utils.download(url, tmp_path, use_tqdm=False, conditional=True)
+    assert os.stat(path).st_mtime == 1e9
+    assert utils.get_remote_timestamp(url) == dt.datetime(2001, 9, 9, 1, 46, 40)
+    _, headers = utils.download(url, tmp_path, use_tqdm=False, conditional=True)
+    assert "content-length" not in headers  # 304 Not Modified
+    remote.write_text("new")
+    utils.download(url, tmp_path, use_tqdm=False, conditional=True)
+    assert Path(path).read_text() == "new"
+
+
+def test_conditional_download_with_etag(http, tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "download_validators", utils.FreshnessCache())
+    remote = http.root / "data.txt"
+    remote.write_text("old")
+    os.utime(remote, (1e9, 1e9))
+    http.server.etags["/data.txt"] = '"v1"'
+    url = f"{http.url}/data.txt"
+    path, _ = utils.download(url, tmp_path, use_tqdm=False, conditional=True)
+    assert isinstance(path, Path)
+    _, headers = utils.download(url, tmp_path, use_tqdm=False, conditional=True)
+    assert "content-length" not in headers  # 304 Not Modified
+    # changed content with the same modification time
+    remote.write_text("new")
+    os.utime(remote, (1e9, 1e9))
+    http.server.etags["/data.txt"] = '"v2"'
+    utils.download(url, tmp_path, use_tqdm=False, conditional=True)
+    assert path.read_text() == "new"
+
+
+def test_session_reuses_connections(http, tmp_path):
+    (http.root / "data.txt").write_text("data")
+    for _ in range(3):
+        assert utils.http_get(f"{http.url}/data.txt").text == "data"
+    assert len(http.server.clients) == 1
+    with pytest.raises(ValueError):
+        utils.configure_http(chunksize=10)
+
+
+def test_download_resumes_part_file(http, tmp_path):
+    remote = http.root / "data.bin"
+    remote.write_bytes(b"x" * 300_000)
+    os.utime(remote, (1e9, 1e9))
+    url = f"{http.url}/data.bin"
+    part = tmp_path / "data.bin.part"
+    part.write_bytes(b"y" * 100_000)
+    os.utime(part, (remote.stat().st_mtime,) * 2)
+    path, _ = utils.download(url, tmp_path, use_tqdm=False)
+    # only the missing bytes were requested
+    assert Path(path).read_bytes() == b"y" * 100_000 + b"x" * 200_000
+    assert not part.exists()
+    # a .part file of another version of the remote file is not continued
+    part.write_bytes(b"y" * 100_000)
+    utils.download(url, tmp_path, use_tqdm=False)
+    assert Path(path).read_bytes() == b"x" * 300_000
+
+
+def test_download_resumes_dropped_connection(http, tmp_path):
+    data = os.urandom(500_000)
+    (http.root / "data.bin").write_bytes(data)
+    http.server.drop_after = 123_456
+    path, _ = utils.download(
+        f"{http.url}/data.bin", tmp_path, use_tqdm=False, chunk_size=1000
+    )
+    assert Path(path).read_bytes() == data
+    assert http.server.requests["/data.bin"] == 2
+
+
+def test_download_verifies_md5(http, tmp_path):
+    data = os.urandom(1000)
+    (http.root / "data.bin").write_bytes(data)
+    url = f"{http.url}/data.bin"
+    with pytest.raises(DownloadVerificationError):
+        utils.download(url, tmp_path, use_tqdm=False, md5="0" * 32)
+    assert list(tmp_path.iterdir()) == [http.root]
+    utils.url_retrieve(url, tmp_path / "data.bin", md5=hashlib.md5(data).hexdigest())
+    assert (tmp_path / "data.bin").read_bytes() == data
+
+
+@pytest.mark.parametrize("ignore_range", [False, True])
+def test_segmented_download(http, tmp_path, ignore_range):
+    data = os.urandom(5 * 2**20 + 123)
+    (http.root / "data.bin").write_bytes(data)
+    http.server.ignore_range = ignore_range
+    # an interrupted range is resumed
+    http.server.drop_after = 12345
+    path, _ = utils.download(
+        f"{http.url}/data.bin",
+        tmp_path,
+        use_tqdm=False,
+        segments=4,
+        md5=hashlib.md5(data).hexdigest(),
+    )
+    assert Path(path).read_bytes() == data
+    assert list(tmp_path.glob("*.part")) == []
+    if not ignore_range:
+        # HEAD, 4 ranges and the resumed range
+        assert http.server.requests["/data.bin"] == 6
+
+
+def test_freshness_cache_merges_on_save(tmp_path):
+    path = tmp_path / "cache.json"
+    first = utils.FreshnessCache(path)
+    second = utils.FreshnessCache(path)
+    first.store("http://host/a", {"etag": "a1", "last_modified": None})
+    second.store("http://host/b", {"etag": "b1", "last_modified": None})
+    first.store("http://host/b", {"etag": "b2", "last_modified": None})
+    second.invalidate("http://host/a")
+    second.save()
+    entries = utils.FreshnessCache(path).entries
+    assert sorted(entries) == ["http://host/b"]
+    assert entries["http://host/b"]["etag"] == "b2"
+    assert (tmp_path / "cache.json.lock").exists()
+
+
+def test_segmented_download_without_progress(http, tmp_path):
+    (http.root / "data.bin").write_bytes(os.urandom(5 * 2**20))
+    http.server.empty_ranges = True
+    with pytest.raises(DownloadVerificationError):
+        utils.download(f"{http.url}/data.bin", tmp_path, use_tqdm=False, segments=4)
+    assert list(tmp_path.glob("*.part")) == []
+
+
+def test_freshness_cache(http, tmp_path):
+    urls = [f"{http.url}/{name}.txt" for name in "abc"]
+    for name in "abc":
+        (http.root / f"{name}.txt").write_text(name)
+        os.utime(http.root / f"{name}.txt", (1e9, 1e9))
+    cache = utils.FreshnessCache(tmp_path / "cache.json", ttl=60)
+    results = cache.check_many(urls, max_concurrency=3)
+    assert {url: entry["last_modified"] for url, entry in results.items()} == {
+        url: "Sun, 09 Sep 2001 01:46:40 GMT" for url in urls
+    }
+    assert cache.timestamp(urls[0]) == dt.datetime(2001, 9, 9, 1, 46, 40)
+    assert http.server.requests["/a.txt"] == 1
+    # a new cache loads the saved checks
+    cache = utils.FreshnessCache(tmp_path / "cache.json", ttl=0)
+    os.utime(http.root / "a.txt", (2e9, 2e9))
+    assert cache.check(urls[1])["last_modified"] == "Sun, 09 Sep 2001 01:46:40 GMT"
+    assert cache.timestamp(urls[0]) == dt.datetime(2033, 5, 18, 3, 33, 20)
+    assert isinstance(
+        cache.check_many([f"{http.url}/missing"])[f"{http.url}/missing"],
+        requests.HTTPError,
+    )